@@ -0,0 +1,12 @@
+"""
+Benchmark suite of kladia.
+author: @jocerfranquiz
+date: 2023-02-26
+version: 0.0.1
+
+    - generators.py: graph generators (random, power law, grid, tree) from 10^3 to 10^7 links
+    - suite.py: timings and peak memory of the Graph hot paths, saved as JSON and compared
+      between runs
+
+Usage: python -m benchmarks.suite --help
+"""
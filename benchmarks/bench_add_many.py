@@ -0,0 +1,60 @@
+"""
+Benchmark of the batched loader Graph.add_many against the per-item Graph.add loop.
+author: @jocerfranquiz
+date: 2023-01-08
+version: 0.0.1
+
+Usage, from the root of the repository: python -m benchmarks.bench_add_many [number_of_nodes] [number_of_links]
+"""
+
+import random
+import sys
+import time
+
+from src.kladia.graph import Graph
+
+
+def random_links(n_nodes: int, n_links: int, seed: int = 0) -> dict:
+    """Random links with a weight property
+    :param n_nodes: Number of nodes
+    :param n_links: Number of links
+    :param seed: Random seed. Defaults to 0.
+    :return: dict {(from_node, to_node): properties}
+    """
+    rnd = random.Random(seed)
+    links = {}
+    while len(links) < n_links:
+        links[(rnd.randrange(n_nodes), rnd.randrange(n_nodes))] = {'weight': rnd.random()}
+    return links
+
+
+def per_item(nodes: dict, links: dict) -> Graph:
+    """Load with one Graph.add call per item"""
+    g = Graph()
+    for node_k, node_p in nodes.items():
+        g.add(node_k, node_p)
+    for link_k, link_p in links.items():
+        g.add(link_k, link_p)
+    return g
+
+
+def batched(nodes: dict, links: dict) -> Graph:
+    """Load with a single Graph.add_many call"""
+    g = Graph()
+    g.add_many(nodes, links)
+    return g
+
+
+if __name__ == '__main__':
+    n_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_links = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    nodes = dict.fromkeys(range(n_nodes))
+    links = random_links(n_nodes, n_links)
+
+    timings = {}
+    for loader in (per_item, batched):
+        start = time.perf_counter()
+        g = loader(nodes, links)
+        timings[loader.__name__] = time.perf_counter() - start
+        print(f'{loader.__name__:>10}: {timings[loader.__name__]:.3f}s')
+    print(f'   speedup: {timings["per_item"] / timings["batched"]:.1f}x')
@@ -0,0 +1,91 @@
+"""
+Graph generators of the benchmark suite.
+author: @jocerfranquiz
+date: 2023-02-26
+version: 0.0.1
+
+Every generator returns the input of from_nodes_and_links(): a dict of nodes (without
+properties) and a dict of links with a 'weight' property, with about n_links links.
+Generators are deterministic for a seed, and O(n_links).
+"""
+
+import math
+import random
+
+
+def random_graph(n_links: int, degree: int = 10, seed: int = 0) -> (dict, dict):
+    """Random graph (Erdos-Renyi like): links between uniformly random nodes
+    :param n_links: Number of links
+    :param degree: Average out degree, the graph has n_links / degree nodes. Defaults to 10.
+    :param seed: Random seed. Defaults to 0.
+    :return: tuple (nodes, links)
+    """
+    rnd = random.Random(seed)
+    n_nodes = max(2, n_links // degree)
+    links = {}
+    while len(links) < n_links:
+        links[(rnd.randrange(n_nodes), rnd.randrange(n_nodes))] = {'weight': rnd.random()}
+    return dict.fromkeys(range(n_nodes)), links
+
+
+def power_law(n_links: int, degree: int = 5, seed: int = 0) -> (dict, dict):
+    """Scale-free graph (Barabasi-Albert preferential attachment): every new node links to
+    degree nodes, picked with a probability proportional to their degree
+    :param n_links: Number of links
+    :param degree: Links of every new node. Defaults to 5.
+    :param seed: Random seed. Defaults to 0.
+    :return: tuple (nodes, links)
+    """
+    rnd = random.Random(seed)
+    n_nodes = max(degree + 1, n_links // degree + 1)
+    # Every node appears once per link it has, sampling it is sampling by degree
+    ends = list(range(degree))
+    links = {}
+    for node_k in range(degree, n_nodes):
+        targets = set()
+        while len(targets) < degree:
+            targets.add(rnd.choice(ends))
+        for to_node in targets:
+            links[(node_k, to_node)] = {'weight': rnd.random()}
+            ends.append(to_node)
+        ends.extend([node_k] * degree)
+    return dict.fromkeys(range(n_nodes)), links
+
+
+def grid(n_links: int, seed: int = 0) -> (dict, dict):
+    """Square grid: every node links to its right and lower neighbours
+    :param n_links: Number of links, a side of s nodes has 2 * s * (s - 1) links
+    :param seed: Random seed of the weights. Defaults to 0.
+    :return: tuple (nodes, links)
+    """
+    rnd = random.Random(seed)
+    side = max(2, math.isqrt(n_links // 2) + 1)
+    links = {}
+    for row in range(side):
+        for col in range(side):
+            node_k = row * side + col
+            if col + 1 < side:
+                links[(node_k, node_k + 1)] = {'weight': rnd.random()}
+            if row + 1 < side:
+                links[(node_k, node_k + side)] = {'weight': rnd.random()}
+    return dict.fromkeys(range(side * side)), links
+
+
+def tree(n_links: int, branching: int = 4, seed: int = 0) -> (dict, dict):
+    """Complete tree: links go from every node to its children
+    :param n_links: Number of links, the tree has n_links + 1 nodes
+    :param branching: Children of every node. Defaults to 4.
+    :param seed: Random seed of the weights. Defaults to 0.
+    :return: tuple (nodes, links)
+    """
+    rnd = random.Random(seed)
+    links = {((node_k - 1) // branching, node_k): {'weight': rnd.random()} for node_k in range(1, n_links + 1)}
+    return dict.fromkeys(range(n_links + 1)), links
+
+
+GENERATORS = {
+    'random': random_graph,
+    'power_law': power_law,
+    'grid': grid,
+    'tree': tree,
+}
@@ -0,0 +1,215 @@
+"""
+Benchmark suite of the Graph hot paths.
+author: @jocerfranquiz
+date: 2023-02-26
+version: 0.0.1
+
+Every operation has a setup, which is not measured, and a run. A run is timed with
+time.perf_counter (the best of the repeats is kept) and then run once more under tracemalloc
+for its peak of allocated memory. The size of the graph of each dataset is measured with
+kladia.utils.get_size.
+
+Results are saved as JSON, and compared with the results of another run (e.g. of the parent
+commit): an operation that is slower, or whose peak of memory is larger, than its baseline by
+more than the threshold is a regression, and the exit status is 1.
+
+Usage, from the root of the repository (the package is imported as src.kladia, like the tests do):
+    python -m benchmarks.suite --sizes 1000 100000 --output results.json
+    python -m benchmarks.suite --output new.json --compare results.json --threshold 0.2
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from src.kladia.graph import Graph, from_nodes_and_links
+from src.kladia.utils import get_size
+
+from .generators import GENERATORS
+
+
+def _built(nodes: dict, links: dict) -> Graph:
+    """Setup of the operations on a loaded graph"""
+    return from_nodes_and_links(nodes, links)
+
+
+def _sample(links: dict, fraction: float) -> list:
+    """Pick some links, at least one
+    :param links: dict of links
+    :param fraction: Fraction of the links to pick
+    :return: list of links
+    """
+    return random.Random(0).sample(list(links), max(1, int(len(links) * fraction)))
+
+
+def _run_add(state) -> None:
+    g, nodes, links = state
+    for node_k, node_p in nodes.items():
+        g.add(node_k, node_p)
+    for link, link_p in links.items():
+        g.add(link, link_p)
+
+
+def _run_dlt(state) -> None:
+    g, dlt_links, dlt_nodes = state
+    for link in dlt_links:
+        g.dlt(link)
+    for node_k in dlt_nodes:
+        g.dlt(node_k)
+
+
+def _setup_dlt(nodes: dict, links: dict) -> tuple:
+    dlt_links = _sample(links, 0.01)
+    # Deleted nodes are not the ends of the deleted links
+    ends = {node_k for link in dlt_links for node_k in link}
+    dlt_nodes = [node_k for node_k in random.Random(1).sample(list(nodes), max(1, len(nodes) // 1000))
+                 if node_k not in ends]
+    return _built(nodes, links), dlt_links, dlt_nodes
+
+
+# name: (setup(nodes, links) -> state, run(state))
+OPERATIONS = {
+    'from_nodes_and_links': (lambda nodes, links: (nodes, links),
+                             lambda state: from_nodes_and_links(*state)),
+    'add': (lambda nodes, links: (Graph(), nodes, links), _run_add),
+    'add_many': (lambda nodes, links: (Graph(), nodes, links),
+                 lambda state: state[0].add_many(state[1], state[2])),
+    'dlt': (_setup_dlt, _run_dlt),
+    'nodes': (_built, lambda g: g.nodes()),
+    'links': (_built, lambda g: g.links()),
+    'to_matrix': (_built, lambda g: g.to_matrix(fmt='csr')),
+    'from_matrix': (lambda nodes, links: _built(nodes, links).to_matrix(fmt='csr'),
+                    lambda csr: Graph().from_matrix(csr, fmt='csr')),
+}
+
+
+def measure(setup, run, nodes: dict, links: dict, repeat: int = 3) -> dict:
+    """Measure an operation
+    :param setup: Function (nodes, links) -> state, not measured
+    :param run: Function (state) -> result, measured
+    :param nodes: Nodes of the dataset
+    :param links: Links of the dataset
+    :param repeat: Number of timed runs. Defaults to 3.
+    :return: dict with 'seconds' (best run) and 'peak_bytes' (peak of the allocated memory)
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        state = setup(nodes, links)
+        start = time.perf_counter()
+        run(state)
+        best = min(best, time.perf_counter() - start)
+        del state
+    state = setup(nodes, links)
+    tracemalloc.start()
+    try:
+        run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': best, 'peak_bytes': peak}
+
+
+def run_suite(sizes: list, generators: list = None, operations: list = None, repeat: int = 3,
+              graph_size: bool = True, log=None) -> dict:
+    """Run the benchmarks
+    :param sizes: Numbers of links of the datasets
+    :param generators: Names of the generators. Defaults to None (all of them).
+    :param operations: Names of the operations. Defaults to None (all of them).
+    :param repeat: Number of timed runs per operation. Defaults to 3.
+    :param graph_size: Measure the graph of every dataset with get_size. Defaults to True.
+    :param log: Function called with a line of progress. Defaults to None.
+    :return: dict with the 'meta' data of the run and the list of 'results'
+    """
+    results = []
+    for name in generators or GENERATORS:
+        for size in sizes:
+            nodes, links = GENERATORS[name](size)
+            dataset = {'generator': name, 'size': size, 'nodes': len(nodes), 'links': len(links)}
+            if graph_size:
+                results.append(dict(dataset, operation='graph', seconds=None,
+                                    peak_bytes=get_size(_built(nodes, links))))
+            for operation in operations or OPERATIONS:
+                setup, run = OPERATIONS[operation]
+                result = dict(dataset, operation=operation, **measure(setup, run, nodes, links, repeat))
+                results.append(result)
+                if log is not None:
+                    log(f"{name:>10} {size:>10} {operation:>22}: {result['seconds']:.4f}s "
+                        f"{result['peak_bytes'] / 2 ** 20:.1f}MiB")
+    return {'meta': _meta(), 'results': results}
+
+
+def _meta() -> dict:
+    """Get the data of the machine and commit of a run"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z')}
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.1) -> list:
+    """Find the regressions of a run, in time and in peak of memory
+    :param baseline: Results of the reference run
+    :param current: Results of the new run
+    :param threshold: Accepted increase, 0.1 is 10% slower or larger. Defaults to 0.1.
+    :return: list of (generator, size, operation, metric, baseline value, current value), for
+    the metrics ('seconds' or 'peak_bytes') above the baseline by more than the threshold
+    """
+    def key(result):
+        return result['generator'], result['size'], result['operation']
+
+    reference = {key(result): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        for metric in ('seconds', 'peak_bytes'):
+            before = reference.get(key(result), {}).get(metric)
+            if before and result[metric] and result[metric] > before * (1 + threshold):
+                regressions.append((*key(result), metric, before, result[metric]))
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    """Command line of the suite
+    :param argv: Arguments. Defaults to None (sys.argv).
+    :return: Exit status, 1 if there are regressions
+    """
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite', description=__doc__.split('\n\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help='numbers of links, up to 10^7 (default: 10^3 10^4 10^5)')
+    parser.add_argument('--generators', nargs='+', choices=list(GENERATORS))
+    parser.add_argument('--operations', nargs='+', choices=list(OPERATIONS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-graph-size', action='store_true', help='do not measure the graphs with get_size')
+    parser.add_argument('--output', help='JSON file to save the results to')
+    parser.add_argument('--compare', help='JSON file of a previous run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1, help='accepted increase of time and memory (default: 0.1)')
+    args = parser.parse_args(argv)
+
+    current = run_suite(args.sizes, args.generators, args.operations, args.repeat,
+                        not args.no_graph_size, log=print)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        for generator, size, operation, metric, before, after in regressions:
+            if metric == 'seconds':
+                change = f"{before:.4f}s -> {after:.4f}s"
+            else:
+                change = f"{before / 2 ** 20:.1f}MiB -> {after / 2 ** 20:.1f}MiB"
+            print(f"REGRESSION {generator} {size} {operation}: {change} ({after / before - 1:+.0%})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+from .utils import dict_nested_order, get_size, memoize
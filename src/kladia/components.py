@@ -0,0 +1,140 @@
+"""
+This module contains the strongly connected components (SCC) and topological sort algorithms on graphs.
+author: @jocerfranquiz
+date: 2023-01-22
+version: 0.0.1
+
+All the algorithms run in linear time, O(V + E), and none of them recurses, so they work on
+graphs deeper than the recursion limit.
+"""
+
+from .graph import Graph
+
+
+class CycleError(ValueError):
+    """The graph has a cycle, so it has no topological order"""
+
+    def __init__(self, cycle: list) -> None:
+        """Initialize the error with the cycle found
+        :param cycle: Node keys of the cycle, in link order
+        """
+        super().__init__(f"The graph has a cycle: {cycle}")
+        self.cycle = cycle
+
+
+def strongly_connected_components(g) -> list[list]:
+    """Get the strongly connected components of a graph with an iterative Tarjan's algorithm.
+    The call stack of the recursive version is a stack of (node_key, neighbours iterator).
+    :param g: Graph instance
+    :return: list of components (lists of node keys), in reverse topological order: no
+    component has links to the components after it
+    """
+    adjacency = g.adjacency()
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+    for root in adjacency:
+        if root in index:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(adjacency[root]))]
+        while work:
+            node_k, neighbours = work[-1]
+            for to_node in neighbours:
+                if to_node not in index:
+                    index[to_node] = low[to_node] = counter
+                    counter += 1
+                    stack.append(to_node)
+                    on_stack.add(to_node)
+                    work.append((to_node, iter(adjacency[to_node])))
+                    break
+                elif to_node in on_stack and index[to_node] < low[node_k]:
+                    low[node_k] = index[to_node]
+            else:
+                # All the links of node_k are done, as if the recursive call returned
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[node_k] < low[parent]:
+                        low[parent] = low[node_k]
+                if low[node_k] == index[node_k]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node_k:
+                            break
+                    components.append(component)
+    return components
+
+
+def topological_sort(g) -> list:
+    """Get the nodes in topological order (every link goes from a node to a later one) with
+    Kahn's algorithm
+    :param g: Graph instance
+    :return: list of node keys
+    :raises CycleError: if the graph has a cycle, the cycle is in its cycle attribute
+    """
+    adjacency = g.adjacency()
+    in_degree = dict.fromkeys(adjacency, 0)
+    for links in adjacency.values():
+        for to_node in links:
+            in_degree[to_node] += 1
+
+    # The order list is also the queue of nodes without incoming links left
+    order = [node_k for node_k, degree in in_degree.items() if degree == 0]
+    i = 0
+    while i < len(order):
+        for to_node in adjacency[order[i]]:
+            in_degree[to_node] -= 1
+            if in_degree[to_node] == 0:
+                order.append(to_node)
+        i += 1
+
+    if len(order) < len(in_degree):
+        # Every node left has a predecessor left, walking them back ends in a cycle
+        node_k = next(node_k for node_k, degree in in_degree.items() if degree > 0)
+        seen = {}
+        walk = []
+        while node_k not in seen:
+            seen[node_k] = len(walk)
+            walk.append(node_k)
+            node_k = next(from_node for from_node in g.predecessors(node_k) if in_degree[from_node] > 0)
+        cycle = walk[seen[node_k]:]
+        cycle.reverse()
+        raise CycleError(cycle)
+    return order
+
+
+def condensation(g) -> (Graph, dict):
+    """Get the condensation of a graph: the directed acyclic graph (DAG) with a node for each
+    strongly connected component, and a link between components with links between them.
+    :param g: Graph instance
+    :return: tuple (dag, component). The nodes of dag are numbered in topological order and
+    have a 'members' property with their node keys. component maps every node key to its
+    component.
+    """
+    components = strongly_connected_components(g)
+    components.reverse()
+    component = {}
+    for i, members in enumerate(components):
+        for node_k in members:
+            component[node_k] = i
+    links = set()
+    for node_k, adjacency in g.adjacency().items():
+        i = component[node_k]
+        for to_node in adjacency:
+            j = component[to_node]
+            if i != j:
+                links.add((i, j))
+
+    dag = Graph()
+    dag.add_many(nodes=((i, {'members': members}) for i, members in enumerate(components)), links=links)
+    return dag, component
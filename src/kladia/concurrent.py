@@ -0,0 +1,195 @@
+"""
+This module contains the concurrent access to a graph shared by many threads: versioned
+snapshots for the readers and a change journal for the writers.
+author: @jocerfranquiz
+date: 2023-03-05
+version: 0.0.1
+
+A ConcurrentGraph publishes immutable versions of a graph. A reader takes the current version
+with snapshot(), a single read of an attribute, and works on it without locks while writers
+publish new versions: a version never changes once published.
+
+A writer records its mutations (add, dlt, add_many, union_update, intersect_update) in the
+journal of a Transaction. On commit, under a lock shared by the writers only, the journal is
+replayed on a copy on write of the current version (Graph.copy(cow=True): the graph dict is
+copied in O(V), a node dict only when the journal changes it) and the new version replaces the
+current one with a single assignment. If the replay fails nothing is published. Batching many
+mutations in a transaction pays the O(V) copy once.
+
+An old version is referenced only by the snapshots taken from it, so it is reclaimed as soon
+as its last snapshot is closed (or dropped). live_versions() lists the versions not reclaimed yet.
+"""
+
+import threading
+import weakref
+
+from .graph import Graph
+
+# Graph methods that can be recorded in a journal
+_OPERATIONS = ('add', 'dlt', 'add_many', 'union_update', 'intersect_update')
+
+# Graph methods of a snapshot, they do not change the graph
+_READS = ('layout', 'to_dict', 'nodes', 'links', 'adjacency', 'successors', 'predecessors',
+          'in_degree', 'out_degree', 'iter_nodes', 'iter_links', 'to_matrix', 'freeze', 'memory_usage', 'copy')
+
+
+class Snapshot:
+    """Read-only view of a version of a ConcurrentGraph. The read methods of Graph (nodes(),
+    links(), adjacency(), predecessors(), to_matrix(), ...) are available until close().
+    Do not modify the dicts they return, they are shared with the other readers."""
+
+    def __init__(self, version: int, g: Graph) -> None:
+        """Initialize snapshot
+        :param version: Version number
+        :param g: Graph of the version
+        """
+        self.__version = version
+        self.__graph = g
+
+    @property
+    def version(self) -> int:
+        """Version number of the snapshot"""
+        return self.__version
+
+    def __getattr__(self, name: str) -> object:
+        if name not in _READS:
+            raise AttributeError(f"Snapshot has no attribute {name}, snapshots are read-only")
+        if self.__graph is None:
+            raise ValueError(f"Snapshot of version {self.__version} is closed")
+        return getattr(self.__graph, name)
+
+    def close(self) -> None:
+        """Release the version, it is reclaimed when no other snapshot uses it"""
+        self.__graph = None
+
+    def __enter__(self) -> object:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class Transaction:
+    """Journal of mutations of a ConcurrentGraph. The mutations are applied on commit(), all
+    of them or none. As a context manager it commits on exit, or discards the journal if the
+    block raised."""
+
+    def __init__(self, owner: object) -> None:
+        """Initialize transaction with an empty journal
+        :param owner: ConcurrentGraph instance
+        """
+        self.__owner = owner
+        self.__journal = []
+
+    @property
+    def journal(self) -> list:
+        """Recorded mutations, as (method name, args, kwargs) tuples"""
+        return self.__journal
+
+    def add(self, obj: int or (int, int), properties: dict or None = None) -> None:
+        """Record Graph.add()"""
+        self.__journal.append(('add', (obj, properties), {}))
+
+    def dlt(self, obj: int or (int, int)) -> None:
+        """Record Graph.dlt()"""
+        self.__journal.append(('dlt', (obj,), {}))
+
+    def add_many(self, nodes: dict or iter = None, links: dict or iter = None) -> None:
+        """Record Graph.add_many(). Iterables are consumed on commit."""
+        self.__journal.append(('add_many', (nodes, links), {}))
+
+    def union_update(self, g: Graph, policy: str or callable = 'right') -> None:
+        """Record Graph.union_update()"""
+        self.__journal.append(('union_update', (g, policy), {}))
+
+    def intersect_update(self, g: Graph, policy: str or callable = 'right') -> None:
+        """Record Graph.intersect_update()"""
+        self.__journal.append(('intersect_update', (g, policy), {}))
+
+    def commit(self) -> int:
+        """Apply the journal and publish the new version. The journal is emptied.
+        :return: Version number published (the current one if the journal is empty)
+        """
+        journal, self.__journal = self.__journal, []
+        return self.__owner.commit(journal)
+
+    def discard(self) -> None:
+        """Empty the journal without applying it"""
+        self.__journal = []
+
+    def __enter__(self) -> object:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+
+class ConcurrentGraph:
+    """Graph shared by many threads with snapshot isolation"""
+
+    def __init__(self, g: Graph = None) -> None:
+        """Initialize with a graph as version 0. The graph is copied on write, later changes
+        of g are not seen by the ConcurrentGraph.
+        :param g: Graph instance. Defaults to None (an empty graph).
+        """
+        if g is not None and not isinstance(g, Graph):
+            raise TypeError(f"Graph {g} must be of type Graph")
+        g = Graph() if g is None else g.copy(cow=True)
+        # (version, graph) of the current version, replaced as a whole on commit
+        self.__head = (0, g)
+        self.__lock = threading.Lock()
+        # Versions still referenced, by the head or by snapshots
+        self.__published = weakref.WeakValueDictionary({0: g})
+
+    @property
+    def version(self) -> int:
+        """Current version number, incremented by every commit that changes the graph"""
+        return self.__head[0]
+
+    def snapshot(self) -> Snapshot:
+        """Get the current version, without locks. Use it as a context manager or close it
+        when done, so an old version can be reclaimed.
+        :return: Snapshot instance
+        """
+        version, g = self.__head
+        return Snapshot(version, g)
+
+    def transaction(self) -> Transaction:
+        """Start a journal of mutations
+        :return: Transaction instance
+        """
+        return Transaction(self)
+
+    def commit(self, journal: iter) -> int:
+        """Apply a journal to a copy of the current version and publish it. Writers are
+        serialised, readers are never blocked. Nothing is published if a mutation raises.
+        :param journal: Iterable of (method name, args, kwargs) tuples, see Transaction.journal
+        :return: Version number published (the current one if the journal is empty)
+        """
+        journal = list(journal)
+        for entry in journal:
+            if not (isinstance(entry, tuple) and len(entry) == 3):
+                raise TypeError(f"Journal entry {entry} must be a (name, args, kwargs) tuple")
+            if entry[0] not in _OPERATIONS:
+                raise ValueError(f"Operation {entry[0]} must be one of {', '.join(_OPERATIONS)}")
+        with self.__lock:
+            version, current = self.__head
+            if not journal:
+                return version
+            g = current.copy(cow=True)
+            for name, args, kwargs in journal:
+                getattr(g, name)(*args, **kwargs)
+            version += 1
+            self.__published[version] = g
+            # Publish: readers see either the old or the new (version, graph) pair
+            self.__head = (version, g)
+        return version
+
+    def live_versions(self) -> list:
+        """Get the versions not reclaimed yet: the current one and the ones of open snapshots
+        :return: Sorted list of version numbers
+        """
+        return sorted(self.__published.keys())
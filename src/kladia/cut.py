@@ -0,0 +1,239 @@
+"""
+This module contains the global minimum cut algorithm on graphs: Karger-Stein.
+author: @jocerfranquiz
+date: 2023-02-05
+version: 0.0.1
+
+Links are taken as undirected and the size of a cut is its number of links, so a link (u, v)
+and a link (v, u) count twice. Self-loops are never cut.
+
+Karger's algorithm contracts random links until two super nodes are left, the links between
+them are a cut. Contracting the links in the order of a random permutation, with a
+disjoint-set, is the same as picking them one at a time. Karger-Stein contracts only down to
+n / sqrt(2) nodes, where a minimum cut still survives with probability 1/2, and then recurses
+twice, so a trial finds a minimum cut with probability O(1 / log n) in O(n^2 log n).
+
+The graph is a weighted multigraph: the parallel links between two nodes are one link
+weighted by their number, and after every contraction the links between two super nodes are
+merged again, so a subproblem of k nodes has at most k^2 / 2 links.
+
+A trial is independent from the others, so they run in a pool of processes. The links are
+exported once to a flat array of weighted links in shared memory, every worker maps it when
+it starts and reads the first contraction of every trial from it, and only the seeds of the
+trials are sent to the workers.
+"""
+
+import os
+import random
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil, log2, sqrt
+from multiprocessing.shared_memory import SharedMemory
+
+from .disjoint_set import DisjointSet
+
+# Subproblems up to this number of nodes are solved exactly
+_EXACT = 32
+
+# Links of the graph in a worker process: (shared memory, edge array, number of nodes)
+_shared = None
+
+
+def _edge_array(g) -> (list, array):
+    """Export the links of a graph to a flat array of weighted links, the parallel links
+    between two nodes (either way) are merged into one link weighted by their number
+    :param g: Graph instance
+    :return: tuple (keys, edges). keys are the node keys by index, edges is an array
+    [u0, v0, w0, u1, v1, w1, ...] of node indexes (u < v) and weights, without self-loops
+    """
+    adjacency = g.adjacency()
+    keys = list(adjacency)
+    index = {node_k: i for i, node_k in enumerate(keys)}
+    weights = {}
+    for from_node, node_links in adjacency.items():
+        i = index[from_node]
+        for to_node in node_links:
+            j = index[to_node]
+            if i != j:
+                pair = (i, j) if i < j else (j, i)
+                weights[pair] = weights.get(pair, 0) + 1
+    edges = array('q')
+    for (i, j), w in weights.items():
+        edges.append(i)
+        edges.append(j)
+        edges.append(w)
+    return keys, edges
+
+
+def _contract(edges, n: int, t: int, rnd: random.Random) -> (list, int, array):
+    """Contract random links until t super nodes are left. A link of weight w is w parallel
+    links, so it is picked with an exponential race of rate w: the order of the keys is the
+    order of the first copy of every link in a random permutation of all the copies.
+    :param edges: Flat array (or memoryview) [u0, v0, w0, ...] of weighted links
+    :param n: Number of nodes
+    :param t: Number of super nodes to leave
+    :param rnd: Random generator
+    :return: tuple (labels, k, edges). labels maps every node to its super node, k is the
+    number of super nodes (more than t if the links run out) and edges are the weighted links
+    between them, the parallel ones merged
+    """
+    weights = edges[2::3]
+    expovariate = rnd.expovariate
+    keys = [expovariate(w) for w in weights]
+    sets = DisjointSet(n)
+    for i in sorted(range(len(keys)), key=keys.__getitem__):
+        if sets.sets <= t:
+            break
+        sets.union(edges[3 * i], edges[3 * i + 1])
+    roots = {}
+    labels = [roots.setdefault(sets.find(i), len(roots)) for i in range(n)]
+    merged = {}
+    for u, v, w in zip(edges[0::3], edges[1::3], weights):
+        a, b = labels[u], labels[v]
+        if a != b:
+            pair = (a, b) if a < b else (b, a)
+            merged[pair] = merged.get(pair, 0) + w
+    sub_edges = array('q')
+    for (a, b), w in merged.items():
+        sub_edges.append(a)
+        sub_edges.append(b)
+        sub_edges.append(w)
+    return labels, len(roots), sub_edges
+
+
+def _stoer_wagner(edges, n: int) -> (int, list):
+    """Exact minimum cut of a small graph (Stoer-Wagner) over a weight matrix, O(n^3)
+    :param edges: Flat array [u0, v0, w0, ...] of weighted links
+    :param n: Number of nodes
+    :return: tuple (cut, side). side has a 0 or a 1 for every node
+    """
+    matrix = [[0] * n for _ in range(n)]
+    for u, v, w in zip(edges[0::3], edges[1::3], edges[2::3]):
+        matrix[u][v] += w
+        matrix[v][u] += w
+    # Nodes merged into every super node
+    groups = [[i] for i in range(n)]
+    nodes = list(range(n))
+    best, best_group = None, None
+    while len(nodes) > 1:
+        # Maximum adjacency order: the next node is the most linked to the ones before it
+        linked = [0] * n
+        rest = nodes[:]
+        s = t = None
+        while rest:
+            s, t = t, max(rest, key=linked.__getitem__)
+            rest.remove(t)
+            row = matrix[t]
+            for v in rest:
+                linked[v] += row[v]
+        # The cut of the phase splits t from the others
+        if best is None or linked[t] < best:
+            best, best_group = linked[t], groups[t][:]
+        groups[s].extend(groups[t])
+        row_s, row_t = matrix[s], matrix[t]
+        for v in range(n):
+            row_s[v] += row_t[v]
+            matrix[v][s] = row_s[v]
+        row_s[s] = 0
+        nodes.remove(t)
+    side = [0] * n
+    for i in best_group:
+        side[i] = 1
+    return best, side
+
+
+def _karger_stein(edges, n: int, rnd: random.Random) -> (int, list):
+    """One Karger-Stein trial
+    :param edges: Flat array (or memoryview) [u0, v0, w0, ...] of weighted links, without self-loops
+    :param n: Number of nodes
+    :param rnd: Random generator
+    :return: tuple (cut, side). side has a 0 or a 1 for every node
+    """
+    if not edges:
+        return 0, [1] + [0] * (n - 1)
+    if n <= _EXACT:
+        return _stoer_wagner(edges, n)
+    t = ceil(1 + n / sqrt(2))
+    best, best_side = None, None
+    for _ in range(2):
+        labels, k, sub_edges = _contract(edges, n, t, rnd)
+        cut, side = _karger_stein(sub_edges, k, rnd)
+        if best is None or cut < best:
+            best, best_side = cut, [side[label] for label in labels]
+    return best, best_side
+
+
+def _trial(edges, n: int, seed: int) -> (int, bytes):
+    """Run a trial over an edge array
+    :param edges: Flat array (or memoryview) [u0, v0, w0, ...] of weighted links
+    :param n: Number of nodes
+    :param seed: Seed of the trial
+    :return: tuple (cut, side). side has a 0 or a 1 byte for every node
+    """
+    cut, side = _karger_stein(edges, n, random.Random(seed))
+    return cut, bytes(side)
+
+
+def _init_worker(name: str, size: int, n: int) -> None:
+    """Map the shared edge array in a worker process
+    :param name: Shared memory name
+    :param size: Number of items of the edge array
+    :param n: Number of nodes
+    """
+    global _shared
+    # Workers share the resource tracker of the parent, which unlinks the memory
+    shm = SharedMemory(name=name)
+    _shared = (shm, shm.buf[:size * 8].cast('q'), n)
+
+
+def _worker_trial(seed: int) -> (int, bytes):
+    """Run a trial over the shared edge array
+    :param seed: Seed of the trial
+    :return: See _trial()
+    """
+    _, edges, n = _shared
+    return _trial(edges, n, seed)
+
+
+def min_cut(g, trials: int = None, workers: int = None, seed: int = 0) -> (int, (set, set)):
+    """Global minimum cut with Karger-Stein trials. The result is the best cut of all the
+    trials, it is a minimum cut with high probability. The same seed gives the same result,
+    with any number of workers.
+    :param g: Graph instance
+    :param trials: Number of trials. Defaults to None, log2(n)^2 trials for n nodes.
+    :param workers: Number of worker processes. 1 runs the trials in this process.
+    Defaults to None, the number of CPUs.
+    :param seed: Seed of the random generator. Defaults to 0.
+    :return: tuple (cut, (side, other_side)). cut is the number of links between the sides.
+    """
+    keys, edges = _edge_array(g)
+    n = len(keys)
+    if n < 2:
+        raise ValueError("The graph needs at least 2 nodes to be cut")
+    if trials is None:
+        trials = max(1, ceil(log2(n) ** 2))
+    if trials < 1:
+        raise ValueError(f"Number of trials {trials} must be positive")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    rnd = random.Random(seed)
+    seeds = [rnd.getrandbits(64) for _ in range(trials)]
+
+    if workers == 1 or trials == 1 or not edges:
+        results = (_trial(edges, n, s) for s in seeds)
+        best = min(results, key=lambda result: result[0])
+    else:
+        shm = SharedMemory(create=True, size=len(edges) * edges.itemsize)
+        try:
+            shm.buf[:len(edges) * edges.itemsize] = edges.tobytes()
+            with ProcessPoolExecutor(max_workers=min(workers, trials), initializer=_init_worker,
+                                     initargs=(shm.name, len(edges), n)) as executor:
+                chunksize = max(1, trials // (workers * 4))
+                # map() keeps the order of the trials, min() the first of the best ones
+                best = min(executor.map(_worker_trial, seeds, chunksize=chunksize), key=lambda result: result[0])
+        finally:
+            shm.close()
+            shm.unlink()
+
+    cut, side = best
+    return cut, ({keys[i] for i in range(n) if side[i]}, {keys[i] for i in range(n) if not side[i]})
@@ -0,0 +1,85 @@
+"""
+This module contains a disjoint-set (union-find) structure.
+author: @jocerfranquiz
+date: 2023-01-29
+version: 0.0.1
+
+Elements are the integers 0..n-1. Parents are kept in an array.array and ranks in a
+bytearray (a rank never exceeds log2(n)), so an element costs 9 bytes. find() halves the
+path it walks and union() links by rank, so any sequence of m operations takes
+O(m * alpha(n)), almost linear.
+"""
+
+from array import array
+
+
+class DisjointSet:
+    """Disjoint sets of the integers 0..n-1"""
+
+    def __init__(self, n: int = 0) -> None:
+        """Initialize n singleton sets
+        :param n: Number of elements. Defaults to 0.
+        """
+        if n < 0:
+            raise ValueError(f"Number of elements {n} must not be negative")
+        self.__parent = array('q', range(n))
+        self.__rank = bytearray(n)
+        self.__sets = n
+
+    def __len__(self) -> int:
+        """Number of elements"""
+        return len(self.__parent)
+
+    @property
+    def sets(self) -> int:
+        """Number of disjoint sets"""
+        return self.__sets
+
+    def add(self) -> int:
+        """Add a new singleton set
+        :return: The new element
+        """
+        x = len(self.__parent)
+        self.__parent.append(x)
+        self.__rank.append(0)
+        self.__sets += 1
+        return x
+
+    def find(self, x: int) -> int:
+        """Get the representative of the set of x
+        :param x: Element
+        :return: Representative element
+        """
+        parent = self.__parent
+        while parent[x] != x:
+            # Path halving: every other node on the path points to its grandparent
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x: int, y: int) -> bool:
+        """Merge the sets of x and y
+        :param x: Element
+        :param y: Element
+        :return: True if they were in different sets
+        """
+        x = self.find(x)
+        y = self.find(y)
+        if x == y:
+            return False
+        rank = self.__rank
+        if rank[x] < rank[y]:
+            x, y = y, x
+        self.__parent[y] = x
+        if rank[x] == rank[y]:
+            rank[x] += 1
+        self.__sets -= 1
+        return True
+
+    def connected(self, x: int, y: int) -> bool:
+        """Test if x and y are in the same set
+        :param x: Element
+        :param y: Element
+        :return: True if they are in the same set
+        """
+        return self.find(x) == self.find(y)
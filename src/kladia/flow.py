@@ -0,0 +1,119 @@
+"""
+This module contains the maximum flow and minimum cut algorithms on graphs.
+author: @jocerfranquiz
+date: 2023-02-05
+version: 0.0.1
+
+max_flow() uses Dinic's algorithm, O(V^2 * E): a BFS builds the level graph from the source,
+then a DFS pushes blocking flows along links that go one level up, until the sink can not be
+reached anymore.
+
+The residual graph is built once from the graph links into flat arrays: every link is an arc
+and its reverse arc is the next position (arc ^ 1), so nothing is stored in the properties
+dicts of the graph.
+"""
+
+from array import array
+
+
+def max_flow(g, source: int, sink: int, capacity: str = 'capacity',
+             default: float = 1.0) -> (float, dict, (set, set)):
+    """Maximum flow from source to sink, and the minimum cut
+    :param g: Graph instance
+    :param source: Source node key
+    :param sink: Sink node key
+    :param capacity: Link property with the capacity. Defaults to 'capacity'.
+    :param default: Capacity of links without the property. Defaults to 1.0.
+    :return: tuple (value, flows, (source_side, sink_side)). flows maps every link
+    (from_node, to_node) to its flow. The links from source_side to sink_side are a
+    minimum cut, their capacities add up to value.
+    """
+    adjacency = g.adjacency()
+    for node_k in (source, sink):
+        if node_k not in adjacency:
+            raise ValueError(f"Node key {node_k} does not exist")
+    if source == sink:
+        raise ValueError("Source and sink must be different nodes")
+
+    keys = list(adjacency)
+    index = {node_k: i for i, node_k in enumerate(keys)}
+    n = len(keys)
+
+    # Arcs in flat arrays, arcs of node i are linked from head[i] through next_arc
+    head = array('q', [-1]) * n
+    next_arc = array('q')
+    to = array('q')
+    cap = array('d')
+    links = []
+    for from_node, node_links in adjacency.items():
+        i = index[from_node]
+        for to_node, link_p in node_links.items():
+            c = float(link_p.get(capacity, default)) if link_p is not None else float(default)
+            if c < 0:
+                raise ValueError(f"Capacity {c} of link {(from_node, to_node)} must not be negative")
+            j = index[to_node]
+            links.append((from_node, to_node))
+            to.extend((j, i))
+            cap.extend((c, 0.0))
+            next_arc.extend((head[i], head[j]))
+            head[i] = len(to) - 2
+            head[j] = len(to) - 1
+    original = array('d', cap)
+
+    s, t = index[source], index[sink]
+    level = array('q', [-1]) * n
+    value = 0.0
+    while True:
+        # BFS: level of every node reachable through arcs with capacity left
+        for i in range(n):
+            level[i] = -1
+        level[s] = 0
+        queue = [s]
+        for i in queue:
+            arc = head[i]
+            while arc != -1:
+                j = to[arc]
+                if cap[arc] > 0 and level[j] < 0:
+                    level[j] = level[i] + 1
+                    queue.append(j)
+                arc = next_arc[arc]
+        if level[t] < 0:
+            break
+
+        # DFS: push blocking flow, current[i] is the next arc of i to try
+        current = array('q', head)
+        path = []
+        i = s
+        while True:
+            if i == t:
+                pushed = min(cap[arc] for arc in path)
+                for arc in path:
+                    cap[arc] -= pushed
+                    cap[arc ^ 1] += pushed
+                value += pushed
+                # Go back to the tail of the first saturated arc
+                k = next(k for k, arc in enumerate(path) if cap[arc] == 0)
+                del path[k:]
+                i = to[path[-1]] if path else s
+                continue
+            arc = current[i]
+            while arc != -1 and not (cap[arc] > 0 and level[to[arc]] == level[i] + 1):
+                arc = next_arc[arc]
+            current[i] = arc
+            if arc != -1:
+                path.append(arc)
+                i = to[arc]
+            elif i == s:
+                break
+            else:
+                # Dead end: drop i from the level graph and go back
+                level[i] = -1
+                arc = path.pop()
+                i = to[arc ^ 1]
+                current[i] = next_arc[current[i]]
+
+    # The source side of the cut is what the last BFS reached
+    source_side = {keys[i] for i in range(n) if level[i] >= 0}
+    sink_side = set(keys) - source_side
+    flows = {link: original[2 * pos] - cap[2 * pos] for pos, link in enumerate(links)}
+    return value, flows, (source_side, sink_side)
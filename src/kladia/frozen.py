@@ -0,0 +1,487 @@
+"""
+This module contains the frozen (read-only) representation of graphs.
+author: @jocerfranquiz
+date: 2023-01-08
+version: 0.0.1
+
+A FrozenGraph is a compressed sparse row (CSR) snapshot of a Graph:
+
+    - ``keys``: the node keys, sorted. The position of a key is its index.
+    - ``offsets``: the links of node ``i`` are at positions ``offsets[i]:offsets[i + 1]``.
+    - ``targets``: the index of the node each link points to.
+    - ``weights``: optional float weight of each link, taken from the ``'weight'`` property.
+
+The buffers are ``array.array`` (or NumPy arrays), so a link costs 8 bytes (16 with weights)
+instead of a dict entry per link. Properties dicts are copied, or dropped. A link whose only
+property is a float weight keeps no dict, its properties are rebuilt from the weights buffer.
+
+save() writes the buffers to a binary file that open() maps with mmap, the buffers are then
+read-only memoryviews (or NumPy arrays) over the mapped pages: nothing is read or copied
+until it is used, and all the processes that open the same file share its pages. The file is
+a header followed by 8-byte aligned sections:
+
+    - header: magic ``b'KLADIAFG'``, format version and flags (uint32), then n, m and the
+      offset of each section (int64, little-endian)
+    - keys (n int64), offsets (n + 1 int64), targets (m int64), weights (m float64, optional)
+    - properties: the node properties, link properties and graph attributes as UTF-8 JSON,
+      parsed on first use
+
+The properties are JSON, not pickle, so opening a file from an untrusted source can not run
+code. Property values must be JSON types (None, bool, int, float, str, list and dict with str
+keys), which come back unchanged: save() raises TypeError for the others, e.g. a tuple would be
+read back as a list and an int dict key as a str. Buffers are in the byte order of the machine that wrote them.
+open() checks that every section lies inside the file, and close() (or a with block) unmaps it.
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from .graph import _MATRIX_FORMATS, _csr_to_matrix
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+# Binary file: magic, version, flags, n, m, keys, offsets, targets, weights, blob offset and blob length
+_HEADER = struct.Struct('<8sIIqqqqqqqq')
+_MAGIC = b'KLADIAFG'
+_VERSION = 2
+_WEIGHTS = 1
+_BIG_ENDIAN = 2
+
+
+def _is_weight(value) -> bool:
+    """Check if a property value is a number the weights buffer keeps as is. An int would
+    be read back as a float, and a large one would lose precision.
+    :param value: Property value
+    :return: True for float values
+    """
+    return type(value) is float
+
+
+def _check_json(value) -> None:
+    """Check that a value comes back unchanged from JSON, walking it without recursion
+    :param value: Value to save
+    """
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if type(value) is dict:
+            for key in value:
+                if type(key) is not str:
+                    raise TypeError(f"Key {key!r} must be of type str to be saved as JSON")
+            stack.extend(value.values())
+        elif type(value) is list:
+            stack.extend(value)
+        elif value is not None and type(value) not in (bool, int, float, str):
+            raise TypeError(f"Value {value!r} of type {type(value).__name__} can not be saved unchanged as JSON")
+
+
+def _read_header(mm: mmap.mmap, path: str) -> tuple:
+    """Read and check the header of a frozen graph file. Every section must lie inside the file.
+    :param mm: Map of the file
+    :param path: File path, for the error messages
+    :return: tuple (flags, n, m, section offsets, blob offset, blob length)
+    """
+    if len(mm) < _HEADER.size:
+        raise ValueError(f"File {path} is not a frozen graph")
+    magic, version, flags, n, m, *sections, blob_offset, blob_length = _HEADER.unpack_from(mm)
+    if magic != _MAGIC:
+        raise ValueError(f"File {path} is not a frozen graph")
+    if version != _VERSION:
+        raise ValueError(f"Format version {version} of {path} is not supported")
+    if bool(flags & _BIG_ENDIAN) != (sys.byteorder == 'big'):
+        raise ValueError(f"File {path} was written with another byte order")
+    if n < 0 or m < 0 or blob_length < 0:
+        raise ValueError(f"File {path} has a corrupted header")
+    # Sections follow each other, from the end of the header to the end of the file
+    end = _HEADER.size
+    for offset, count in zip(sections + [blob_offset], (n, n + 1, m, m if flags & _WEIGHTS else 0, 0)):
+        if offset < end:
+            raise ValueError(f"File {path} has a corrupted header")
+        end = offset + 8 * count
+    if blob_offset + blob_length > len(mm):
+        raise ValueError(f"File {path} is truncated")
+    return flags, n, m, sections, blob_offset, blob_length
+
+
+class FrozenGraph:
+    """Immutable CSR snapshot of a graph"""
+
+    def __init__(self, keys, offsets, targets, weights=None, node_properties: list = None,
+                 link_properties: list = None, attributes: dict = None, weight_property: str = None) -> None:
+        """Initialize a frozen graph from its buffers. Use Graph.freeze() to build one.
+        :param keys: Sorted node keys
+        :param offsets: Links of node i are at positions offsets[i]:offsets[i + 1] of targets
+        :param targets: Node index each link points to
+        :param weights: Weight of each link. Defaults to None.
+        :param node_properties: Properties of each node, aligned with keys. Defaults to None.
+        :param link_properties: Properties of each link, aligned with targets: a dict, None,
+        or True for {weight_property: weight}. Defaults to None.
+        :param attributes: Graph attributes (non int keys of the graph dict). Defaults to None.
+        :param weight_property: Name of the weight in the link properties. Without
+        link_properties, every link has the properties {weight_property: weight}. Defaults to None.
+        """
+        if len(offsets) != len(keys) + 1:
+            raise ValueError("Offsets must have one more element than keys")
+        if len(targets) != offsets[len(keys)]:
+            raise ValueError("Targets length does not match the last offset")
+        if weights is not None and len(weights) != len(targets):
+            raise ValueError("Weights must be aligned with targets")
+        if weight_property is not None and weights is None:
+            raise ValueError("A weight property needs the weights buffer")
+        self.__keys = keys
+        self.__offsets = offsets
+        self.__targets = targets
+        self.__weights = weights
+        self.__node_properties = node_properties
+        self.__link_properties = link_properties
+        self.__attributes = attributes if attributes is not None else {}
+        self.__weight_property = weight_property
+        # JSON properties of a mapped file (mmap, offset, length), loaded on first use
+        self.__blob = None
+        # Map of the file the buffers are views of, see open()
+        self.__mmap = None
+        # Keys 0..n-1 are their own index, there is no need to search them
+        n = len(keys)
+        self.__dense = n == 0 or (keys[0] == 0 and keys[n - 1] == n - 1)
+
+    @classmethod
+    def from_graph(cls, graph_dict: dict, weight: str or None = 'weight', properties: bool = True,
+                   backend: str = 'array') -> object:
+        """Build a frozen graph from a graph dictionary
+        :param graph_dict: Graph dictionary of the form {'graph': {...}}
+        :param weight: Link property stored in the weights buffer, None for no weights.
+        Links without it weight 1.0. Defaults to 'weight'.
+        :param properties: Keep a copy of the node and link properties. The link properties
+        that only hold the weight are not kept, the weights buffer has them. Defaults to True.
+        :param backend: 'array' for array.array buffers or 'numpy' for NumPy arrays. Defaults to 'array'.
+        :return: FrozenGraph instance
+        """
+        if backend not in ('array', 'numpy'):
+            raise ValueError(f"Backend {backend} must be 'array' or 'numpy'")
+        if backend == 'numpy' and np is None:
+            raise ImportError("The numpy backend requires NumPy to be installed")
+
+        nodes = next(iter(graph_dict.values())) or {}
+        attributes = {key: value for key, value in nodes.items() if not isinstance(key, int)}
+        # Linked nodes missing from the graph dict are nodes without properties
+        key_set = {key for key in nodes if isinstance(key, int)}
+        for key in list(key_set):
+            node_p = nodes[key]
+            if node_p is not None:
+                key_set.update(prop_k for prop_k in node_p if isinstance(prop_k, int))
+        keys = array('q', sorted(key_set))
+        if len(keys) == 0 or (keys[0] == 0 and keys[-1] == len(keys) - 1):
+            index = None
+        else:
+            index = {key: i for i, key in enumerate(keys)}
+
+        offsets = array('q', [0])
+        targets = array('q')
+        weights = array('d') if weight is not None else None
+        node_properties = [] if properties else None
+        link_properties = [] if properties else None
+        has_node_p = False
+        # Links with properties other than the weight alone, and links with the weight alone
+        has_link_p = has_weight_p = False
+        for key in keys:
+            node_p = nodes.get(key)
+            props = None
+            if node_p is not None:
+                for prop_k, prop_v in node_p.items():
+                    if isinstance(prop_k, int):
+                        targets.append(prop_k if index is None else index[prop_k])
+                        if weights is not None:
+                            weights.append(float(prop_v[weight])
+                                           if prop_v is not None and weight in prop_v else 1.0)
+                        if not properties:
+                            pass
+                        elif prop_v is None:
+                            link_properties.append(None)
+                        elif weights is not None and len(prop_v) == 1 and _is_weight(prop_v.get(weight)):
+                            link_properties.append(True)
+                            has_weight_p = True
+                        else:
+                            link_properties.append(dict(prop_v))
+                            has_link_p = True
+                    elif properties:
+                        if props is None:
+                            props = {prop_k: prop_v}
+                        else:
+                            props[prop_k] = prop_v
+                if props is None and not node_p and properties:
+                    # An empty dict is kept apart from None
+                    props = {}
+            if properties:
+                node_properties.append(props)
+                has_node_p = has_node_p or props is not None
+            offsets.append(len(targets))
+
+        if not has_node_p:
+            node_properties = None
+        weight_property = weight if has_weight_p else None
+        if not has_link_p and (not has_weight_p or None not in link_properties):
+            # No properties, or the weight alone for every link
+            link_properties = None
+        if backend == 'numpy':
+            keys = np.frombuffer(keys, dtype=np.int64)
+            offsets = np.frombuffer(offsets, dtype=np.int64)
+            targets = np.frombuffer(targets, dtype=np.int64)
+            if weights is not None:
+                weights = np.frombuffer(weights, dtype=np.float64)
+        return cls(keys, offsets, targets, weights, node_properties, link_properties, attributes, weight_property)
+
+    @property
+    def keys(self):
+        """Sorted node keys buffer"""
+        return self.__keys
+
+    @property
+    def offsets(self):
+        """Offsets buffer, one element more than keys"""
+        return self.__offsets
+
+    @property
+    def targets(self):
+        """Target node index of every link"""
+        return self.__targets
+
+    @property
+    def weights(self):
+        """Weight of every link, or None"""
+        return self.__weights
+
+    @property
+    def attributes(self) -> dict:
+        """Graph attributes (non int keys of the graph dict)"""
+        self.__load()
+        return self.__attributes
+
+    def index(self, node_key: int) -> int:
+        """Get the index of a node key
+        :param node_key: Node's key
+        :return: Position of the node in keys
+        """
+        n = len(self.__keys)
+        if self.__dense:
+            if isinstance(node_key, int) and 0 <= node_key < n:
+                return node_key
+        else:
+            i = bisect_left(self.__keys, node_key)
+            if i < n and self.__keys[i] == node_key:
+                return i
+        raise ValueError(f"Node key {node_key} does not exist")
+
+    def successors(self, node_key: int) -> iter:
+        """Iterate over the nodes linked from node_key
+        :param node_key: Node's key
+        :return: generator of node keys
+        """
+        i = self.index(node_key)
+        keys, targets = self.__keys, self.__targets
+        for pos in range(self.__offsets[i], self.__offsets[i + 1]):
+            yield int(keys[targets[pos]])
+
+    def out_degree(self, node_key: int) -> int:
+        """Get the number of links from node_key
+        :param node_key: Node's key
+        :return: Number of outgoing links
+        """
+        i = self.index(node_key)
+        return int(self.__offsets[i + 1] - self.__offsets[i])
+
+    def nodes(self) -> dict or None:
+        """Get all nodes in graph
+        :return: dict of nodes with their properties, or None if graph is empty
+        """
+        if len(self.__keys) == 0:
+            return None
+        self.__load()
+        node_properties = self.__node_properties
+        if node_properties is None:
+            return dict.fromkeys(map(int, self.__keys))
+        return {int(key): props or None for key, props in zip(self.__keys, node_properties)}
+
+    def links(self) -> dict[[int, int], dict]:
+        """Get all the links in graph
+        :return: dict of links with keys (from_node, to_node) and properties as values
+        """
+        keys, offsets, targets = self.__keys, self.__offsets, self.__targets
+        self.__load()
+        link_p = self.__link_p
+        _links = {}
+        for i in range(len(keys)):
+            from_node = int(keys[i])
+            for pos in range(offsets[i], offsets[i + 1]):
+                _links[(from_node, int(keys[targets[pos]]))] = link_p(pos)
+        return _links
+
+    def __link_p(self, pos: int) -> dict or None:
+        """Get the properties of a link
+        :param pos: Position of the link in targets
+        :return: dict of properties or None
+        """
+        link_properties = self.__link_properties
+        value = None if link_properties is None else link_properties[pos]
+        if value is True or (value is None and link_properties is None and self.__weight_property is not None):
+            return {self.__weight_property: float(self.__weights[pos])}
+        return value
+
+    def to_matrix(self, fmt: str = 'dense', order: list = None) -> object:
+        """Get graph as adjacency matrix, see Graph.to_matrix() for the formats. Values are
+        the weights, or 1.0 if the graph was frozen without weights.
+        :param fmt: 'dense', 'numpy', 'coo' or 'csr'. Defaults to 'dense'.
+        :param order: Node keys in row/column order, links to nodes not in order are
+        skipped. Defaults to the order of keys.
+        :return: Adjacency matrix
+        """
+        if fmt not in _MATRIX_FORMATS:
+            raise ValueError(f"Format {fmt} must be one of {', '.join(_MATRIX_FORMATS)}")
+        offsets, targets, weights = self.__offsets, self.__targets, self.__weights
+        if order is None:
+            # The buffers already are a CSR matrix
+            values = weights if weights is not None else array('d', [1.0]) * len(targets)
+            return _csr_to_matrix(offsets, targets, values, len(self.__keys), fmt)
+
+        index = {}
+        for j, key in enumerate(order):
+            index[self.index(key)] = j
+        if len(index) != len(order):
+            raise ValueError("Order contains repeated node keys")
+        indptr = array('q', [0])
+        indices = array('q')
+        values = array('d')
+        for key in order:
+            i = self.index(key)
+            for pos in range(offsets[i], offsets[i + 1]):
+                j = index.get(int(targets[pos]))
+                if j is not None:
+                    indices.append(j)
+                    values.append(1.0 if weights is None else float(weights[pos]))
+            indptr.append(len(indices))
+        return _csr_to_matrix(indptr, indices, values, len(order), fmt)
+
+    def to_dict(self) -> dict:
+        """Get the graph dictionary of the form {'graph': {...}}
+        :return: dictionary
+        """
+        keys, offsets, targets = self.__keys, self.__offsets, self.__targets
+        self.__load()
+        node_properties, link_p = self.__node_properties, self.__link_p
+        if len(keys) == 0 and not self.__attributes:
+            return {'graph': None}
+        nodes = {}
+        for i in range(len(keys)):
+            props = None if node_properties is None else node_properties[i]
+            start, end = offsets[i], offsets[i + 1]
+            if start == end and props is None:
+                nodes[int(keys[i])] = None
+                continue
+            node_p = {} if props is None else dict(props)
+            for pos in range(start, end):
+                node_p[int(keys[targets[pos]])] = link_p(pos)
+            nodes[int(keys[i])] = node_p
+        nodes.update(self.__attributes)
+        return {'graph': nodes}
+
+    def __load(self) -> None:
+        """Parse the properties of a mapped file, on first use"""
+        if self.__blob is not None:
+            mm, offset, length = self.__blob
+            data = json.loads(mm[offset:offset + length])
+            self.__node_properties = data['node_properties']
+            self.__link_properties = data['link_properties']
+            self.__attributes = data['attributes']
+            self.__weight_property = data['weight_property']
+            self.__blob = None
+
+    def save(self, path: str) -> None:
+        """Save the graph to a binary file, see open()
+        :param path: File path
+        """
+        self.__load()
+        n, m = len(self.__keys), len(self.__targets)
+        blob = b''
+        if self.__node_properties is not None or self.__link_properties is not None or self.__attributes \
+                or self.__weight_property is not None:
+            data = {'node_properties': self.__node_properties, 'link_properties': self.__link_properties,
+                    'attributes': self.__attributes, 'weight_property': self.__weight_property}
+            _check_json(data)
+            blob = json.dumps(data).encode('utf-8')
+        flags = (_WEIGHTS if self.__weights is not None else 0) | (_BIG_ENDIAN if sys.byteorder == 'big' else 0)
+        sections = [_HEADER.size]
+        for size in (n, n + 1, m, m if self.__weights is not None else 0):
+            sections.append(sections[-1] + 8 * size)
+        header = _HEADER.pack(_MAGIC, _VERSION, flags, n, m, *sections, len(blob))
+        with open(path, 'wb') as f:
+            f.write(header)
+            for buffer in (self.__keys, self.__offsets, self.__targets, self.__weights):
+                if buffer is not None:
+                    # Any buffer (array.array, memoryview, NumPy) is written as is, without a copy
+                    f.write(memoryview(buffer).cast('B'))
+            f.write(blob)
+
+    @classmethod
+    def open(cls, path: str, backend: str = 'array') -> object:
+        """Open a binary file written by save(). The file is mapped read-only, the buffers are
+        views over the mapped pages and the properties are parsed on first use. Use the graph
+        as a context manager, or call close(), to unmap the file.
+        :param path: File path
+        :param backend: 'array' for memoryview buffers or 'numpy' for NumPy arrays. Defaults to 'array'.
+        :return: FrozenGraph instance
+        """
+        if backend not in ('array', 'numpy'):
+            raise ValueError(f"Backend {backend} must be 'array' or 'numpy'")
+        if backend == 'numpy' and np is None:
+            raise ImportError("The numpy backend requires NumPy to be installed")
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            flags, n, m, sections, blob_offset, blob_length = _read_header(mm, path)
+        except ValueError:
+            mm.close()
+            raise
+
+        view = memoryview(mm)
+        buffers = []
+        for offset, count, typecode in zip(sections, (n, n + 1, m, m), 'qqqd'):
+            if typecode == 'd' and not flags & _WEIGHTS:
+                buffers.append(None)
+            elif backend == 'numpy':
+                buffers.append(np.frombuffer(mm, dtype=np.int64 if typecode == 'q' else np.float64,
+                                             count=count, offset=offset))
+            else:
+                buffers.append(view[offset:offset + 8 * count].cast(typecode))
+        frozen = cls(*buffers)
+        frozen.__mmap = mm
+        if blob_length:
+            frozen.__blob = (mm, blob_offset, blob_length)
+        return frozen
+
+    def close(self) -> None:
+        """Unmap the file of a graph returned by open(). The graph can not be used anymore.
+        NumPy arrays of the buffers must not be referenced elsewhere, the map can not be
+        closed while they are. Nothing is done for a graph built in memory.
+        """
+        if self.__mmap is None:
+            return
+        buffers = (self.__keys, self.__offsets, self.__targets, self.__weights)
+        self.__keys = self.__offsets = self.__targets = self.__weights = None
+        for buffer in buffers:
+            if isinstance(buffer, memoryview):
+                buffer.release()
+        del buffers
+        mm, self.__mmap, self.__blob = self.__mmap, None, None
+        mm.close()
+
+    def __enter__(self) -> object:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
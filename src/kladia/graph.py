@@ -5,15 +5,31 @@ date: 2022-12-31
 version: 0.0.1
 """
 
+import functools
+import random
+import sys
+import time
+from array import array
+from types import MappingProxyType
 
-def graph(graph_dict: dict = None):
+from .utils import get_size
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+
+def graph(graph_dict: dict = None, reverse_index: bool = True, layout: str = 'nested'):
     """This function returns a Graph instance
     :param graph_dict: A dictionary with the graph data
+    :param reverse_index: Keep an index of incoming links. Defaults to True.
+    :param layout: Storage layout, 'nested' or 'split'. Defaults to 'nested'.
     """
     if graph_dict is None:
-        return Graph()
+        return Graph(reverse_index=reverse_index, layout=layout)
     else:
-        return Graph(graph_dict)
+        return Graph(graph_dict, reverse_index=reverse_index, layout=layout)
 
 
 def from_nodes_and_links(nodes: dict = None, links: dict = None) -> object:
@@ -22,29 +38,286 @@ def from_nodes_and_links(nodes: dict = None, links: dict = None) -> object:
     :param links: dict of links
     :return: Graphs instance
     """
-    if not isinstance(nodes, dict):
+    if not (isinstance(nodes, dict) or nodes is None):
         raise TypeError("Nodes must be of type dict")
-    if not isinstance(links, dict):
+    if not (isinstance(links, dict) or links is None):
         raise TypeError("Links must be of type dict")
 
     # Create a new graph
     _graph = Graph()
-    if nodes is not None:
-        for node_k, node_p in nodes.items():
-            _graph.add(node_k, node_p)
-    if links is not None:
-        for link_k, link_p in links.items():
-            _graph.add(link_k, link_p)
+    _graph.add_many(nodes, links)
     return _graph
 
 
+def union_all(graphs: iter, policy: str or callable = 'right') -> object:
+    """Union of many graphs. The first graph is copied once and the others are merged into
+    the copy in order. Each merge costs the size of the merged graph, not of the copy.
+    :param graphs: Iterable of graphs
+    :param policy: What to do when a property has different values, see Graph.union_update().
+    Defaults to 'right' (the value of the last graph is kept).
+    :return: Graphs instance
+    """
+    graphs = iter(graphs)
+    first = next(graphs, None)
+    if first is None:
+        return Graph()
+    result = first.copy()
+    for g in graphs:
+        result.union_update(g, policy)
+    return result
+
+
+# Graph methods wrapped by Graph.instrument(), the mutations also call the hooks
+_INSTRUMENTED = ('add', 'dlt', 'add_many', 'from_matrix', 'union_update', 'intersect_update',
+                 'nodes', 'links', 'adjacency', 'predecessors', 'to_matrix', 'freeze', 'copy',
+                 'union', 'intersect')
+_MUTATIONS = frozenset(('add', 'dlt', 'add_many', 'from_matrix', 'union_update', 'intersect_update'))
+
+# Constructors wrapped by instrument_constructors(): {name: plain function} while they are
+# instrumented, and their [calls, seconds] counters
+_CONSTRUCTORS = ('graph', 'from_nodes_and_links')
+_plain_constructors = {}
+_constructor_counters = {name: [0, 0.0] for name in _CONSTRUCTORS}
+
+
+def instrument_constructors(before: callable or iter = None, after: callable or iter = None,
+                            graphs: bool = True) -> None:
+    """Count the calls and time of graph() and from_nodes_and_links(). The functions of this
+    module are swapped with wrappers until uninstrument_constructors(), names imported before
+    (from kladia.graph import graph) keep the plain functions.
+    :param before: Hook or hooks of the mutations of the new graphs, see Graph.instrument().
+    Defaults to None.
+    :param after: Hook or hooks of the mutations of the new graphs. Defaults to None.
+    :param graphs: Instrument the graphs returned by the constructors. Defaults to True.
+    """
+    uninstrument_constructors()
+    for name in _CONSTRUCTORS:
+        plain = globals()[name]
+        _plain_constructors[name] = plain
+        globals()[name] = _constructor_wrapper(plain, _constructor_counters[name], before, after, graphs)
+
+
+def _constructor_wrapper(plain: callable, counters: list, before, after, graphs: bool) -> callable:
+    """Wrap a constructor, see instrument_constructors()
+    :param plain: Constructor function
+    :param counters: [calls, seconds] of the constructor
+    :return: Function with the signature of the constructor
+    """
+    @functools.wraps(plain)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            g = plain(*args, **kwargs)
+        finally:
+            counters[0] += 1
+            counters[1] += time.perf_counter() - start
+        if graphs:
+            g.instrument(before, after)
+        return g
+
+    return wrapper
+
+
+def uninstrument_constructors() -> None:
+    """Restore the plain graph() and from_nodes_and_links(). The counters are kept."""
+    for name, plain in _plain_constructors.items():
+        globals()[name] = plain
+    _plain_constructors.clear()
+
+
+def constructor_stats(reset: bool = False) -> dict:
+    """Get the counters of the constructors
+    :param reset: Set the counters to zero after the snapshot. Defaults to False.
+    :return: dict {'enabled': bool, 'operations': {name: {'calls': int, 'seconds': float}}}
+    """
+    snapshot = {'enabled': bool(_plain_constructors),
+                'operations': {name: {'calls': calls, 'seconds': seconds}
+                               for name, (calls, seconds) in _constructor_counters.items()}}
+    if reset:
+        for counters in _constructor_counters.values():
+            counters[:] = [0, 0.0]
+    return snapshot
+
+
+# Output formats of to_matrix()
+_MATRIX_FORMATS = ('dense', 'numpy', 'coo', 'csr')
+
+
+def _csr_to_matrix(indptr, indices, values, n: int, fmt: str) -> object:
+    """Convert a CSR matrix to any of the to_matrix() formats
+    :param indptr: Row i values are at positions indptr[i]:indptr[i + 1]
+    :param indices: Column of each value
+    :param values: Values
+    :param n: Number of rows and columns
+    :param fmt: 'dense', 'numpy', 'coo' or 'csr'
+    :return: Matrix in the requested format
+    """
+    if fmt == 'csr':
+        return indptr, indices, values
+    if fmt == 'coo':
+        rows = array('q')
+        for i in range(n):
+            rows.extend([i] * (indptr[i + 1] - indptr[i]))
+        return rows, indices, values
+    if fmt == 'numpy':
+        if np is None:
+            raise ImportError("The numpy format requires NumPy to be installed")
+        matrix = np.zeros((n, n), dtype=np.float64)
+        rows = np.repeat(np.arange(n), np.diff(np.asarray(indptr, dtype=np.int64)))
+        matrix[rows, np.asarray(indices, dtype=np.int64)] = np.asarray(values, dtype=np.float64)
+        return matrix
+    matrix = []
+    for i in range(n):
+        row = [0.0] * n
+        for pos in range(indptr[i], indptr[i + 1]):
+            row[indices[pos]] = values[pos]
+        matrix.append(row)
+    return matrix
+
+
+def _replace(target: dict, source: dict) -> None:
+    """Replace the items of a dict in place, so the views of it see the new items
+    :param target: dict to change
+    :param source: dict with the new items
+    """
+    if target is not source:
+        target.clear()
+        target.update(source)
+
+
+# Returned by predecessors() for nodes without incoming links
+_NO_PREDECESSORS = frozenset()
+
+
+def _split_node(node_p: dict or None) -> (dict or None, dict):
+    """Split a node's dict into its properties and its links
+    :param node_p: Node's dict of the graph dictionary
+    :return: tuple (properties or None, {to_node: link properties})
+    """
+    if node_p is None:
+        return None, {}
+    props = {}
+    adjacency = {}
+    for prop_k, prop_v in node_p.items():
+        if isinstance(prop_k, int):
+            adjacency[prop_k] = prop_v
+        else:
+            props[prop_k] = prop_v
+    return props or None, adjacency
+
+
+def _check_types(values, types: tuple, message: str) -> None:
+    """Check the type of every value in a batch. The exact types are collected at C speed
+    and only when an unexpected type shows up (e.g. a dict subclass) the values are
+    checked one by one with isinstance.
+    :param values: Iterable of values to check
+    :param types: Accepted types
+    :param message: Error message, formatted with the first offending value
+    """
+    if set(map(type, values)).issubset(types):
+        return
+    for value in values:
+        if not isinstance(value, types):
+            raise TypeError(message.format(value))
+
+
+# Policies of union and intersect for properties with different values in both graphs
+_POLICIES = ('right', 'left', 'error')
+
+
+def _check_policy(policy: str or callable) -> None:
+    """Check a conflict policy
+    :param policy: 'right', 'left', 'error' or a function (key, left_value, right_value) -> value
+    """
+    if not (policy in _POLICIES or callable(policy)):
+        raise ValueError(f"Policy {policy} must be one of {', '.join(_POLICIES)} or a function")
+
+
+def _merge_properties(left: dict or None, right: dict or None, policy: str or callable, element: str) -> dict or None:
+    """Merge the properties of an element in two graphs. The result is a new dict when both
+    have properties, otherwise the dict with properties is returned as is.
+    :param left: Properties in the first graph
+    :param right: Properties in the second graph
+    :param policy: See _check_policy()
+    :param element: Name of the element for error messages
+    :return: Properties with the keys of both
+    """
+    if right is None or right is left:
+        return left
+    if left is None:
+        return right
+    merged = left | right
+    if policy != 'right':
+        for key in left.keys() & right.keys():
+            if left[key] != right[key]:
+                if policy == 'left':
+                    merged[key] = left[key]
+                elif policy == 'error':
+                    raise ValueError(f"Property {key} of {element} is {left[key]} and {right[key]}")
+                else:
+                    merged[key] = policy(key, left[key], right[key])
+    return merged
+
+
+def _merge_links(node_key: int, left: dict, right: dict, policy: str or callable) -> dict:
+    """Merge the links of a node in two graphs
+    :param node_key: Node's key
+    :param left: {to_node: link properties} in the first graph
+    :param right: {to_node: link properties} in the second graph
+    :param policy: See _check_policy()
+    :return: dict with the links of right, with the properties of both if they are in left
+    """
+    merged = dict(right)
+    for to_node in right.keys() & left.keys():
+        merged[to_node] = _merge_properties(left[to_node], right[to_node], policy, f"link {(node_key, to_node)}")
+    return merged
+
+
+def _node_dict(properties: dict or None, *links: dict) -> dict or None:
+    """Build a node's dict of the graph dictionary
+    :param properties: Node's properties
+    :param links: dicts {to_node: link properties}, merged in order
+    :return: Node's dict, or None if it is empty
+    """
+    node_p = dict(properties) if properties else {}
+    for adjacency in links:
+        node_p.update(adjacency)
+    return node_p or None
+
+
 class Graph:
     """Graph class private methods"""
 
-    def __init__(self, graph_dict: dict = None) -> None:
+    def __init__(self, graph_dict: dict = None, reverse_index: bool = True, layout: str = 'nested') -> None:
         """Initialize graph with empty dict
         of the form {"graph": None}
+        :param graph_dict: A dictionary with the graph data. Defaults to None.
+        :param reverse_index: Keep an index of incoming links (predecessors). It is built
+        lazily on first use and then kept up to date by add, dlt and from_matrix. Set it to
+        False on memory-constrained loads. Defaults to True.
+        :param layout: Storage layout. Defaults to 'nested'.
+            - 'nested': the graph dictionary itself, links and properties share the node's dict
+            - 'split': links and properties are kept in separate dicts per node, so walking
+              the links of a node does not check the type of every key. to_dict() builds
+              the graph dictionary on each call.
         """
+        if layout not in ('nested', 'split'):
+            raise ValueError(f"Layout {layout} must be 'nested' or 'split'")
+        self.__split = layout == 'split'
+
+        # Reverse adjacency {to_node: {from_node, ...}}, None until first needed
+        self.__reverse_index = reverse_index
+        self.__preds = None
+        # Views returned by nodes(), links() and adjacency(), built on first call and
+        # patched (or dropped) by every change
+        self.__views = {}
+        self.__version = 0
+        # Node containers written since the last copy(cow=True), None if there was none
+        self.__owned = None
+        # [calls, seconds, rebuilds] of every instrumented method and the {'before': [...],
+        # 'after': [...]} hooks, None until instrument() is called
+        self.__counters = None
+        self.__hooks = None
 
         if graph_dict is not None:
             keys = list(graph_dict.keys())
@@ -61,11 +334,64 @@ class Graph:
             self.__label = 'graph'
             self.__graph = {self.__label: None}
 
+        if self.__split:
+            # {node_key: {to_node: link properties}}, {node_key: properties}, {attribute: value}
+            self.__adj = {}
+            self.__props = {}
+            self.__attrs = {}
+            for node_k, node_p in (self.__graph[self.__label] or {}).items():
+                if not isinstance(node_k, int):
+                    self.__attrs[node_k] = node_p
+                elif node_p is None:
+                    self.__props[node_k] = None
+                    self.__adj.setdefault(node_k, {})
+                else:
+                    props, adjacency = _split_node(node_p)
+                    # Without links the node's dict only has properties, it is kept as is.
+                    # A node without properties has None, as in nodes() of the nested layout.
+                    self.__props[node_k] = props if adjacency else node_p or None
+                    if node_k in self.__adj:
+                        self.__adj[node_k].update(adjacency)
+                    else:
+                        self.__adj[node_k] = adjacency
+                    for to_node in adjacency:
+                        if to_node not in self.__adj:
+                            self.__adj[to_node] = {}
+            for node_k in self.__adj.keys() - self.__props.keys():
+                self.__props[node_k] = None
+            self.__graph = None
+
+    @property
+    def layout(self) -> str:
+        """Storage layout, 'nested' or 'split'"""
+        return 'split' if self.__split else 'nested'
+
     def to_dict(self) -> dict:
-        """Get graph
+        """Get graph. With the 'split' layout the dictionary is built on each call,
+        properties dicts are shared with the graph.
         :return:  dictionary
         """
-        return self.__graph
+        if not self.__split:
+            return self.__graph
+        if not self.__props and not self.__attrs:
+            return {'graph': None}
+        nodes = {}
+        adj = self.__adj
+        for node_k, props in self.__props.items():
+            adjacency = adj[node_k]
+            if adjacency:
+                node_p = {} if props is None else dict(props)
+                node_p.update(adjacency)
+                nodes[node_k] = node_p
+            else:
+                nodes[node_k] = props
+        nodes.update(self.__attrs)
+        return {'graph': nodes}
+
+    @property
+    def version(self) -> int:
+        """Number of changes made to the graph through its methods"""
+        return self.__version
 
     def add(self, obj: int or (int, int), properties: dict or None = None) -> None:
         """Add node or link to graph
@@ -90,6 +416,158 @@ class Graph:
         else:
             raise TypeError("Object must be of type int or tuple")
 
+    def add_many(self, nodes: dict or iter = None, links: dict or iter = None) -> None:
+        """Add many nodes and links to graph. The batch is validated once, links are grouped
+        by their from_node and every node's dict is written with a single update. Nothing is
+        written if the batch is not valid. Linked nodes that do not exist are added with
+        properties=None.
+        :param nodes: dict {node_key: properties}, or iterable of node keys or
+        (node_key, properties) pairs. Int keys in the properties are links, as in add().
+        Defaults to None.
+        :param links: dict {(from_node, to_node): properties}, or iterable of (from_node, to_node)
+        or (from_node, to_node, properties) tuples. Defaults to None.
+        """
+        # Collect nodes
+        new_nodes = {}
+        count = 0
+        if isinstance(nodes, dict):
+            new_nodes = nodes
+            count = len(nodes)
+        elif nodes is not None:
+            for node in nodes:
+                if isinstance(node, tuple):
+                    if len(node) != 2:
+                        raise TypeError(f"Node {node} must be a node key or a (node_key, properties) pair")
+                    new_nodes[node[0]] = node[1]
+                else:
+                    new_nodes[node] = None
+                count += 1
+
+        # Collect links grouped by from_node
+        groups = {}
+        link_count = 0
+        link = None
+        try:
+            if isinstance(links, dict):
+                for link, link_p in links.items():
+                    from_node, to_node = link
+                    if from_node in groups:
+                        groups[from_node][to_node] = link_p
+                    else:
+                        groups[from_node] = {to_node: link_p}
+                link_count = len(links)
+            elif links is not None:
+                for link in links:
+                    if len(link) == 2:
+                        from_node, to_node = link
+                        link_p = None
+                    else:
+                        from_node, to_node, link_p = link
+                    if from_node in groups:
+                        groups[from_node][to_node] = link_p
+                    else:
+                        groups[from_node] = {to_node: link_p}
+                    link_count += 1
+        except (TypeError, ValueError):
+            raise TypeError(f"Link {link} must be a tuple (from_node, to_node) or "
+                            f"(from_node, to_node, properties)") from None
+
+        # Validate the whole batch before writing anything
+        _check_types(new_nodes, (int,), "Node key {} must be of type int")
+        _check_types(new_nodes.values(), (dict, type(None)), "Properties {} must be of type dict or None")
+        # Int keys in a node's dict are links, as in add()
+        split_nodes = {}
+        for node_k, node_p in new_nodes.items():
+            if node_p and any(isinstance(prop_k, int) for prop_k in node_p):
+                props, adjacency = _split_node(node_p)
+                split_nodes[node_k] = props
+                if node_k in groups:
+                    groups[node_k].update(adjacency)
+                else:
+                    groups[node_k] = adjacency
+                link_count += len(adjacency)
+        if split_nodes:
+            new_nodes = {**new_nodes, **split_nodes}
+        _check_types(groups, (int,), "Node's keys on links must be of type int, got {}")
+        targets = set().union(*groups.values())
+        _check_types(targets, (int,), "Node's keys on links must be of type int, got {}")
+        for group in groups.values():
+            _check_types(group.values(), (dict, type(None)), "Properties {} must be of type dict or None")
+
+        graph_nodes = self.__props if self.__split else self.__graph[self.__label]
+        if count != len(new_nodes):
+            raise ValueError("The batch contains repeated nodes")
+        if graph_nodes is not None and not graph_nodes.keys().isdisjoint(new_nodes):
+            node_key = next(iter(graph_nodes.keys() & new_nodes.keys()))
+            raise ValueError(f"The node {node_key}:{new_nodes[node_key]} already exists")
+        if link_count != sum(map(len, groups.values())):
+            raise ValueError("The batch contains repeated links")
+        if graph_nodes is not None:
+            node_links = self.__adj if self.__split else graph_nodes
+            for from_node, group in groups.items():
+                node_p = node_links.get(from_node)
+                if node_p is not None and not node_p.keys().isdisjoint(group):
+                    to_node = next(iter(node_p.keys() & group.keys()))
+                    raise ValueError(f"The link {(from_node, to_node)} already exists")
+
+        if not new_nodes and not groups:
+            return
+
+        # Write the batch
+        if self.__split:
+            adj = self.__adj
+            graph_nodes.update({node_k: node_p or None for node_k, node_p in new_nodes.items()})
+            adj.update({node_k: {} for node_k in new_nodes.keys() - adj.keys()})
+            for from_node, group in groups.items():
+                adjacency = adj.get(from_node)
+                if adjacency is None:
+                    adj[from_node] = group
+                    graph_nodes[from_node] = None
+                else:
+                    self.__own(adj, from_node)
+                    adj[from_node].update(group)
+            targets.difference_update(adj.keys())
+            adj.update({node_k: {} for node_k in targets})
+            graph_nodes.update(dict.fromkeys(targets))
+        else:
+            if graph_nodes is None:
+                graph_nodes = self.__graph[self.__label] = {}
+            graph_nodes.update(new_nodes)
+            for from_node, group in groups.items():
+                node_p = graph_nodes.get(from_node)
+                if node_p is None:
+                    graph_nodes[from_node] = group
+                elif from_node in new_nodes:
+                    # The properties dict of the batch is not changed
+                    graph_nodes[from_node] = {**node_p, **group}
+                else:
+                    self.__own(graph_nodes, from_node)
+                    graph_nodes[from_node].update(group)
+            targets.difference_update(graph_nodes.keys())
+            graph_nodes.update(dict.fromkeys(targets))
+
+        # The reverse index is rebuilt on first use, cheaper than patching it per link
+        if groups:
+            self.__preds = None
+        views = self.__views
+        if views:
+            if 'nodes' in views:
+                nodes_view = views['nodes']
+                nodes_view.update({node_k: dict(node_p) if node_p else None for node_k, node_p in new_nodes.items()})
+                for node_k in groups.keys() - nodes_view.keys():
+                    nodes_view[node_k] = None
+                nodes_view.update(dict.fromkeys(targets))
+            if 'adjacency' in views:
+                adjacency = views['adjacency']
+                for node_k in new_nodes.keys() | targets:
+                    adjacency.setdefault(node_k, {})
+                for from_node, group in groups.items():
+                    adjacency.setdefault(from_node, {}).update(group)
+            if 'links' in views:
+                views['links'].update(((from_node, to_node), link_p)
+                                      for from_node, group in groups.items() for to_node, link_p in group.items())
+        self.__version += 1
+
     def __add_node(self, node_key: int, properties: dict or None = None) -> None:
         """Add node to graph
         :param node_key: Node's key
@@ -100,14 +578,42 @@ class Graph:
         if not (isinstance(properties, dict) or properties is None):
             raise TypeError(f"Properties {properties} must be of type dict or None")
 
-        nodes = self.__graph[self.__label]
-        if nodes is None:
-            self.__graph[self.__label] = {node_key: properties}
+        props, adjacency = _split_node(properties)
+        if self.__split:
+            if node_key in self.__props:
+                raise ValueError(f"The node {node_key}:{properties} already exists")
+            self.__props[node_key] = props if adjacency else properties or None
+            self.__adj[node_key] = adjacency
+            for to_node in adjacency:
+                if to_node not in self.__adj:
+                    self.__adj[to_node] = {}
+                    self.__props[to_node] = None
         else:
-            if node_key not in nodes:
-                self.__graph[self.__label] |= {node_key: properties}
+            nodes = self.__graph[self.__label]
+            if nodes is None:
+                self.__graph[self.__label] = {node_key: properties}
             else:
-                raise ValueError(f"The node {node_key}:{properties} already exists")
+                if node_key not in nodes:
+                    self.__graph[self.__label] |= {node_key: properties}
+                else:
+                    raise ValueError(f"The node {node_key}:{properties} already exists")
+
+        if adjacency:
+            # The properties hold links, the reverse index must be rebuilt
+            self.__preds = None
+        views = self.__views
+        if views:
+            if 'nodes' in views:
+                views['nodes'][node_key] = props
+            if 'adjacency' in views:
+                view = views['adjacency']
+                view[node_key] = adjacency
+                # Linked nodes missing from the graph dict are nodes without links
+                for to_node in adjacency:
+                    view.setdefault(to_node, {})
+            if 'links' in views:
+                views['links'].update(((node_key, to_node), link_p) for to_node, link_p in adjacency.items())
+        self.__version += 1
 
     def __add_link(self, link: tuple, properties: dict or None = None) -> None:
         """Add link to graph. If nodes do not exist, they will be added with properties=None.
@@ -122,8 +628,21 @@ class Graph:
             raise TypeError(f"Properties {properties} must be of type dict or None")
 
         from_node, to_node = link
-        nodes = self.__graph[self.__label]
-        if nodes is None:
+        nodes = None if self.__split else self.__graph[self.__label]
+        if self.__split:
+            adj = self.__adj
+            if from_node not in adj:
+                adj[from_node] = {to_node: properties}
+                self.__props[from_node] = None
+            elif to_node not in adj[from_node]:
+                self.__own(adj, from_node)
+                adj[from_node][to_node] = properties
+            else:
+                raise ValueError(f"The link {link} already exists")
+            if to_node not in adj:
+                adj[to_node] = {}
+                self.__props[to_node] = None
+        elif nodes is None:
             self.__graph[self.__label] = {from_node: {to_node: properties}, to_node: None}
         else:
             if from_node not in nodes:
@@ -133,6 +652,7 @@ class Graph:
                     self.__graph[self.__label][from_node] = {to_node: properties}
                 else:
                     if to_node not in nodes[from_node]:
+                        self.__own(nodes, from_node)
                         self.__graph[self.__label][from_node] |= {to_node: properties}
                     else:
                         raise ValueError(f"The link {link} already exists")
@@ -142,6 +662,27 @@ class Graph:
             if to_node not in nodes:
                 self.__graph[self.__label] |= {to_node: None}
 
+        if self.__preds is not None:
+            if to_node in self.__preds:
+                self.__preds[to_node].add(from_node)
+            else:
+                self.__preds[to_node] = {from_node}
+        views = self.__views
+        if views:
+            if 'nodes' in views:
+                views['nodes'].setdefault(from_node, None)
+                views['nodes'].setdefault(to_node, None)
+            if 'adjacency' in views:
+                adjacency = views['adjacency']
+                if from_node in adjacency:
+                    adjacency[from_node][to_node] = properties
+                else:
+                    adjacency[from_node] = {to_node: properties}
+                adjacency.setdefault(to_node, {})
+            if 'links' in views:
+                views['links'][(from_node, to_node)] = properties
+        self.__version += 1
+
     def __dlt_node(self, node_key: int) -> None:
         """Delete node from graph
         :param node_key: Node's key to delete
@@ -149,15 +690,55 @@ class Graph:
         if not isinstance(node_key, int):
             raise TypeError(f"Node's key {node_key} must be of type int")
 
-        nodes = self.__graph[self.__label]
+        # With the split layout only the links are walked, properties are dropped at once
+        nodes = self.__adj if self.__split else self.__graph[self.__label]
         if nodes is None:
             raise ValueError("Graph is empty, nothing to delete")
         else:
             if node_key in nodes:
-                del self.__graph[self.__label][node_key]
-                for key in nodes:
-                    if key != self.__label and nodes[key] is not None and node_key in nodes[key]:
-                        del self.__graph[self.__label][key][node_key]
+                if self.__split:
+                    del self.__props[node_key]
+                preds = self.__predecessors()
+                node_p = nodes.pop(node_key)
+                if self.__split:
+                    out_links = list(node_p)
+                else:
+                    out_links = () if node_p is None else [key for key in node_p if isinstance(key, int)]
+                if preds is None:
+                    # No reverse index, every node must be probed for incoming links
+                    in_links = []
+                    for key, key_p in nodes.items():
+                        if key_p is not None and isinstance(key, int) and node_key in key_p:
+                            in_links.append(key)
+                else:
+                    # Only the neighbours of the node are touched
+                    for key in out_links:
+                        if key != node_key and key in preds:
+                            preds[key].discard(node_key)
+                            if not preds[key]:
+                                del preds[key]
+                    in_links = preds.pop(node_key, _NO_PREDECESSORS)
+                for key in in_links:
+                    if key != node_key:
+                        self.__own(nodes, key)
+                        del nodes[key][node_key]
+                views = self.__views
+                if views:
+                    if 'nodes' in views:
+                        del views['nodes'][node_key]
+                    if 'adjacency' in views:
+                        adjacency = views['adjacency']
+                        del adjacency[node_key]
+                        for key in in_links:
+                            if key != node_key:
+                                del adjacency[key][node_key]
+                    if 'links' in views:
+                        _links = views['links']
+                        for key in out_links:
+                            del _links[(node_key, key)]
+                        for key in in_links:
+                            _links.pop((key, node_key), None)
+                self.__version += 1
             else:
                 raise ValueError(f"Node key {node_key} does not exist")
 
@@ -171,106 +752,567 @@ class Graph:
             raise TypeError("Node's keys must be of type int")
 
         from_node, to_node = link
-        nodes = self.__graph[self.__label]
+        nodes = self.__adj if self.__split else self.__graph[self.__label]
         if nodes is None:
             raise ValueError("Graph is empty, nothing to delete")
         else:
-            if from_node in nodes:
+            if from_node in nodes and nodes[from_node] is not None:
                 if to_node in nodes[from_node]:
-                    del self.__graph[self.__label][from_node][to_node]
-                    self.__graph[self.__label][from_node] = None \
-                        if len(self.__graph[self.__label][from_node]) == 0 \
-                        else self.__graph[self.__label][from_node]
+                    self.__own(nodes, from_node)
+                    del nodes[from_node][to_node]
+                    if not self.__split and len(nodes[from_node]) == 0:
+                        nodes[from_node] = None
+                    if self.__preds is not None and to_node in self.__preds:
+                        self.__preds[to_node].discard(from_node)
+                        if not self.__preds[to_node]:
+                            del self.__preds[to_node]
+                    views = self.__views
+                    if 'adjacency' in views:
+                        del views['adjacency'][from_node][to_node]
+                    if 'links' in views:
+                        del views['links'][(from_node, to_node)]
+                    self.__version += 1
                 else:
                     raise ValueError(f"Link {link} does not exist")
             else:
                 raise ValueError(f"Link {link} does not exist")
 
-    def nodes(self) -> dict or None:
-        """Get all nodes in graph
-        :return: dict of nodes or None if graph is empty
+    def __own(self, nodes: dict, node_key: int) -> None:
+        """Copy the container of a node before writing to it, if it can be shared with a
+        graph made with copy(cow=True). Each container is copied at most once.
+        :param nodes: dict of node containers (the graph dict or the split adjacency)
+        :param node_key: Node's key
+        """
+        owned = self.__owned
+        if owned is not None and node_key not in owned:
+            owned.add(node_key)
+            if nodes.get(node_key) is not None:
+                nodes[node_key] = dict(nodes[node_key])
+
+    def __predecessors(self) -> dict or None:
+        """Get the reverse adjacency index, building it on first use
+        :return: dict {to_node: set of from_nodes} or None if the index is disabled
         """
+        if self.__preds is None and self.__reverse_index:
+            preds = {}
+            nodes = None if self.__split else self.__graph[self.__label]
+            if self.__split:
+                for node_k, adjacency in self.__adj.items():
+                    for to_node in adjacency:
+                        if to_node in preds:
+                            preds[to_node].add(node_k)
+                        else:
+                            preds[to_node] = {node_k}
+            elif nodes is not None:
+                for node_k, node_p in nodes.items():
+                    if node_p is not None and isinstance(node_k, int):
+                        for prop_k in node_p:
+                            # if the property is a link
+                            if isinstance(prop_k, int):
+                                if prop_k in preds:
+                                    preds[prop_k].add(node_k)
+                                else:
+                                    preds[prop_k] = {node_k}
+            self.__preds = preds
+        return self.__preds
+
+    def predecessors(self, node_key: int) -> frozenset:
+        """Get the nodes with a link to node_key. With the reverse index enabled
+        this is a lookup, otherwise all nodes are scanned.
+        :param node_key: Node's key
+        :return: frozenset of node keys, a copy: the graph can be changed while iterating it
+        """
+        return frozenset(self.__incoming(node_key))
+
+    def __incoming(self, node_key: int) -> set or frozenset:
+        """Get the nodes with a link to node_key
+        :param node_key: Node's key
+        :return: set of node keys. It can be the index itself, do not modify it.
+        """
+        nodes = self.__adj if self.__split else self.__graph[self.__label]
+        if nodes is None:
+            raise ValueError(f"Node key {node_key} does not exist")
+        preds = self.__predecessors()
+        if preds is None and self.__split:
+            result = {key for key, adjacency in nodes.items() if node_key in adjacency}
+        elif preds is None:
+            result = {key for key, value in nodes.items()
+                      if isinstance(key, int) and value is not None and node_key in value}
+        else:
+            result = preds.get(node_key, _NO_PREDECESSORS)
+        # Linked nodes can be missing from the graph dict
+        if not result and node_key not in nodes:
+            raise ValueError(f"Node key {node_key} does not exist")
+        return result
+
+    def in_degree(self, node_key: int) -> int:
+        """Get the number of links pointing to node_key
+        :param node_key: Node's key
+        :return: Number of incoming links
+        """
+        return len(self.__incoming(node_key))
+
+    def successors(self, node_key: int) -> iter:
+        """Iterate over the nodes linked from node_key, without building the adjacency view
+        :param node_key: Node's key
+        :return: iterator of node keys
+        """
+        if self.__split:
+            if node_key not in self.__adj:
+                raise ValueError(f"Node key {node_key} does not exist")
+            return iter(self.__adj[node_key])
+        nodes = self.__graph[self.__label]
+        node_p = None if nodes is None else nodes.get(node_key)
+        if node_p is None:
+            if nodes is None or node_key not in nodes:
+                # Linked nodes can be missing from the graph dict, this raises if it is not one
+                self.__incoming(node_key)
+            return iter(())
+        # int keys are links, the others are node properties
+        return (prop_k for prop_k in node_p if isinstance(prop_k, int))
+
+    def out_degree(self, node_key: int) -> int:
+        """Get the number of links from node_key
+        :param node_key: Node's key
+        :return: Number of outgoing links
+        """
+        if self.__split and node_key in self.__adj:
+            return len(self.__adj[node_key])
+        return sum(1 for _ in self.successors(node_key))
 
+    def nodes(self) -> dict or None:
+        """Get all nodes in graph. The result is a read-only view, computed on the first
+        call and kept up to date, in place, by every change of the graph.
+        :return: dict of nodes with their properties (None if a node has no properties),
+        or None if graph is empty
+        """
+        if self.__split:
+            return MappingProxyType(self.__props) if self.__props else None
         if self.__graph[self.__label] is None:
             return None
-        else:
-            _nodes = {}
-            # iterate over all nodes
-            for node_k, node_p in self.__graph[self.__label].items():
-                # if node has properties
-                if node_p is not None:
-                    for prop_k, prop_v in node_p.items():
-                        # if the property is not a link
-                        if not isinstance(prop_k, int):
-                            _nodes |= {node_k: {prop_k: prop_v}}
-                        else:
-                            _nodes |= {node_k: None}
-                else:
-                    # if node has no properties, just copy the node
-                    _nodes |= {node_k: None}
-            return _nodes
+        if 'nodes' not in self.__views:
+            self.__views['nodes'] = dict(self.iter_nodes())
+        return MappingProxyType(self.__views['nodes'])
 
     def links(self) -> dict[[int, int], dict]:
-        """Get all the links in graph
+        """Get all the links in graph. The result is a read-only view, computed on the first
+        call and kept up to date, in place, by every change of the graph.
         :return: dict of links with keys (from_node, to_node) and properties as values
         """
-        if self.__graph[self.__label] is None:
-            return {}
-        else:
-            _links = {}
-            # iterate over all nodes
-            for node_k, node_p in self.__graph[self.__label].items():
-                # if node has properties
-                if node_p is not None:
+        if 'links' not in self.__views:
+            self.__views['links'] = {(from_node, to_node): link_p
+                                     for from_node, to_node, link_p in self.iter_links()}
+        return MappingProxyType(self.__views['links'])
+
+    def adjacency(self) -> dict[int, dict]:
+        """Get the links of every node, without node properties. Linked nodes missing from
+        the graph dict are included. The result is a read-only view, computed on the first
+        call and kept up to date, in place, by every change of the graph.
+        :return: dict {node_key: {to_node: link properties}}
+        """
+        if self.__split:
+            return MappingProxyType(self.__adj)
+        if 'adjacency' not in self.__views:
+            nodes = self.__graph[self.__label] or {}
+            adjacency = {node_k: _split_node(node_p)[1] for node_k, node_p in nodes.items() if isinstance(node_k, int)}
+            # Linked nodes missing from the graph dict are nodes without links
+            missing = set().union(*adjacency.values()).difference(adjacency)
+            adjacency.update({node_k: {} for node_k in missing})
+            self.__views['adjacency'] = adjacency
+        return MappingProxyType(self.__views['adjacency'])
+
+    def iter_nodes(self) -> iter:
+        """Iterate over the nodes in graph without building a dict
+        :return: generator of (node_key, properties) pairs
+        """
+        if self.__split:
+            yield from self.__props.items()
+            return
+        nodes = self.__graph[self.__label]
+        if nodes is not None:
+            for node_k, node_p in nodes.items():
+                # graph attributes are not nodes
+                if isinstance(node_k, int):
+                    if node_p is None:
+                        yield node_k, None
+                    else:
+                        props = {prop_k: prop_v for prop_k, prop_v in node_p.items() if not isinstance(prop_k, int)}
+                        yield node_k, props or None
+
+    def iter_links(self) -> iter:
+        """Iterate over the links in graph without building a dict
+        :return: generator of (from_node, to_node, properties) tuples
+        """
+        if self.__split:
+            for node_k, adjacency in self.__adj.items():
+                for to_node, link_p in adjacency.items():
+                    yield node_k, to_node, link_p
+            return
+        nodes = self.__graph[self.__label]
+        if nodes is not None:
+            for node_k, node_p in nodes.items():
+                if node_p is not None and isinstance(node_k, int):
                     for prop_k, prop_v in node_p.items():
                         # if the property is a link
                         if isinstance(prop_k, int):
-                            _links |= {(node_k, prop_k): prop_v}
-            return _links
+                            yield node_k, prop_k, prop_v
 
-    def to_matrix(self) -> list[list[float]]:
+    def to_matrix(self, fmt: str = 'dense', order: list = None, weight: str = 'weight') -> object:
         """Get graph as adjacency matrix. If nodes do not exist, return empty matrix.
+        The matrix is built in a single pass over the adjacency of the nodes.
+        :param fmt: Output format. Defaults to 'dense'.
+            - 'dense': list of lists of floats
+            - 'numpy': NumPy 2D array (requires NumPy)
+            - 'coo': tuple (rows, cols, values) of array.array
+            - 'csr': tuple (indptr, indices, values) of array.array
+        :param order: Node keys in row/column order, links to nodes not in order are
+        skipped. Defaults to the sorted node keys, with the linked nodes missing from the
+        graph dict.
+        :param weight: Link property used as value, links without it weight 1.0. Defaults to 'weight'.
         :return: Adjacency matrix
-        :rtype: list
         """
-        nodes = self.__graph[self.__label]
-        if nodes is None:
-            return []
+        if fmt not in _MATRIX_FORMATS:
+            raise ValueError(f"Format {fmt} must be one of {', '.join(_MATRIX_FORMATS)}")
+        nodes = self.__adj if self.__split else self.__graph[self.__label] or {}
+        # Linked nodes missing from the graph dict are nodes without links, as in adjacency()
+        if self.__split:
+            keys = nodes.keys()
         else:
-            matrix = []
-            # fill matrix with 0s
-            for i in range(len(nodes)):
-                matrix.append([0.0] * len(nodes))
-            # get links
-            links = self.links()
-            # iterate over all links
-            for link, prop in links.items():
-                # get link's nodes
-                from_node, to_node = link
-                # get link's weight if it exists
-                weight = float(prop['weight']) if prop is not None and 'weight' in prop else 1.0
-                # add weight to matrix
-                matrix[from_node][to_node] = weight
-        return matrix
+            linked = {prop_k for node_k, node_p in nodes.items() if node_p is not None and isinstance(node_k, int)
+                      for prop_k in node_p if isinstance(prop_k, int)}
+            keys = linked.union(key for key in nodes if isinstance(key, int))
+        if order is None:
+            order = sorted(keys)
+        index = {key: i for i, key in enumerate(order)}
+        if len(index) != len(order):
+            raise ValueError("Order contains repeated node keys")
+
+        indptr = array('q', [0])
+        indices = array('q')
+        values = array('d')
+        for node_k in order:
+            if node_k not in keys:
+                raise ValueError(f"Node key {node_k} does not exist")
+            node_p = nodes.get(node_k)
+            if self.__split:
+                for to_node, link_p in node_p.items():
+                    if to_node in index:
+                        indices.append(index[to_node])
+                        values.append(float(link_p[weight]) if link_p is not None and weight in link_p else 1.0)
+            elif node_p is not None:
+                for prop_k, prop_v in node_p.items():
+                    # if the property is a link to a node in the matrix
+                    if isinstance(prop_k, int) and prop_k in index:
+                        indices.append(index[prop_k])
+                        values.append(float(prop_v[weight]) if prop_v is not None and weight in prop_v else 1.0)
+            indptr.append(len(indices))
+        return _csr_to_matrix(indptr, indices, values, len(order), fmt)
+
+    def from_matrix(self, matrix: list or tuple, fmt: str = 'dense', order: list = None,
+                    weight: str or None = 'weight', threshold: float = 0.0) -> None:
+        """Set graph from adjacency matrix. Every row or column is a node, and every value
+        whose absolute value is greater than threshold is a link. Node dicts are built row by row.
+        :param matrix: Adjacency matrix, in one of the formats:
+            - 'dense': list of lists of ints or floats, or NumPy 2D array
+            - 'coo': tuple (rows, cols, values)
+            - 'csr': tuple (indptr, indices, values)
+            SciPy sparse matrices are accepted whatever the format.
+        :param fmt: 'dense', 'coo' or 'csr'. Defaults to 'dense'.
+        :param order: Node keys of the rows/columns. Defaults to 0..n-1.
+        :param weight: Link property that holds the value, None for links without properties.
+        Defaults to 'weight'.
+        :param threshold: Values with an absolute value not greater than it are skipped. Defaults to 0.0.
+        """
+        if fmt not in ('dense', 'coo', 'csr'):
+            raise ValueError(f"Format {fmt} must be one of dense, coo, csr")
 
-    def from_matrix(self, matrix: list) -> None:
-        """Set graph from adjacency matrix
-        :param matrix: Adjacency matrix
-        """
-        if not isinstance(matrix, list):
-            raise TypeError("Matrix must be of type list")
-        if not all(isinstance(row, list) for row in matrix):
-            raise TypeError("Matrix must be of type list of lists")
-        if not all(all(isinstance(element, int) or isinstance(element, float) for element in row) for row in matrix):
-            raise TypeError("Matrix must be of type list of lists of ints or floats")
-        if not all(len(row) == len(matrix) for row in matrix):
-            raise ValueError("Matrix must be square")
-
-        self.__graph[self.__label] = None
-        for i in range(len(matrix)):
-            for j in range(len(matrix)):
-                if matrix[i][j] != 0.0:
-                    self.add((i, j), {'weight': matrix[i][j]})
+        dense_rows = None
+        coo = None
+        if hasattr(matrix, 'tocsr'):
+            # SciPy sparse matrix
+            if matrix.shape[0] != matrix.shape[1]:
+                raise ValueError("Matrix must be square")
+            matrix = matrix.tocsr()
+            n = matrix.shape[0]
+            indptr, indices, values = matrix.indptr.tolist(), matrix.indices.tolist(), matrix.data.tolist()
+        elif fmt == 'dense' and np is not None and isinstance(matrix, np.ndarray):
+            if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1]:
+                raise ValueError("Matrix must be square")
+            if not (np.issubdtype(matrix.dtype, np.integer) or np.issubdtype(matrix.dtype, np.floating)
+                    or matrix.dtype == np.bool_):
+                raise TypeError("Matrix must be an array of ints or floats")
+            n = matrix.shape[0]
+            # Non zero values are found in bulk, in row major order
+            rows, cols = np.nonzero(np.abs(matrix) > threshold)
+            indptr = [0] + np.cumsum(np.bincount(rows, minlength=n)).tolist()
+            indices, values = cols.tolist(), matrix[rows, cols].tolist()
+        elif fmt == 'dense':
+            if not isinstance(matrix, list):
+                raise TypeError("Matrix must be of type list")
+            n = len(matrix)
+            for row in matrix:
+                if not isinstance(row, list):
+                    raise TypeError("Matrix must be of type list of lists")
+                _check_types(row, (int, float), "Matrix must be of type list of lists of ints or floats")
+                if len(row) != n:
+                    raise ValueError("Matrix must be square")
+            dense_rows = matrix
+        elif fmt == 'coo':
+            coo = tuple(list(a) for a in matrix)
+            rows, cols, values = coo
+            if not len(rows) == len(cols) == len(values):
+                raise ValueError("Rows, cols and values must have the same length")
+            n = len(order) if order is not None else max(max(rows, default=-1), max(cols, default=-1)) + 1
+            # Negative indices would silently count from the end of order
+            if not all(0 <= i < n for i in rows) or not all(0 <= j < n for j in cols):
+                raise ValueError(f"Rows and cols must be in the range [0, {n})")
+        else:
+            indptr, indices, values = matrix
+            n = len(indptr) - 1
+            if len(indices) != len(values) or (n >= 0 and indptr[n] != len(indices)):
+                raise ValueError("Indices and values must have indptr[-1] elements")
+            if n >= 0 and (indptr[0] != 0 or any(indptr[i] > indptr[i + 1] for i in range(n))):
+                raise ValueError("Indptr must start at 0 and be non decreasing")
+            if not all(0 <= j < n for j in indices):
+                raise ValueError(f"Indices must be in the range [0, {n})")
+
+        if order is None:
+            keys = range(n)
+        else:
+            keys = list(order)
+            if len(keys) != n:
+                raise ValueError(f"Order must have {n} node keys")
+            _check_types(keys, (int,), "Node key {} must be of type int")
+            if len(set(keys)) != n:
+                raise ValueError("Order contains repeated node keys")
+
+        nodes = dict.fromkeys(keys)
+        if dense_rows is not None:
+            for i, row in enumerate(dense_rows):
+                adjacency = {keys[j]: None if weight is None else {weight: value}
+                             for j, value in enumerate(row) if abs(value) > threshold}
+                if adjacency:
+                    nodes[keys[i]] = adjacency
+        elif coo is not None:
+            for i, j, value in zip(*coo):
+                if abs(value) > threshold:
+                    adjacency = nodes[keys[i]]
+                    if adjacency is None:
+                        adjacency = nodes[keys[i]] = {}
+                    adjacency[keys[j]] = None if weight is None else {weight: value}
+        else:
+            for i in range(n):
+                start, end = indptr[i], indptr[i + 1]
+                if start != end:
+                    adjacency = {keys[j]: None if weight is None else {weight: value}
+                                 for j, value in zip(indices[start:end], values[start:end])
+                                 if abs(value) > threshold}
+                    if adjacency:
+                        nodes[keys[i]] = adjacency
+
+        if self.__split:
+            _replace(self.__adj, {node_k: adjacency or {} for node_k, adjacency in nodes.items()})
+            _replace(self.__props, dict.fromkeys(keys))
+            self.__attrs = {}
+        else:
+            self.__graph[self.__label] = nodes if nodes else None
+        self.__owned = None
+        self.__changed()
+
+    def freeze(self, weight: str or None = 'weight', properties: bool = True, backend: str = 'array') -> object:
+        """Get a read-only compressed sparse row (CSR) snapshot of the graph
+        :param weight: Link property stored as a float weight, None for no weights. Defaults to 'weight'.
+        :param properties: Keep a copy of the node and link properties, the link properties
+        that only hold the weight are kept in the weights buffer. Defaults to True.
+        :param backend: 'array' for array.array buffers or 'numpy' for NumPy arrays. Defaults to 'array'.
+        :return: FrozenGraph instance
+        """
+        from .frozen import FrozenGraph
+        return FrozenGraph.from_graph(self.to_dict(), weight=weight, properties=properties, backend=backend)
+
+    def memory_usage(self, sample: int = None, seed: int = 0) -> dict:
+        """Get the memory used by the graph, in bytes, by component. Objects shared by many
+        nodes or links are counted once, in the first component that reaches them.
+        :param sample: Number of nodes to measure, the per-node sizes are scaled to all the
+        nodes. Defaults to None (all the nodes, an exact measure).
+        :param seed: Seed of the random sample. Defaults to 0.
+        :return: dict with the sizes of
+            - 'structure': the graph dict, the node dicts and the graph attributes
+            - 'keys': the node keys, including the keys of the links
+            - 'node_properties': the properties of the nodes
+            - 'link_properties': the properties of the links
+            - 'indexes': the reverse index and the views of nodes(), links() and adjacency()
+            - 'total': the sum of all of them
+        """
+        getsizeof = sys.getsizeof
+        seen = set()
+        usage = dict.fromkeys(('structure', 'keys', 'node_properties', 'link_properties', 'indexes'), 0)
+        if self.__split:
+            containers = self.__adj
+            usage['structure'] = getsizeof(self.__adj) + getsizeof(self.__props) + get_size(self.__attrs, seen)
+            node_keys = list(containers)
+        else:
+            containers = self.__graph[self.__label] or {}
+            usage['structure'] = getsizeof(self.__graph) + getsizeof(containers)
+            node_keys = []
+            for key, value in containers.items():
+                if isinstance(key, int):
+                    node_keys.append(key)
+                else:
+                    usage['structure'] += get_size(key, seen) + get_size(value, seen)
+        preds = self.__preds
+        views = self.__views
+        usage['indexes'] = sum(getsizeof(view) for view in views.values())
+        if preds is not None:
+            usage['indexes'] += getsizeof(preds)
+
+        scale = 1.0
+        if sample is not None and sample < len(node_keys):
+            if sample < 1:
+                raise ValueError(f"Sample {sample} must be positive")
+            scale = len(node_keys) / sample
+            node_keys = random.Random(seed).sample(node_keys, sample)
+
+        # Per-node sizes, scaled to all the nodes when sampling
+        structure = keys = node_properties = link_properties = indexes = 0
+        link_key = getsizeof((0, 0))
+        for node_k in node_keys:
+            keys += get_size(node_k, seen)
+            node_p = containers[node_k]
+            if node_p is None:
+                continue
+            structure += getsizeof(node_p)
+            if self.__split:
+                node_properties += get_size(self.__props[node_k], seen) if self.__props[node_k] is not None else 0
+            for key, value in node_p.items():
+                if not isinstance(key, int):
+                    node_properties += get_size(key, seen) + get_size(value, seen)
+                    continue
+                keys += get_size(key, seen)
+                if value is not None:
+                    link_properties += get_size(value, seen)
+                # The links view keys are (from_node, to_node) tuples
+                if 'links' in views:
+                    indexes += link_key
+            if preds is not None and node_k in preds:
+                indexes += getsizeof(preds[node_k])
+            if 'adjacency' in views and node_k in views['adjacency']:
+                indexes += getsizeof(views['adjacency'][node_k])
+            if 'nodes' in views and views['nodes'].get(node_k) is not None:
+                indexes += get_size(views['nodes'][node_k], seen)
+        usage['structure'] += int(structure * scale)
+        usage['keys'] += int(keys * scale)
+        usage['node_properties'] += int(node_properties * scale)
+        usage['link_properties'] += int(link_properties * scale)
+        usage['indexes'] += int(indexes * scale)
+        usage['total'] = sum(usage.values())
+        return usage
+
+    def instrument(self, before: callable or iter = None, after: callable or iter = None) -> None:
+        """Count the calls, time and full rebuilds of the graph methods, and call hooks around
+        the mutations (add, dlt, add_many, from_matrix, union_update and intersect_update).
+        The methods are wrapped on the instance, so a graph that is not instrumented runs the
+        plain methods. Calls made by other methods are counted too. Calling it again replaces
+        the hooks and keeps the counters.
+        :param before: Hook or list of hooks called before a mutation as hook(graph, name, args, kwargs).
+        An exception raised by a hook stops the mutation. Defaults to None.
+        :param after: Hook or list of hooks called after a mutation that did not raise, with
+        the same arguments. Defaults to None.
+        """
+        hooks = {'before': [] if before is None else [before] if callable(before) else list(before),
+                 'after': [] if after is None else [after] if callable(after) else list(after)}
+        for hook in hooks['before'] + hooks['after']:
+            if not callable(hook):
+                raise TypeError(f"Hook {hook} must be callable")
+        if self.__counters is None:
+            self.__counters = {name: [0, 0.0, 0] for name in _INSTRUMENTED}
+        if self.__hooks is not None:
+            # The wrappers keep a reference to the hooks dict
+            self.__hooks.update(hooks)
+            return
+        self.__hooks = hooks
+        for name in _INSTRUMENTED:
+            setattr(self, name, self.__wrap(name))
+
+    def uninstrument(self) -> None:
+        """Restore the plain methods. The counters are kept for stats()."""
+        if self.__hooks is not None:
+            for name in _INSTRUMENTED:
+                delattr(self, name)
+            self.__hooks = None
+
+    def stats(self, reset: bool = False) -> dict:
+        """Get a snapshot of the counters of instrument()
+        :param reset: Set the counters to zero after the snapshot. Defaults to False.
+        :return: dict {'enabled': bool, 'version': int, 'operations': {name: {'calls': int,
+        'seconds': float, 'rebuilds': int}}}. rebuilds counts the calls that built a view or
+        index from all the nodes (nodes(), links(), adjacency(), predecessors()) or a whole
+        matrix or snapshot (to_matrix(), freeze()). The operations are empty if the graph
+        was never instrumented.
+        """
+        counters = self.__counters or {}
+        snapshot = {'enabled': self.__hooks is not None, 'version': self.__version,
+                    'operations': {name: {'calls': calls, 'seconds': seconds, 'rebuilds': rebuilds}
+                                   for name, (calls, seconds, rebuilds) in counters.items()}}
+        if reset:
+            for values in counters.values():
+                values[:] = [0, 0.0, 0]
+        return snapshot
+
+    def __wrap(self, name: str) -> callable:
+        """Wrap a method for instrument()
+        :param name: Method name
+        :return: Function to set on the instance
+        """
+        method = getattr(Graph, name)
+        counters = self.__counters[name]
+        rebuilds = self.__rebuilds
+        perf_counter = time.perf_counter
+
+        if name not in _MUTATIONS:
+            @functools.wraps(method)
+            def wrapper(*args, **kwargs):
+                if rebuilds(name):
+                    counters[2] += 1
+                start = perf_counter()
+                try:
+                    return method(self, *args, **kwargs)
+                finally:
+                    counters[0] += 1
+                    counters[1] += perf_counter() - start
+            return wrapper
+
+        hooks = self.__hooks
+
+        @functools.wraps(method)
+        def mutation(*args, **kwargs):
+            for hook in hooks['before']:
+                hook(self, name, args, kwargs)
+            start = perf_counter()
+            try:
+                result = method(self, *args, **kwargs)
+            finally:
+                counters[0] += 1
+                counters[1] += perf_counter() - start
+            for hook in hooks['after']:
+                hook(self, name, args, kwargs)
+            return result
+        return mutation
+
+    def __rebuilds(self, name: str) -> bool:
+        """Check if a call of a method will build its result from all the nodes
+        :param name: Method name
+        :return: True for a full rebuild
+        """
+        if name in ('to_matrix', 'freeze'):
+            return True
+        if name == 'predecessors':
+            return self.__preds is None
+        if name == 'links':
+            return 'links' not in self.__views
+        if name in ('nodes', 'adjacency') and not self.__split:
+            return name not in self.__views and (name == 'adjacency' or self.__graph[self.__label] is not None)
+        return False
 
     def validate_graph(self, graph_dict) -> bool:
         """Validate graph
@@ -295,23 +1337,246 @@ class Graph:
             raise TypeError("Graph values must be of type dict or None")
         return True
 
-    def copy(self):
-        """Copy graph
+    def copy(self, cow: bool = False) -> object:
+        """Copy graph. The structure (graph dict, node dicts) is copied, the links properties
+        dicts (and the nodes properties dicts of the 'split' layout) are shared with the copy.
+        :param cow: Copy on write. Only the graph dict is copied and both graphs share the
+        node dicts, each graph copies a node dict the first time it changes it. The copy is
+        O(V) instead of O(V + E). Defaults to False.
         :return: New instance with a copy of graph
         """
-        g = self.__graph[self.__label].to_dict()
-        return Graph(g)
+        g = Graph(reverse_index=self.__reverse_index, layout=self.layout)
+        if self.__split:
+            g.__props = dict(self.__props)
+            g.__attrs = dict(self.__attrs)
+            g.__adj = dict(self.__adj) if cow else {node_k: dict(adjacency) for node_k, adjacency in self.__adj.items()}
+        else:
+            nodes = self.__graph[self.__label]
+            if nodes is not None and cow:
+                nodes = dict(nodes)
+            elif nodes is not None:
+                nodes = {node_k: dict(node_p) if node_p is not None and isinstance(node_k, int) else node_p
+                         for node_k, node_p in nodes.items()}
+            g.__graph = {g.__label: nodes}
+        if cow:
+            # Every node dict is shared now, for both graphs
+            self.__owned = set()
+            g.__owned = set()
+        return g
+
+    def __node_properties(self) -> dict:
+        """Get the properties of the nodes in the graph dict
+        :return: dict {node_key: properties}
+        """
+        if self.__split:
+            return self.__props
+        return self.nodes() or {}
+
+    def __attributes(self) -> dict:
+        """Get the graph attributes, the keys of the graph dict that are not nodes
+        :return: dict {attribute: value}
+        """
+        if self.__split:
+            return self.__attrs
+        nodes = self.__graph[self.__label] or {}
+        return {key: value for key, value in nodes.items() if not isinstance(key, int)}
+
+    def __node_items(self) -> iter:
+        """Iterate over the nodes with their properties and links, linked nodes missing from
+        the graph dict included, without building the views
+        :return: generator of (node_key, properties or None, {to_node: link properties}) tuples
+        """
+        if self.__split:
+            props = self.__props
+            for node_k, adjacency in self.__adj.items():
+                yield node_k, props[node_k], adjacency
+            return
+        nodes = self.__graph[self.__label] or {}
+        missing = set()
+        for node_k, node_p in nodes.items():
+            if isinstance(node_k, int):
+                node_p, adjacency = _split_node(node_p)
+                missing.update(to_node for to_node in adjacency if to_node not in nodes)
+                yield node_k, node_p, adjacency
+        for node_k in missing:
+            yield node_k, None, {}
 
-    def union(self, g: object) -> object:
+    def __merged(self, node_keys: iter) -> None:
+        """Update the reverse index and the views after links and properties were merged into
+        some nodes, nothing removed. The work is proportional to the links of these nodes, not
+        to the size of the graph.
+        :param node_keys: Keys of the nodes added or changed
+        """
+        preds, views = self.__preds, self.__views
+        if preds is not None or views:
+            nodes = None if self.__split else self.__graph[self.__label]
+            for node_k in node_keys:
+                if self.__split:
+                    props, adjacency = self.__props[node_k], self.__adj[node_k]
+                else:
+                    props, adjacency = _split_node(nodes[node_k])
+                if preds is not None:
+                    for to_node in adjacency:
+                        if to_node in preds:
+                            preds[to_node].add(node_k)
+                        else:
+                            preds[to_node] = {node_k}
+                if 'nodes' in views:
+                    views['nodes'][node_k] = props
+                if 'adjacency' in views:
+                    view = views['adjacency']
+                    view[node_k] = adjacency
+                    for to_node in adjacency:
+                        view.setdefault(to_node, {})
+                if 'links' in views:
+                    views['links'].update(((node_k, to_node), link_p) for to_node, link_p in adjacency.items())
+        self.__version += 1
+
+    def __changed(self) -> None:
+        """Drop the reverse index and rebuild the views after a change of many nodes. The views
+        are rebuilt in place, the ones already returned by nodes(), links() and adjacency()
+        stay up to date."""
+        self.__preds = None
+        views = self.__views
+        for name, view in list(views.items()):
+            del views[name]
+            # The plain method, not the one of instrument()
+            getattr(Graph, name)(self)
+            _replace(view, views.get(name, {}))
+            views[name] = view
+        self.__version += 1
+
+    def union(self, g: object, policy: str or callable = 'right') -> object:
         """Union of two graphs
         :param g: Graph to union with
-        :return: Same graph instance with union of two graphs
+        :param policy: What to do when a property has different values in both graphs, see
+        union_update(). Defaults to 'right'.
+        :return: New graph instance with union of two graphs
         """
-        pass
+        result = self.copy()
+        result.union_update(g, policy)
+        return result
 
-    def intersect(self, g: object) -> object:
+    def union_update(self, g: object, policy: str or callable = 'right') -> None:
+        """Add the nodes and links of another graph to this one. The nodes and links in both
+        graphs get the properties of both.
+        :param g: Graph to union with
+        :param policy: What to do when a property has different values in both graphs.
+        Defaults to 'right'.
+            - 'right': keep the value of g
+            - 'left': keep the value of this graph
+            - 'error': raise ValueError
+            - a function (key, left_value, right_value) -> value
+        """
+        _check_policy(policy)
+        if not isinstance(g, Graph):
+            raise TypeError(f"Graph {g} must be of type Graph")
+        other_attrs = g.__attributes()
+        # Merge everything first, nothing is written if a policy raises
+        if self.__split:
+            adj, props = self.__adj, self.__props
+            new_adj = {}
+            new_props = {}
+            new_links = {}
+            for node_k, node_p, links in g.__node_items():
+                if node_k not in adj:
+                    new_adj[node_k] = dict(links)
+                    new_props[node_k] = node_p
+                    continue
+                if node_p is not None:
+                    new_props[node_k] = _merge_properties(props[node_k], node_p, policy, f"node {node_k}")
+                if links:
+                    new_links[node_k] = _merge_links(node_k, adj[node_k], links, policy)
+            attrs = _merge_properties(self.__attrs, other_attrs, policy, 'the graph')
+            for node_k, links in new_links.items():
+                self.__own(adj, node_k)
+                adj[node_k].update(links)
+            props.update(new_props)
+            adj.update(new_adj)
+            self.__attrs = attrs
+            changed = new_adj.keys() | new_props.keys() | new_links.keys()
+        else:
+            nodes = self.__graph[self.__label] or {}
+            updates = {}
+            for node_k, node_p, links in g.__node_items():
+                if node_k in nodes:
+                    if node_p is not None or links:
+                        self_p, self_links = _split_node(nodes[node_k])
+                        node_p = _merge_properties(self_p, node_p, policy, f"node {node_k}")
+                        updates[node_k] = _node_dict(node_p, self_links, _merge_links(node_k, self_links, links, policy))
+                else:
+                    # Linked nodes missing from the graph dict get a dict of their own too
+                    updates[node_k] = _node_dict(node_p, links)
+            changed = list(updates)
+            if other_attrs:
+                # Only the attributes of both graphs can conflict
+                left = {key: nodes[key] for key in other_attrs if key in nodes}
+                updates.update(_merge_properties(left, other_attrs, policy, 'the graph'))
+            if self.__graph[self.__label] is None:
+                self.__graph[self.__label] = updates or None
+            else:
+                nodes.update(updates)
+        self.__merged(changed)
+
+    def intersect(self, g: object, policy: str or callable = 'right') -> object:
         """Intersection of two graphs
         :param g: Graph to intersect with
-        :return: Same graph instance with intersection of two graphs
+        :param policy: What to do when a property has different values in both graphs, see
+        union_update(). Defaults to 'right'.
+        :return: New graph instance with intersection of two graphs
+        """
+        result = Graph(reverse_index=self.__reverse_index, layout=self.layout)
+        result.__set_nodes(*self.__intersection(g, policy))
+        return result
+
+    def intersect_update(self, g: object, policy: str or callable = 'right') -> None:
+        """Keep only the nodes and links that are also in another graph. They get the
+        properties of both graphs.
+        :param g: Graph to intersect with
+        :param policy: What to do when a property has different values in both graphs, see
+        union_update(). Defaults to 'right'.
         """
-        pass
+        self.__set_nodes(*self.__intersection(g, policy))
+
+    def __intersection(self, g: object, policy: str or callable) -> (dict, dict, dict):
+        """Get the nodes, links and attributes in both graphs, in new dicts
+        :param g: Graph to intersect with
+        :param policy: See union_update()
+        :return: tuple ({node_key: properties}, {node_key: {to_node: link properties}}, {attribute: value})
+        """
+        _check_policy(policy)
+        if not isinstance(g, Graph):
+            raise TypeError(f"Graph {g} must be of type Graph")
+        self_adj, other_adj = self.adjacency(), g.adjacency()
+        self_props, other_props = self.__node_properties(), g.__node_properties()
+        self_attrs, other_attrs = self.__attributes(), g.__attributes()
+        common = self_adj.keys() & other_adj.keys()
+        props = {node_k: _merge_properties(self_props.get(node_k), other_props.get(node_k), policy,
+                                           f"node {node_k}") for node_k in common}
+        links = {}
+        for node_k in common:
+            other_links = other_adj[node_k]
+            links[node_k] = {to_node: _merge_properties(link_p, other_links[to_node], policy, f"link {(node_k, to_node)}")
+                             for to_node, link_p in self_adj[node_k].items() if to_node in other_links}
+        attrs = _merge_properties({key: value for key, value in self_attrs.items() if key in other_attrs},
+                                  {key: value for key, value in other_attrs.items() if key in self_attrs},
+                                  policy, 'the graph')
+        return props, links, attrs
+
+    def __set_nodes(self, props: dict, links: dict, attrs: dict) -> None:
+        """Replace all the nodes of the graph
+        :param props: dict {node_key: properties}
+        :param links: dict {node_key: {to_node: link properties}} with every node
+        :param attrs: dict {attribute: value}
+        """
+        if self.__split:
+            _replace(self.__props, props)
+            _replace(self.__adj, links)
+            self.__attrs = attrs
+        else:
+            nodes = {node_k: _node_dict(props[node_k], node_links) for node_k, node_links in links.items()}
+            nodes.update(attrs)
+            self.__graph[self.__label] = nodes or None
+        # The node dicts are new, none is shared with a copy
+        self.__owned = None
+        self.__changed()
@@ -0,0 +1,246 @@
+"""
+This module contains the readers and writers of graph files: edge lists and JSON lines.
+author: @jocerfranquiz
+date: 2023-02-19
+version: 0.0.1
+
+Readers and writers stream: a reader builds the graph from one line at a time, adding nodes
+and links with Graph.add_many() in chunks, and a writer walks the graph with iter_nodes() and
+iter_links(), so neither the file nor the nodes() and links() dicts are ever held in memory.
+Paths ending with '.gz' are read and written with gzip.
+
+Edge list: a link per line, 'from_node to_node' followed by the values of the property
+columns, e.g. '0 1 2.5' with properties=[('weight', float)]. A line with a single key is a
+node without links. Node properties are not written.
+
+JSON lines: an object per line, {"node": key, "properties": {...}} for the nodes and
+{"link": [from_node, to_node], "properties": {...}} for the links, without "properties" if
+there are none. Nodes are written before the links. Graph attributes are not written.
+"""
+
+import gzip
+import json
+import os
+
+from .graph import Graph, from_nodes_and_links
+
+
+def _open(path, mode: str) -> object:
+    """Open a text file, with gzip if the path ends with '.gz'
+    :param path: File path
+    :param mode: 'r' or 'w'
+    :return: File object
+    """
+    if os.fspath(path).endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _lines(source) -> iter:
+    """Iterate over the lines of a source
+    :param source: File path, file object or iterable of lines (str or bytes)
+    :return: generator of str lines
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with _open(source, 'r') as f:
+            yield from f
+        return
+    for line in source:
+        yield line.decode('utf-8') if isinstance(line, bytes) else line
+
+
+def _write(target, lines: iter) -> int:
+    """Write lines to a target
+    :param target: File path or file object
+    :param lines: Iterable of lines
+    :return: Number of lines written
+    """
+    count = 0
+    if isinstance(target, (str, os.PathLike)):
+        with _open(target, 'w') as f:
+            for line in lines:
+                f.write(line)
+                count += 1
+    else:
+        for line in lines:
+            target.write(line)
+            count += 1
+    return count
+
+
+def _merge(left: dict or None, right: dict or None) -> dict or None:
+    """Merge the properties of two lines of the same node, the right ones win
+    :param left: Properties read first
+    :param right: Properties read later
+    :return: Merged properties
+    """
+    if left is None:
+        return right
+    if right is None:
+        return left
+    return {**left, **right}
+
+
+def _load(g: Graph or None, items: iter, chunk_size: int) -> Graph:
+    """Add (nodes, links) batches to a graph in chunks. A node read again, read after a
+    link to it or already in the graph, is merged into the node already there, so the result
+    does not depend on the chunk size.
+    :param g: Graph instance, None for a new graph
+    :param items: Iterable of ('node', node_key, properties) and ('link', (from_node, to_node), properties)
+    :param chunk_size: Number of nodes and links per add_many() call
+    :return: Graph instance
+    """
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size {chunk_size} must be positive")
+    # Keys of the nodes in the graph or added by earlier chunks, and properties of their later node lines
+    if g is None:
+        g = Graph()
+        added = set()
+    else:
+        added = {node_k for node_k, _ in g.iter_nodes()}
+    late = {}
+    nodes = {}
+    links = []
+    for kind, key, properties in items:
+        if kind == 'link':
+            links.append((key[0], key[1], properties))
+        elif key in nodes:
+            nodes[key] = _merge(nodes[key], properties)
+        elif key in added:
+            if properties is not None:
+                late[key] = _merge(late.get(key), properties)
+        else:
+            nodes[key] = properties
+        if len(nodes) + len(links) >= chunk_size:
+            g.add_many(nodes, links)
+            added.update(nodes)
+            for from_node, to_node, _ in links:
+                added.add(from_node)
+                added.add(to_node)
+            nodes = {}
+            links = []
+    if nodes or links:
+        g.add_many(nodes, links)
+    if late:
+        g.union_update(from_nodes_and_links(late))
+    return g
+
+
+def read_edgelist(source, properties: list = None, delimiter: str = None, comments: str = '#',
+                  chunk_size: int = 100000, g: Graph = None) -> Graph:
+    """Read a graph from an edge list
+    :param source: File path, file object or iterable of lines
+    :param properties: Property columns after the node keys, as (name, type) pairs, e.g.
+    [('weight', float)]. Lines can have fewer columns. Defaults to None (no columns).
+    :param delimiter: Column delimiter. Defaults to None (any whitespace).
+    :param comments: Prefix of the comment lines. Defaults to '#'.
+    :param chunk_size: Number of nodes and links added at once. Defaults to 100000.
+    :param g: Graph to add the nodes and links to. Defaults to None (a new graph).
+    :return: Graph instance
+    """
+    columns = list(properties or ())
+
+    def items():
+        for number, line in enumerate(_lines(source), 1):
+            line = line.strip()
+            if not line or (comments and line.startswith(comments)):
+                continue
+            fields = line.split(delimiter)
+            try:
+                keys = [int(field) for field in fields[:2]]
+                if len(fields) > 2 + len(columns):
+                    raise ValueError(f"{len(fields) - 2} property columns, expected at most {len(columns)}")
+                link_p = {name: kind(value) for (name, kind), value in zip(columns, fields[2:])} or None
+            except ValueError as e:
+                raise ValueError(f"Line {number}: {e}") from None
+            if len(keys) == 1:
+                yield 'node', keys[0], None
+            else:
+                yield 'link', keys, link_p
+
+    return _load(g, items(), chunk_size)
+
+
+def iter_edgelist(g: Graph, properties: list = None, delimiter: str = ' ') -> iter:
+    """Get the lines of the edge list of a graph. The nodes without links are written as a
+    single key, after the links. Only the keys of the linked nodes are kept in memory.
+    :param g: Graph instance
+    :param properties: Names of the link properties to write as columns. A link's columns
+    stop at the first property it does not have. Defaults to None (no columns).
+    :param delimiter: Column delimiter. Defaults to ' '.
+    :return: generator of lines
+    """
+    columns = list(properties or ())
+    linked = set()
+    for from_node, to_node, link_p in g.iter_links():
+        linked.add(from_node)
+        linked.add(to_node)
+        fields = [str(from_node), str(to_node)]
+        if link_p is not None:
+            for name in columns:
+                if name not in link_p:
+                    break
+                fields.append(str(link_p[name]))
+        yield delimiter.join(fields) + '\n'
+    for node_k, _ in g.iter_nodes():
+        if node_k not in linked:
+            yield f"{node_k}\n"
+
+
+def write_edgelist(g: Graph, target, properties: list = None, delimiter: str = ' ') -> int:
+    """Write the edge list of a graph, see iter_edgelist()
+    :param g: Graph instance
+    :param target: File path or file object
+    :param properties: Names of the link properties to write as columns. Defaults to None.
+    :param delimiter: Column delimiter. Defaults to ' '.
+    :return: Number of lines written
+    """
+    return _write(target, iter_edgelist(g, properties, delimiter))
+
+
+def read_jsonl(source, chunk_size: int = 100000, g: Graph = None) -> Graph:
+    """Read a graph from JSON lines. A node line after a link to the node, or a repeated node
+    line, adds its properties to the node.
+    :param source: File path, file object or iterable of lines
+    :param chunk_size: Number of nodes and links added at once. Defaults to 100000.
+    :param g: Graph to add the nodes and links to. Defaults to None (a new graph).
+    :return: Graph instance
+    """
+    def items():
+        for number, line in enumerate(_lines(source), 1):
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+                if 'node' in obj:
+                    yield 'node', obj['node'], obj.get('properties')
+                elif 'link' in obj:
+                    yield 'link', tuple(obj['link']), obj.get('properties')
+                else:
+                    raise ValueError("Object must have a node or a link")
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"Line {number}: {e}") from None
+
+    return _load(g, items(), chunk_size)
+
+
+def iter_jsonl(g: Graph) -> iter:
+    """Get the JSON lines of a graph, nodes first
+    :param g: Graph instance
+    :return: generator of lines
+    """
+    dumps = json.JSONEncoder(separators=(',', ':')).encode
+    for node_k, node_p in g.iter_nodes():
+        yield dumps({'node': node_k} if node_p is None else {'node': node_k, 'properties': node_p}) + '\n'
+    for from_node, to_node, link_p in g.iter_links():
+        link = [from_node, to_node]
+        yield dumps({'link': link} if link_p is None else {'link': link, 'properties': link_p}) + '\n'
+
+
+def write_jsonl(g: Graph, target) -> int:
+    """Write the JSON lines of a graph, see iter_jsonl()
+    :param g: Graph instance
+    :param target: File path or file object
+    :return: Number of lines written
+    """
+    return _write(target, iter_jsonl(g))
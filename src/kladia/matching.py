@@ -0,0 +1,171 @@
+"""
+This module contains the bipartite graph algorithms: bipartition and maximum matching (Hopcroft-Karp).
+author: @jocerfranquiz
+date: 2023-02-12
+version: 0.0.1
+
+Links are taken as undirected: a link (u, v) joins u and v both ways, and a link must go from
+one side of the graph to the other.
+
+hopcroft_karp() runs in O(E * sqrt(V)). Every phase finds, with a BFS from the free nodes of
+the left side, the length of the shortest augmenting paths, and then augments a maximal set of
+disjoint paths of that length with a DFS. The DFS is iterative (a stack of left nodes and a
+pointer to the next link of each node), so long paths do not hit the recursion limit. Links
+are kept in flat CSR arrays of right node indexes.
+"""
+
+from array import array
+
+# Distance of the left nodes out of the layered graph of a phase
+_INF = 1 << 62
+
+
+def bipartition(g) -> (set, set):
+    """Split the nodes in two sides with no links inside a side, colouring every connected
+    component with a BFS
+    :param g: Graph instance
+    :return: tuple (left, right). The first node of every component is on the left.
+    :raises ValueError: if the graph is not bipartite
+    """
+    adjacency = g.adjacency()
+    neighbours = {node_k: [] for node_k in adjacency}
+    for from_node, node_links in adjacency.items():
+        for to_node in node_links:
+            neighbours[from_node].append(to_node)
+            neighbours[to_node].append(from_node)
+
+    colour = {}
+    for root in adjacency:
+        if root in colour:
+            continue
+        colour[root] = 0
+        queue = [root]
+        for node_k in queue:
+            c = colour[node_k] ^ 1
+            for other in neighbours[node_k]:
+                if other not in colour:
+                    colour[other] = c
+                    queue.append(other)
+                elif colour[other] != c:
+                    raise ValueError(f"The graph is not bipartite, link {(node_k, other)} closes an odd cycle")
+    left = {node_k for node_k, c in colour.items() if c == 0}
+    return left, colour.keys() - left
+
+
+def hopcroft_karp(g, left: iter = None, matching: dict = None) -> dict:
+    """Maximum matching of a bipartite graph
+    :param g: Graph instance
+    :param left: Node keys of the left side, the other nodes are the right side. Defaults to
+    None, the sides are found with bipartition().
+    :param matching: A previous matching {left_node: right_node} to start from, e.g. before
+    some add or dlt. Pairs that are not links anymore, or share a node, are dropped.
+    Defaults to None (empty matching).
+    :return: dict {left_node: right_node} with the pairs of the matching
+    """
+    adjacency = g.adjacency()
+    if left is None:
+        left, right = bipartition(g)
+    else:
+        left = set(left)
+        for node_k in left:
+            if node_k not in adjacency:
+                raise ValueError(f"Node key {node_k} does not exist")
+        right = adjacency.keys() - left
+    left_keys = list(left)
+    right_keys = list(right)
+    left_index = {node_k: i for i, node_k in enumerate(left_keys)}
+    right_index = {node_k: i for i, node_k in enumerate(right_keys)}
+    n_left = len(left_keys)
+
+    # Links as (left index, right index) pairs, then counted into CSR arrays
+    pairs = []
+    for from_node, node_links in adjacency.items():
+        if from_node in left_index:
+            i = left_index[from_node]
+            for to_node in node_links:
+                if to_node in left_index:
+                    raise ValueError(f"Link {(from_node, to_node)} joins two nodes of the left side")
+                pairs.append((i, right_index[to_node]))
+        else:
+            j = right_index[from_node]
+            for to_node in node_links:
+                if to_node not in left_index:
+                    raise ValueError(f"Link {(from_node, to_node)} joins two nodes of the right side")
+                pairs.append((left_index[to_node], j))
+    offsets = array('q', [0]) * (n_left + 1)
+    for i, _ in pairs:
+        offsets[i + 1] += 1
+    for i in range(n_left):
+        offsets[i + 1] += offsets[i]
+    targets = array('q', [0]) * len(pairs)
+    fill = array('q', offsets)
+    for i, j in pairs:
+        targets[fill[i]] = j
+        fill[i] += 1
+    del pairs, fill
+
+    match_left = array('q', [-1]) * n_left
+    match_right = array('q', [-1]) * len(right_keys)
+    for u, v in (matching or {}).items():
+        i, j = left_index.get(u), right_index.get(v)
+        if i is None or j is None or match_left[i] != -1 or match_right[j] != -1:
+            continue
+        if v in adjacency[u] or u in adjacency[v]:
+            match_left[i] = j
+            match_right[j] = i
+
+    dist = array('q', [0]) * n_left
+    while True:
+        # BFS from the free left nodes, layer by layer through the matched links
+        queue = []
+        for i in range(n_left):
+            if match_left[i] == -1:
+                dist[i] = 0
+                queue.append(i)
+            else:
+                dist[i] = _INF
+        found = False
+        for i in queue:
+            d = dist[i] + 1
+            for pos in range(offsets[i], offsets[i + 1]):
+                mate = match_right[targets[pos]]
+                if mate == -1:
+                    found = True
+                elif dist[mate] == _INF:
+                    dist[mate] = d
+                    if not found:
+                        queue.append(mate)
+        if not found:
+            break
+
+        # DFS from every free left node along the layers, next_link[i] is the next link of i to try
+        next_link = array('q', offsets)
+        for root in range(n_left):
+            if match_left[root] != -1:
+                continue
+            stack = [root]
+            while stack:
+                i = stack[-1]
+                end = offsets[i + 1]
+                while next_link[i] < end:
+                    mate = match_right[targets[next_link[i]]]
+                    if mate == -1:
+                        # Augmenting path: every node of the stack takes its current link
+                        for k in stack:
+                            j = targets[next_link[k]]
+                            match_left[k] = j
+                            match_right[j] = k
+                        stack = []
+                        break
+                    if dist[mate] == dist[i] + 1:
+                        stack.append(mate)
+                        break
+                    next_link[i] += 1
+                else:
+                    # Dead end: drop i from the layers and go back
+                    dist[i] = _INF
+                    stack.pop()
+                    if stack:
+                        next_link[stack[-1]] += 1
+
+    return {left_keys[i]: right_keys[j] for i, j in enumerate(match_left) if j != -1}
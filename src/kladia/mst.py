@@ -0,0 +1,114 @@
+"""
+This module contains the minimum spanning tree (MST) algorithms on graphs: Kruskal and Prim.
+author: @jocerfranquiz
+date: 2023-01-29
+version: 0.0.1
+
+Links are taken as undirected: a link (u, v) joins u and v both ways. If the graph is not
+connected the result is a minimum spanning forest, a tree per connected component.
+
+Weights are read from the link properties (the ``'weight'`` property by default), links
+without it weight 1.0. The result keeps the original links and their properties dicts,
+which are not copied.
+"""
+
+from heapq import heappush, heappop
+
+from .disjoint_set import DisjointSet
+from .graph import Graph
+
+
+def _weight_of(link_p: dict or None, weight: str) -> float:
+    """Get the weight of a link
+    :param link_p: Link properties
+    :param weight: Weight property
+    :return: Weight, 1.0 if the link has no weight
+    """
+    return 1.0 if link_p is None else float(link_p.get(weight, 1.0))
+
+
+def _result(g, links: list, as_graph: bool) -> Graph or list:
+    """Build the result of a spanning forest
+    :param g: Graph instance
+    :param links: list of (from_node, to_node, properties)
+    :param as_graph: Return a Graph instead of the list of links
+    :return: Graph instance or the list of links
+    """
+    if not as_graph:
+        return links
+    forest = Graph()
+    forest.add_many(nodes=g.adjacency().keys(), links=links)
+    return forest
+
+
+def kruskal(g, weight: str = 'weight', as_graph: bool = True) -> Graph or list:
+    """Minimum spanning forest with Kruskal's algorithm: the links are sorted by weight once
+    and joined with a disjoint-set, O(E log E).
+    :param g: Graph instance
+    :param weight: Link property with the weight. Defaults to 'weight'.
+    :param as_graph: Return a Graph, otherwise a list of links. Defaults to True.
+    :return: Graph with all the nodes and the links of the forest, or a list of
+    (from_node, to_node, properties) tuples
+    """
+    adjacency = g.adjacency()
+    index = {node_k: i for i, node_k in enumerate(adjacency)}
+    links = []
+    weights = []
+    for from_node, node_links in adjacency.items():
+        for to_node, link_p in node_links.items():
+            if from_node != to_node:
+                links.append((from_node, to_node, link_p))
+                weights.append(_weight_of(link_p, weight))
+
+    # Sort positions, not links, so that properties dicts are never compared
+    sets = DisjointSet(len(index))
+    forest = []
+    for pos in sorted(range(len(links)), key=weights.__getitem__):
+        from_node, to_node, _ = link = links[pos]
+        if sets.union(index[from_node], index[to_node]):
+            forest.append(link)
+            if sets.sets == 1:
+                break
+    return _result(g, forest, as_graph)
+
+
+def prim(g, weight: str = 'weight', as_graph: bool = True) -> Graph or list:
+    """Minimum spanning forest with Prim's algorithm: trees grow from a node taking the
+    lightest link out of them from a binary heap, O(E log V). It does not sort all the
+    links, which is better for dense graphs.
+    :param g: Graph instance
+    :param weight: Link property with the weight. Defaults to 'weight'.
+    :param as_graph: Return a Graph, otherwise a list of links. Defaults to True.
+    :return: Graph with all the nodes and the links of the forest, or a list of
+    (from_node, to_node, properties) tuples
+    """
+    adjacency = g.adjacency()
+    in_tree = set()
+    forest = []
+
+    def push(heap, node_k):
+        # Heap entries are (weight, node out of the tree, node in the tree, link goes out)
+        for to_node, link_p in adjacency[node_k].items():
+            if to_node not in in_tree:
+                heappush(heap, (_weight_of(link_p, weight), to_node, node_k, True))
+        for from_node in g.predecessors(node_k):
+            if from_node not in in_tree:
+                heappush(heap, (_weight_of(adjacency[from_node][node_k], weight), from_node, node_k, False))
+
+    for root in adjacency:
+        if root in in_tree:
+            continue
+        in_tree.add(root)
+        heap = []
+        push(heap, root)
+        while heap:
+            _, node_k, tree_node, out = heappop(heap)
+            if node_k in in_tree:
+                continue
+            in_tree.add(node_k)
+            if out:
+                forest.append((tree_node, node_k, adjacency[tree_node][node_k]))
+            else:
+                forest.append((node_k, tree_node, adjacency[node_k][tree_node]))
+            push(heap, node_k)
+    return _result(g, forest, as_graph)
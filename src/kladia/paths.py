@@ -0,0 +1,183 @@
+"""
+This module contains the shortest path algorithms on graphs: Dijkstra, bidirectional Dijkstra and A*.
+author: @jocerfranquiz
+date: 2023-01-15
+version: 0.0.1
+
+Link weights are read from the link properties (the ``'weight'`` property by default). Links
+without properties, or without the property, weight 1.0, like in Graph.to_matrix(). Weights
+must not be negative.
+
+The priority queue is a binary heap (heapq) with lazy deletion: a node is pushed again when
+its distance improves, and outdated entries are skipped when they are popped.
+"""
+
+from heapq import heappush, heappop
+from math import inf
+
+
+def _weight_of(link_p: dict or None, weight: str) -> float:
+    """Get the weight of a link
+    :param link_p: Link properties
+    :param weight: Weight property
+    :return: Weight, 1.0 if the link has no weight
+    """
+    if link_p is None:
+        return 1.0
+    w = float(link_p.get(weight, 1.0))
+    if w < 0:
+        raise ValueError(f"Weight {w} must not be negative")
+    return w
+
+
+def _check_nodes(adjacency, *node_keys: int) -> None:
+    """Check that the nodes exist
+    :param adjacency: Graph adjacency
+    :param node_keys: Node keys to check
+    """
+    for node_k in node_keys:
+        if node_k not in adjacency:
+            raise ValueError(f"Node key {node_k} does not exist")
+
+
+def _path(pred: dict, source: int, target: int) -> list:
+    """Build the path from source to target following the predecessors
+    :param pred: dict {node_key: previous node_key}
+    :param source: Source node key
+    :param target: Target node key
+    :return: list of node keys
+    """
+    path = [target]
+    while path[-1] != source:
+        path.append(pred[path[-1]])
+    path.reverse()
+    return path
+
+
+def dijkstra(g, source: int, weight: str = 'weight') -> (dict, dict):
+    """Single-source shortest paths
+    :param g: Graph instance
+    :param source: Source node key
+    :param weight: Link property with the weight. Defaults to 'weight'.
+    :return: tuple (distances, predecessors), dicts keyed by the reachable nodes. The
+    predecessor of a node is the previous node on its shortest path.
+    """
+    adjacency = g.adjacency()
+    _check_nodes(adjacency, source)
+    dist = {source: 0.0}
+    pred = {}
+    done = set()
+    heap = [(0.0, source)]
+    while heap:
+        d, node_k = heappop(heap)
+        if node_k in done:
+            continue
+        done.add(node_k)
+        for to_node, link_p in adjacency[node_k].items():
+            nd = d + _weight_of(link_p, weight)
+            if nd < dist.get(to_node, inf):
+                dist[to_node] = nd
+                pred[to_node] = node_k
+                heappush(heap, (nd, to_node))
+    return dist, pred
+
+
+def shortest_path(g, source: int, target: int, weight: str = 'weight') -> (float, list):
+    """Single-pair shortest path. The search stops as soon as target is reached.
+    :param g: Graph instance
+    :param source: Source node key
+    :param target: Target node key
+    :param weight: Link property with the weight. Defaults to 'weight'.
+    :return: tuple (distance, path). If there is no path: (inf, [])
+    """
+    return astar(g, source, target, None, weight)
+
+
+def astar(g, source: int, target: int, heuristic=None, weight: str = 'weight') -> (float, list):
+    """A* single-pair shortest path
+    :param g: Graph instance
+    :param source: Source node key
+    :param target: Target node key
+    :param heuristic: Function (node_key, target) -> estimated distance to target. It must not
+    overestimate the distance. Defaults to None (no estimate, this is Dijkstra with early exit).
+    :param weight: Link property with the weight. Defaults to 'weight'.
+    :return: tuple (distance, path). If there is no path: (inf, [])
+    """
+    adjacency = g.adjacency()
+    _check_nodes(adjacency, source, target)
+    dist = {source: 0.0}
+    pred = {}
+    done = set()
+    heap = [(heuristic(source, target) if heuristic else 0.0, source)]
+    while heap:
+        _, node_k = heappop(heap)
+        if node_k == target:
+            return dist[target], _path(pred, source, target)
+        if node_k in done:
+            continue
+        done.add(node_k)
+        d = dist[node_k]
+        for to_node, link_p in adjacency[node_k].items():
+            nd = d + _weight_of(link_p, weight)
+            if nd < dist.get(to_node, inf):
+                dist[to_node] = nd
+                pred[to_node] = node_k
+                # With an inconsistent heuristic a node can be improved after it is done
+                done.discard(to_node)
+                heappush(heap, (nd + heuristic(to_node, target) if heuristic else nd, to_node))
+    return inf, []
+
+
+def bidirectional_dijkstra(g, source: int, target: int, weight: str = 'weight') -> (float, list):
+    """Single-pair shortest path searching from both ends at once, forwards from source and
+    backwards (through the reverse index) from target, until the searches meet.
+    :param g: Graph instance
+    :param source: Source node key
+    :param target: Target node key
+    :param weight: Link property with the weight. Defaults to 'weight'.
+    :return: tuple (distance, path). If there is no path: (inf, [])
+    """
+    adjacency = g.adjacency()
+    _check_nodes(adjacency, source, target)
+    if source == target:
+        return 0.0, [source]
+
+    def forward(node_k):
+        return adjacency[node_k].items()
+
+    def backward(node_k):
+        return ((from_node, adjacency[from_node][node_k]) for from_node in g.predecessors(node_k))
+
+    dists = ({source: 0.0}, {target: 0.0})
+    preds = ({}, {})
+    done = (set(), set())
+    heaps = ([(0.0, source)], [(0.0, target)])
+    links = (forward, backward)
+    best = inf
+    meeting = None
+    while heaps[0] and heaps[1]:
+        # The searches can stop when no shorter path can go through the nodes left
+        if heaps[0][0][0] + heaps[1][0][0] >= best:
+            break
+        # Expand the side with the smaller frontier
+        side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+        dist, pred, heap, other = dists[side], preds[side], heaps[side], dists[1 - side]
+        d, node_k = heappop(heap)
+        if node_k in done[side]:
+            continue
+        done[side].add(node_k)
+        for to_node, link_p in links[side](node_k):
+            nd = d + _weight_of(link_p, weight)
+            if nd < dist.get(to_node, inf):
+                dist[to_node] = nd
+                pred[to_node] = node_k
+                heappush(heap, (nd, to_node))
+            if to_node in other and dist[to_node] + other[to_node] < best:
+                best = dist[to_node] + other[to_node]
+                meeting = to_node
+
+    if meeting is None:
+        return inf, []
+    path = _path(preds[0], source, meeting)
+    path.extend(reversed(_path(preds[1], target, meeting)[:-1]))
+    return best, path
@@ -0,0 +1,268 @@
+"""
+This module contains the transitive closure of graphs, as a reachability index.
+author: @jocerfranquiz
+date: 2023-01-22
+version: 0.0.1
+
+Nodes in the same strongly connected component reach the same nodes, so the closure is
+computed on the condensation of the graph: every component gets a bitset (a Python int) of
+the components it reaches, the OR of the bitsets of its successors, processed in reverse
+topological order. This is O(C * (C + L) / w) instead of the O(V^3) of Warshall's algorithm,
+for C components, L links between components and w bits per machine word.
+
+Bitsets are stored as bytes, so that testing a bit is O(1). The index takes C^2 / 8 bytes.
+save() writes it as JSON, with the bitsets in hexadecimal, so load() can not run code from
+an untrusted file.
+"""
+
+import json
+
+from .components import strongly_connected_components
+
+
+def _or(row: bytes, other: bytes) -> bytes:
+    """OR of two bitsets
+    :param row: Bitset
+    :param other: Bitset
+    :return: Bitset with the bits of both
+    """
+    value = int.from_bytes(row, 'little') | int.from_bytes(other, 'little')
+    return value.to_bytes((value.bit_length() + 7) // 8, 'little')
+
+
+def _has(row: bytes, bit: int) -> bool:
+    """Test a bit of a bitset
+    :param row: Bitset
+    :param bit: Bit position
+    :return: True if the bit is set
+    """
+    i = bit >> 3
+    return i < len(row) and (row[i] >> (bit & 7)) & 1 == 1
+
+
+class ReachabilityIndex:
+    """Transitive closure of a graph. Changes made through the index methods add and dlt
+    only recompute the components they affect. If the graph is changed elsewhere, the index
+    is rebuilt on the next query.
+    """
+
+    def __init__(self, g) -> None:
+        """Initialize the index of a graph
+        :param g: Graph instance
+        """
+        self.__graph = g
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Compute the whole index from the graph"""
+        adjacency = self.__graph.adjacency()
+        components = strongly_connected_components(self.__graph)
+        # Number the components in topological order: links go from lower to higher numbers
+        components.reverse()
+        component = {}
+        for i, members in enumerate(components):
+            for node_k in members:
+                component[node_k] = i
+
+        # Links between components, with the number of links between their nodes
+        succ = [{} for _ in components]
+        for node_k, links in adjacency.items():
+            i = component[node_k]
+            for to_node in links:
+                j = component[to_node]
+                if i != j:
+                    succ[i][j] = succ[i].get(j, 0) + 1
+
+        bits = [0] * len(components)
+        for i in range(len(components) - 1, -1, -1):
+            row = 1 << i
+            for j in succ[i]:
+                row |= bits[j]
+            bits[i] = row
+        self.__component = component
+        self.__succ = succ
+        self.__rows = [row.to_bytes((row.bit_length() + 7) // 8, 'little') for row in bits]
+        self.__version = self.__graph.version
+
+    def reachable(self, from_node: int, to_node: int) -> bool:
+        """Test if there is a path from from_node to to_node. Every node reaches itself.
+        :param from_node: Node key
+        :param to_node: Node key
+        :return: True if to_node can be reached from from_node
+        """
+        if self.__version != self.__graph.version:
+            self.rebuild()
+        component = self.__component
+        if from_node not in component:
+            raise ValueError(f"Node key {from_node} does not exist")
+        if to_node not in component:
+            raise ValueError(f"Node key {to_node} does not exist")
+        return _has(self.__rows[component[from_node]], component[to_node])
+
+    def reachable_from(self, node_k: int) -> set:
+        """Get all the nodes reachable from a node, itself included
+        :param node_k: Node key
+        :return: set of node keys
+        """
+        if self.__version != self.__graph.version:
+            self.rebuild()
+        if node_k not in self.__component:
+            raise ValueError(f"Node key {node_k} does not exist")
+        row = self.__rows[self.__component[node_k]]
+        return {key for key, i in self.__component.items() if _has(row, i)}
+
+    def add(self, obj: int or (int, int), properties: dict or None = None) -> None:
+        """Add node or link to the graph and update the index
+        :param obj: Node key (int) or link (int, int) to add
+        :param properties: Node or link's properties. Defaults to None.
+        """
+        stale = self.__version != self.__graph.version
+        self.__graph.add(obj, properties)
+        if stale:
+            self.rebuild()
+            return
+        if isinstance(obj, int):
+            component = self.__component
+            # A linked node missing from the graph dict has a component already
+            if obj not in component:
+                self.__new_component(obj)
+            # int keys of the properties are links
+            for to_node in properties or ():
+                if isinstance(to_node, int):
+                    if to_node not in component:
+                        self.__new_component(to_node)
+                    self.__add_link(component[obj], component[to_node])
+                    if self.__version == self.__graph.version:
+                        # The link closed a cycle, the index was rebuilt with all the links
+                        return
+        else:
+            from_node, to_node = obj
+            for node_k in obj:
+                if node_k not in self.__component:
+                    self.__new_component(node_k)
+            self.__add_link(self.__component[from_node], self.__component[to_node])
+        self.__version = self.__graph.version
+
+    def dlt(self, obj: int or (int, int)) -> None:
+        """Delete node or link from the graph and update the index
+        :param obj: Node key (int) or link (int, int) to delete
+        """
+        if self.__version != self.__graph.version:
+            self.__graph.dlt(obj)
+            self.rebuild()
+            return
+        if isinstance(obj, int):
+            if obj not in self.__component:
+                raise ValueError(f"Node key {obj} does not exist")
+            # Drop the links of the node first, then the node, which reaches nothing by then
+            links = [(obj, to_node) for to_node in self.__graph.adjacency()[obj] if to_node != obj]
+            links += [(from_node, obj) for from_node in self.__graph.predecessors(obj) if from_node != obj]
+            for link in links:
+                self.dlt(link)
+            if obj in self.__graph.adjacency()[obj]:
+                self.__graph.dlt((obj, obj))
+            self.__graph.dlt(obj)
+            self.__rows[self.__component.pop(obj)] = b''
+        else:
+            from_node, to_node = obj
+            self.__graph.dlt(obj)
+            i, j = self.__component[from_node], self.__component[to_node]
+            if from_node == to_node:
+                # Every node reaches itself, with or without a loop
+                pass
+            elif i == j:
+                # A link inside a component could split it
+                self.rebuild()
+                return
+            else:
+                self.__succ[i][j] -= 1
+                if self.__succ[i][j] == 0:
+                    del self.__succ[i][j]
+                    self.__recompute([a for a, row in enumerate(self.__rows) if _has(row, i)])
+        self.__version = self.__graph.version
+
+    def __new_component(self, node_k: int) -> None:
+        """Give a component to a new node
+        :param node_k: Node key
+        """
+        i = len(self.__rows)
+        self.__component[node_k] = i
+        self.__succ.append({})
+        self.__rows.append((1 << i).to_bytes((i >> 3) + 1, 'little'))
+
+    def __add_link(self, i: int, j: int) -> None:
+        """Update the index with a link between components
+        :param i: From component
+        :param j: To component
+        """
+        if i == j:
+            return
+        self.__succ[i][j] = self.__succ[i].get(j, 0) + 1
+        rows = self.__rows
+        if _has(rows[i], j):
+            return
+        if _has(rows[j], i):
+            # The link closes a cycle, components merge
+            self.rebuild()
+            return
+        # Every component that reaches i now reaches what j reaches
+        for a in range(len(rows)):
+            if _has(rows[a], i):
+                rows[a] = _or(rows[a], rows[j])
+
+    def __recompute(self, affected: list) -> None:
+        """Compute again the bitsets of some components, after their successors changed
+        :param affected: Components to compute, with all the components that reach them
+        """
+        affected = set(affected)
+        rows, succ = self.__rows, self.__succ
+        new_rows = {}
+        for root in affected:
+            if root in new_rows:
+                continue
+            # Iterative post-order walk: a component is done after its affected successors
+            stack = [(root, iter(succ[root]))]
+            while stack:
+                a, successors = stack[-1]
+                for b in successors:
+                    if b in affected and b not in new_rows:
+                        stack.append((b, iter(succ[b])))
+                        break
+                else:
+                    stack.pop()
+                    row = 1 << a
+                    for b in succ[a]:
+                        row |= new_rows[b] if b in new_rows else int.from_bytes(rows[b], 'little')
+                    new_rows[a] = row
+        for a, row in new_rows.items():
+            rows[a] = row.to_bytes((row.bit_length() + 7) // 8, 'little')
+
+    def save(self, path: str) -> None:
+        """Save the index to a file
+        :param path: File path
+        """
+        with open(path, 'w') as f:
+            # JSON object keys are strings, the dicts are saved as lists of pairs
+            json.dump({'nodes': len(self.__graph.adjacency()), 'component': list(self.__component.items()),
+                       'succ': [list(links.items()) for links in self.__succ],
+                       'rows': [row.hex() for row in self.__rows]}, f)
+
+    @classmethod
+    def load(cls, path: str, g) -> object:
+        """Load an index saved with save(). The graph must be the one the index was built for,
+        only its number of nodes is checked.
+        :param path: File path
+        :param g: Graph instance
+        :return: ReachabilityIndex instance
+        """
+        with open(path) as f:
+            data = json.load(f)
+        if data['nodes'] != len(g.adjacency()):
+            raise ValueError("The index does not match the graph")
+        index = cls.__new__(cls)
+        index.__graph = g
+        index.__component = dict(data['component'])
+        index.__succ = [dict(links) for links in data['succ']]
+        index.__rows = [bytes.fromhex(row) for row in data['rows']]
+        index.__version = g.version
+        return index
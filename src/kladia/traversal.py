@@ -0,0 +1,140 @@
+"""
+This module contains the search algorithms on graphs: breadth-first search (BFS) and depth-first search (DFS).
+author: @jocerfranquiz
+date: 2023-01-15
+version: 0.0.1
+
+Both searches are iterative (there is no recursion limit) and lazy: they are generators, so a
+search stops as soon as the caller stops iterating (e.g. with ``break``).
+"""
+
+
+def _neighbours(g, reverse: bool):
+    """Get the function that returns the neighbours of a node. The links are read from the
+    graph as the search goes, no adjacency dict is built for the forward direction.
+    :param g: Graph instance
+    :param reverse: Follow the links backwards. The reverse links are collected once per
+    search, in O(V + E), instead of a scan of the graph per node.
+    :return: function node_key -> iterable of node keys
+    """
+    if not reverse:
+        return g.successors
+    preds = {}
+    for from_node, to_node, _ in g.iter_links():
+        if to_node in preds:
+            preds[to_node].append(from_node)
+        else:
+            preds[to_node] = [from_node]
+    return lambda node_k: preds.get(node_k, ())
+
+
+def _sources(g, sources: int or iter) -> list:
+    """Check the start nodes of a search
+    :param g: Graph instance
+    :param sources: Node key or iterable of node keys
+    :return: list of node keys
+    """
+    sources = [sources] if isinstance(sources, int) else list(sources)
+    for node_k in sources:
+        # Raises ValueError if the node does not exist
+        g.out_degree(node_k)
+    return sources
+
+
+def _visited(visited: str):
+    """Get the functions to test and mark visited nodes
+    :param visited: 'set' for a set of keys, or 'bitmap' for a bytearray with one flag per
+    key, which is smaller and faster when keys are dense ints from 0. The bitmap grows with
+    the largest key visited.
+    :return: tuple of functions (is_visited, mark)
+    """
+    if visited == 'set':
+        seen = set()
+        return seen.__contains__, seen.add
+    if visited == 'bitmap':
+        flags = bytearray()
+
+        def is_visited(node_k):
+            return 0 <= node_k < len(flags) and flags[node_k]
+
+        def mark(node_k):
+            if node_k < 0:
+                raise ValueError("The bitmap needs node keys greater than or equal to 0")
+            if node_k >= len(flags):
+                flags.extend(bytes(max(node_k + 1, 2 * len(flags)) - len(flags)))
+            flags[node_k] = 1
+
+        return is_visited, mark
+    raise ValueError(f"Visited {visited} must be 'set' or 'bitmap'")
+
+
+def bfs(g, sources: int or iter, depth_limit: int = None, reverse: bool = False,
+        edges: bool = False, visited: str = 'set') -> iter:
+    """Breadth-first search. Nodes are visited level by level, a level is a plain list.
+    :param g: Graph instance
+    :param sources: Node key or iterable of node keys to start from
+    :param depth_limit: Maximum number of links from the sources. Defaults to None (no limit).
+    :param reverse: Follow the links backwards. Defaults to False.
+    :param edges: Yield the links of the search tree instead of the nodes. Defaults to False.
+    :param visited: 'set' or 'bitmap', see _visited(). Defaults to 'set'.
+    :return: generator of node keys, or (from_node, to_node) tuples if edges is True
+    """
+    neighbours = _neighbours(g, reverse)
+    is_visited, mark = _visited(visited)
+    frontier = []
+    for node_k in _sources(g, sources):
+        if not is_visited(node_k):
+            mark(node_k)
+            frontier.append(node_k)
+            if not edges:
+                yield node_k
+
+    depth = 0
+    while frontier and (depth_limit is None or depth < depth_limit):
+        next_frontier = []
+        for node_k in frontier:
+            for to_node in neighbours(node_k):
+                if not is_visited(to_node):
+                    mark(to_node)
+                    next_frontier.append(to_node)
+                    yield (node_k, to_node) if edges else to_node
+        frontier = next_frontier
+        depth += 1
+
+
+def dfs(g, sources: int or iter, depth_limit: int = None, reverse: bool = False,
+        edges: bool = False, visited: str = 'set') -> iter:
+    """Depth-first search, in preorder. The path from the source is a stack of iterators.
+    :param g: Graph instance
+    :param sources: Node key or iterable of node keys to start from, in order
+    :param depth_limit: Maximum number of links from the sources. Defaults to None (no limit).
+    :param reverse: Follow the links backwards. Defaults to False.
+    :param edges: Yield the links of the search tree instead of the nodes. Defaults to False.
+    :param visited: 'set' or 'bitmap', see bfs(). Defaults to 'set'.
+    :return: generator of node keys, or (from_node, to_node) tuples if edges is True
+    """
+    neighbours = _neighbours(g, reverse)
+    is_visited, mark = _visited(visited)
+    for source in _sources(g, sources):
+        if is_visited(source):
+            continue
+        mark(source)
+        if not edges:
+            yield source
+        if depth_limit is not None and depth_limit <= 0:
+            continue
+        path = [source]
+        stack = [iter(neighbours(source))]
+        while stack:
+            for to_node in stack[-1]:
+                if not is_visited(to_node):
+                    mark(to_node)
+                    yield (path[-1], to_node) if edges else to_node
+                    if depth_limit is None or len(stack) < depth_limit:
+                        path.append(to_node)
+                        stack.append(iter(neighbours(to_node)))
+                    break
+            else:
+                # All the neighbours of the node were visited, go back
+                stack.pop()
+                path.pop()
@@ -7,34 +7,118 @@ version: 0.0.1
 
 import sys
 import functools
+import threading
+from collections import OrderedDict, namedtuple
 
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
 
-def memoize(func):
+
+class _Ref:
+    """Key of an object by identity. The key holds the object, so its id can not be reused
+    while the key is in a cache."""
+
+    __slots__ = ('obj',)
+
+    def __init__(self, obj) -> None:
+        self.obj = obj
+
+    def __hash__(self) -> int:
+        return id(self.obj)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, _Ref) and self.obj is other.obj
+
+
+def _key_part(value):
+    """Get the cache key of an argument
+    :param value: Argument
+    :return: The argument itself if it is hashable, or (identity, version) for objects with
+    an int version attribute, like Graph instances
+    :raises TypeError: if the argument can not be a key
+    """
+    version = getattr(value, 'version', None)
+    if isinstance(version, int):
+        return _Ref(value), version
+    hash(value)
+    return value
+
+
+# Separates the positional and the keyword arguments in the keys of memoize
+_KWARGS_MARK = object()
+
+
+def memoize(func=None, *, maxsize: int or None = 128):
     """Decorator that caches a function's return value each time it is called.
     If called later with the same arguments, the cached value is returned (not
-    reevaluated).
+    reevaluated). The least recently used values are dropped when the cache is full.
+    Usable as @memoize or @memoize(maxsize=...).
 
-    Source: https://wiki.python.org/moin/PythonDecoratorLibrary#Memoize
+    Arguments are the keys of the cache: hashable arguments as they are, objects with a
+    version (e.g. Graph instances) by identity and version, so a changed graph is a new key.
+    Calls with other arguments (e.g. a dict) are not cached. The cache is thread safe, the
+    function itself runs outside the lock.
+
+    The wrapped function has cache_info() and cache_clear().
+    :param func: Function to wrap
+    :param maxsize: Maximum number of values, None for no limit. Defaults to 128.
     """
-    cache = func.cache = {}
+    if func is None:
+        return functools.partial(memoize, maxsize=maxsize)
+    if maxsize is not None and maxsize < 0:
+        raise ValueError(f"Maximum size {maxsize} must not be negative")
+    cache = OrderedDict()
+    lock = threading.Lock()
+    stats = [0, 0]  # hits, misses
 
     @functools.wraps(func)
     def memoizer(*args, **kwargs):
-        key = str(args) + str(kwargs)
-        if key not in cache:
-            cache[key] = func(*args, **kwargs)
-        return cache[key]
+        try:
+            key = tuple(map(_key_part, args))
+            if kwargs:
+                # The marker keeps f(('x', 1)) and f(x=1) apart
+                key += (_KWARGS_MARK,) + tuple((name, _key_part(value)) for name, value in kwargs.items())
+        except TypeError:
+            with lock:
+                stats[1] += 1
+            return func(*args, **kwargs)
+        with lock:
+            if key in cache:
+                stats[0] += 1
+                cache.move_to_end(key)
+                return cache[key]
+            stats[1] += 1
+        value = func(*args, **kwargs)
+        if maxsize != 0:
+            with lock:
+                cache[key] = value
+                cache.move_to_end(key)
+                if maxsize is not None and len(cache) > maxsize:
+                    cache.popitem(last=False)
+        return value
+
+    def cache_info() -> CacheInfo:
+        """Get the cache statistics"""
+        with lock:
+            return CacheInfo(stats[0], stats[1], maxsize, len(cache))
 
+    def cache_clear() -> None:
+        """Empty the cache and reset its statistics"""
+        with lock:
+            cache.clear()
+            stats[0] = stats[1] = 0
+
+    memoizer.cache_info = cache_info
+    memoizer.cache_clear = cache_clear
     return memoizer
 
 
-@memoize
 def dict_nested_order(d):
     """Calculates how many nested levels a dictionary has.
 dict_nested_order({}) -> 0
 dict_nested_order({'a': 1}) -> 1
 dict_nested_order({'a': {'b': {'c': 1}}}) -> 3
 dict_nested_order({'a': {'b': {'c': 1}}, 'd': 2}) -> 3
+    The walk is iterative, a stack of iterators over the values of the nested dictionaries.
     :param d: dictionary
     :return: number of nested levels
     """
@@ -42,50 +126,62 @@ dict_nested_order({'a': {'b': {'c': 1}}, 'd': 2}) -> 3
         raise TypeError('dict_nested_order function only accepts dictionaries')
     if not d:  # empty dictionary
         return 0
-    max_order = 0
-    for value in d.values():
-        if isinstance(value, dict):
-            order = dict_nested_order(value)
-            if order > max_order:
-                max_order = order
-            else:
-                continue
-        elif value is None:
-            continue
-    return max_order + 1
+    max_order = 1
+    # ids of the dictionaries on the path, to stop on self-referential dictionaries
+    path = [id(d)]
+    on_path = {id(d)}
+    stack = [iter(d.values())]
+    while stack:
+        for value in stack[-1]:
+            # empty dictionaries add no level
+            if isinstance(value, dict) and value:
+                if id(value) in on_path:
+                    raise ValueError('dict_nested_order function does not accept self-referential dictionaries')
+                path.append(id(value))
+                on_path.add(id(value))
+                stack.append(iter(value.values()))
+                if len(stack) > max_order:
+                    max_order = len(stack)
+                break
+        else:
+            stack.pop()
+            on_path.discard(path.pop())
+    return max_order
 
 
 def get_size(obj, seen=None):
-    """Recursively finds size of objects
+    """Finds size of objects, with all the objects they reference
 Source: https://goshippo.com/blog/measure-real-size-any-python-object/ The
 get_size function has a time complexity of O(n), where n is the number of nodes and links in the graph. This is
 because the function traverses the entire graph, visiting each node and link once.
 
-The space complexity of the get_size function is also O(n), because the function stores a list of seen objects in the
+The space complexity of the get_size function is also O(n), because the function stores a set of seen objects in the
 seen parameter, which can grow up to the size of the graph.
 
-In general, the time and space complexity of the get_size function is determined by the size of the graph,
-rather than the number of attributes associated with the nodes or links. This is because the function only needs to
-visit each node and link once, regardless of how many attributes they have.
+The walk is iterative, with a stack of objects to visit, so deeply nested objects do not hit the recursion limit.
+Objects are counted once, even if they are referenced many times or reference themselves.
 
     :param obj: object to get size of
-    :param seen: list of seen objects (optional). Defaults to None.
+    :param seen: set of ids of objects already counted (optional), they are not counted again. Defaults to None.
     :return: size of object
     """
-    size = sys.getsizeof(obj)
     if seen is None:
         seen = set()
-    obj_id = id(obj)
-    if obj_id in seen:
-        return 0
-    # Important mark as seen *before* entering recursion to gracefully handle
-    # self-referential objects
-    seen.add(obj_id)
-    if isinstance(obj, dict):
-        size += sum([get_size(v, seen) for v in obj.values()])
-        size += sum([get_size(k, seen) for k in obj.keys()])
-    elif hasattr(obj, '__dict__'):
-        size += get_size(obj.__dict__, seen)
-    elif hasattr(obj, '__iter__') and not isinstance(obj, (str, bytes, bytearray)):
-        size += sum([get_size(i, seen) for i in obj])
+    getsizeof = sys.getsizeof
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        obj_id = id(obj)
+        if obj_id in seen:
+            continue
+        seen.add(obj_id)
+        size += getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.values())
+            stack.extend(obj.keys())
+        elif hasattr(obj, '__dict__'):
+            stack.append(obj.__dict__)
+        elif hasattr(obj, '__iter__') and not isinstance(obj, (str, bytes, bytearray)):
+            stack.extend(obj)
     return size
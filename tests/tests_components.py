@@ -0,0 +1,49 @@
+"""
+Tests for the components module.
+author: @jocerfranquiz
+date: 2023-01-22
+version: 0.0.1
+"""
+
+import pytest
+from src.kladia.graph import graph
+from src.kladia.components import strongly_connected_components, topological_sort, condensation, CycleError
+
+
+# Test SCC, topological sort and condensation
+def test_components():
+    g = graph({'graph': {0: {1: None}, 1: {2: None}, 2: {0: None, 3: None}, 3: {4: None}, 4: {3: None}, 5: None}})
+    components = strongly_connected_components(g)
+    assert sorted(sorted(c) for c in components) == [[0, 1, 2], [3, 4], [5]]
+    assert components.index([4, 3]) < components.index([2, 1, 0])
+
+    dag, component = condensation(g)
+    assert component[0] == component[2] != component[3]
+    assert dag.links().keys() == {(component[0], component[3])}
+    assert topological_sort(dag) == sorted(dag.nodes())
+    assert sorted(dag.nodes()[component[3]]['members']) == [3, 4]
+
+    with pytest.raises(CycleError) as error:
+        topological_sort(g)
+    cycle = error.value.cycle
+    assert sorted(cycle) in ([0, 1, 2], [3, 4])
+    assert all(cycle[(i + 1) % len(cycle)] in g.adjacency()[node_k] for i, node_k in enumerate(cycle))
+
+    g = graph({'graph': {3: {1: None}, 2: {1: None}, 1: {0: None}, 0: None}})
+    assert topological_sort(g) == [3, 2, 1, 0]
+
+
+# Test graphs deeper than the recursion limit
+def test_components_deep():
+    n = 50000
+    g = graph()
+    g.add_many(links=[(i, i + 1) for i in range(n)] + [(n, 0)])
+    assert len(strongly_connected_components(g)) == 1
+    g.dlt((n, 0))
+    assert len(strongly_connected_components(g)) == n + 1
+    assert topological_sort(g) == list(range(n + 1))
+
+
+# Run the tests script
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,89 @@
+"""
+Tests for the concurrent module.
+author: @jocerfranquiz
+date: 2023-03-05
+version: 0.0.1
+"""
+
+import gc
+import threading
+
+import pytest
+from src.kladia.concurrent import ConcurrentGraph
+from src.kladia.graph import graph
+
+
+# Test snapshot isolation, transactions and reclaimed versions
+def test_concurrent_graph():
+    g = graph({'graph': {0: {1: {'w': 1}}, 1: None}})
+    cg = ConcurrentGraph(g)
+    g.add(5)
+    old = cg.snapshot()
+    assert old.version == 0 and old.nodes().keys() == {0, 1}
+    with cg.transaction() as tx:
+        tx.add(2)
+        tx.add((1, 2), {'w': 2})
+        tx.dlt((0, 1))
+        assert len(tx.journal) == 3
+    assert cg.version == 1
+    with cg.snapshot() as new:
+        assert new.links() == {(1, 2): {'w': 2}} and new.predecessors(2) == {1}
+    assert old.links() == {(0, 1): {'w': 1}} and g.links().keys() == {(0, 1)}
+    with pytest.raises(AttributeError):
+        old.add(3)
+
+    # A failing transaction publishes nothing
+    with pytest.raises(ValueError):
+        with cg.transaction() as tx:
+            tx.add(3)
+            tx.add(3)
+    with pytest.raises(RuntimeError):
+        with cg.transaction() as tx:
+            tx.add(4)
+            raise RuntimeError
+    assert cg.version == 1 and cg.snapshot().nodes().keys() == {0, 1, 2}
+    with pytest.raises(ValueError):
+        cg.commit([('from_matrix', ([[0]],), {})])
+    assert cg.commit([]) == 1
+
+    # Versions are reclaimed when their snapshots are closed
+    assert cg.live_versions() == [0, 1]
+    old.close()
+    gc.collect()
+    assert cg.live_versions() == [1]
+    with pytest.raises(ValueError):
+        old.nodes()
+
+
+# Test readers iterating while a writer publishes versions
+def test_concurrent_readers():
+    cg = ConcurrentGraph(graph({'graph': {0: None}}))
+    done = threading.Event()
+    errors = []
+
+    def read():
+        while not done.is_set():
+            with cg.snapshot() as s:
+                # Every version is a path 0 -> 1 -> ... -> version
+                links = dict(s.links())
+                try:
+                    assert len(links) == s.version and all((i, i + 1) in links for i in range(s.version))
+                    assert sum(1 for _ in s.iter_nodes()) == s.version + 1
+                except AssertionError as e:
+                    errors.append(e)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for i in range(200):
+        with cg.transaction() as tx:
+            tx.add((i, i + 1))
+    done.set()
+    for reader in readers:
+        reader.join()
+    assert not errors and cg.version == 200
+
+
+# Run the tests script
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,79 @@
+"""
+Tests for the cut module.
+author: @jocerfranquiz
+date: 2023-02-05
+version: 0.0.1
+"""
+
+import random
+
+import pytest
+from src.kladia.graph import graph
+from src.kladia.cut import _contract, _edge_array, min_cut
+
+
+# Test the minimum cut of two cliques joined by two links
+def test_min_cut():
+    links = {(i, j): None for i in range(8) for j in range(i + 1, 8)}
+    links.update({(i + 8, j + 8): None for i, j in list(links)})
+    links.update({(0, 8): None, (15, 7): None})
+    g = graph()
+    g.add_many(links=links)
+    cut, (side, other_side) = min_cut(g, workers=1)
+    assert cut == 2
+    assert {frozenset(side), frozenset(other_side)} == {frozenset(range(8)), frozenset(range(8, 16))}
+    assert min_cut(g, trials=4, workers=2, seed=7) == min_cut(g, trials=4, workers=1, seed=7)
+
+    g.add(16)
+    assert min_cut(g, workers=1)[0] == 0
+    with pytest.raises(ValueError):
+        min_cut(graph({'graph': {0: None}}))
+
+
+# Test that the cut found matches its sides on random graphs
+def test_min_cut_random():
+    rnd = random.Random(11)
+    for _ in range(10):
+        g = graph()
+        g.add_many(nodes=range(12), links={(rnd.randrange(12), rnd.randrange(12)): None for _ in range(40)})
+        cut, (side, other_side) = min_cut(g, workers=1, seed=rnd.randrange(100))
+        assert side and other_side and side | other_side == set(range(12))
+        assert cut == sum(1 for u, v in g.links() if (u in side) != (v in side))
+        # Small graphs are solved exactly
+        assert cut == min(sum(1 for u, v in g.links() if (mask >> u ^ mask >> v) & 1) for mask in range(1, 1 << 11))
+
+
+# Test Karger-Stein on graphs larger than the exact base case
+def test_min_cut_large():
+    links = {(i, j): None for i in range(40) for j in range(i + 1, 40) if (i * 7 + j) % 3}
+    links.update({(i + 40, j + 40): None for i, j in list(links)})
+    links.update({(0, 40): None, (79, 39): None})
+    g = graph()
+    g.add_many(links=links)
+    cut, (side, other_side) = min_cut(g, workers=1)
+    assert cut == 2
+    assert {frozenset(side), frozenset(other_side)} == {frozenset(range(40)), frozenset(range(40, 80))}
+
+
+# Test that a contraction merges the parallel links: k super nodes keep at most k(k-1)/2 links,
+# so a trial stays O(n^2 log n) however many links the graph has
+def test_contract():
+    rnd = random.Random(0)
+    n = 200
+    g = graph()
+    g.add_many(nodes=range(n), links={(rnd.randrange(n), rnd.randrange(n)): None for _ in range(20000)})
+    keys, edges = _edge_array(g)
+    triples = list(zip(edges[0::3], edges[1::3], edges[2::3]))
+    for t in (150, 40, 10, 2):
+        labels, k, sub_edges = _contract(edges, n, t, random.Random(t))
+        assert k == t and sorted(set(labels)) == list(range(k))
+        pairs = list(zip(sub_edges[0::3], sub_edges[1::3]))
+        assert len(pairs) <= k * (k - 1) // 2 and len(set(pairs)) == len(pairs)
+        assert all(a < b for a, b in pairs)
+        # The weight of the links between super nodes is kept
+        assert sum(sub_edges[2::3]) == sum(w for u, v, w in triples if labels[u] != labels[v])
+
+
+# Run the tests script
+if __name__ == '__main__':
+    pytest.main()
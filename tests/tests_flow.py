@@ -0,0 +1,52 @@
+"""
+Tests for the flow module.
+author: @jocerfranquiz
+date: 2023-02-05
+version: 0.0.1
+"""
+
+import random
+
+import pytest
+from src.kladia.graph import graph
+from src.kladia.flow import max_flow
+
+
+# Test the maximum flow and the minimum cut on a small network
+def test_max_flow():
+    capacity = {'capacity': 10}
+    g = graph({'graph': {0: {1: capacity, 2: {'capacity': 5}}, 1: {2: {'capacity': 15}, 3: {'capacity': 4}},
+                         2: {3: {'capacity': 10}}, 3: None, 4: {3: None}}})
+    value, flows, (source_side, sink_side) = max_flow(g, 0, 3)
+    assert value == 14
+    assert sum(flow for (u, v), flow in flows.items() if v == 3) == 14
+    assert all(0 <= flow <= g.links()[link].get('capacity', 1.0) for link, flow in flows.items() if g.links()[link])
+    assert sum(g.links()[(u, v)]['capacity'] for u, v in g.links() if u in source_side and v in sink_side) == 14
+    assert 0 in source_side and 3 in sink_side and 4 in sink_side
+    assert capacity == {'capacity': 10}
+    assert max_flow(g, 3, 0)[0] == 0
+    assert max_flow(g, 4, 3)[0] == 1
+    with pytest.raises(ValueError):
+        max_flow(g, 0, 0)
+    with pytest.raises(ValueError):
+        max_flow(g, 0, 9)
+
+
+# Test that the flow is conserved and matches the cut on random networks
+def test_max_flow_random():
+    rnd = random.Random(5)
+    for _ in range(20):
+        g = graph()
+        g.add_many(nodes=range(20), links={(rnd.randrange(20), rnd.randrange(20)): {'cap': rnd.randrange(1, 9)}
+                                           for _ in range(60)})
+        value, flows, (source_side, sink_side) = max_flow(g, 0, 19, capacity='cap')
+        for node_k in range(1, 19):
+            assert sum(f for (u, v), f in flows.items() if v == node_k) == \
+                   sum(f for (u, v), f in flows.items() if u == node_k)
+        cut = sum(p['cap'] for (u, v), p in g.links().items() if u in source_side and v in sink_side)
+        assert cut == value
+
+
+# Run the tests script
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,136 @@
+"""
+Tests for the frozen module.
+author: @jocerfranquiz
+date: 2023-01-08
+version: 0.0.1
+"""
+
+import pytest
+from src.kladia.graph import graph
+from src.kladia.frozen import FrozenGraph, _HEADER
+from src.kladia.utils import get_size
+
+
+# Test FrozenGraph class
+def test_frozen_graph():
+    g = graph({'graph': {0: {1: {'weight': 2.5}, 'color': 'red'}, 1: {2: None}, 2: None, 3: {}}})
+    f = g.freeze()
+    assert list(f.keys) == [0, 1, 2, 3]
+    assert list(f.offsets) == [0, 1, 2, 2, 2]
+    assert list(f.weights) == [2.5, 1.0]
+    assert f.nodes() == {0: {'color': 'red'}, 1: None, 2: None, 3: None}
+    assert f.links() == g.links()
+    assert list(f.successors(1)) == [2]
+    assert f.out_degree(2) == 0
+    assert f.to_matrix() == [[0, 2.5, 0, 0], [0, 0, 1, 0], [0, 0, 0, 0], [0, 0, 0, 0]]
+    assert f.to_dict() == g.to_dict()
+
+    # Sparse keys are searched
+    f = graph({'graph': {10: {-5: None}, 7: None}}).freeze(weight=None, properties=False)
+    assert list(f.keys) == [-5, 7, 10]
+    assert f.weights is None
+    assert list(f.successors(10)) == [-5]
+    assert f.to_dict() == {'graph': {-5: None, 7: None, 10: {-5: None}}}
+    with pytest.raises(ValueError):
+        f.index(8)
+
+
+# Test that the link properties are copied and the weight alone is not kept as a dict
+def test_frozen_graph_properties():
+    weighted = {(i, i + 1): {'weight': float(i)} for i in range(1000)}
+    g = graph()
+    g.add_many(links=weighted)
+    f = g.freeze()
+    assert f.links() == weighted and f.to_dict() == g.to_dict()
+    assert get_size(f) < 1.1 * get_size(g.freeze(properties=False))
+    g.add_many(links={(9, 0): None, (9, 1): {'weight': 1, 'label': 'a'}})
+    f = g.freeze()
+    assert f.links() == g.links()
+    g.links()[(9, 1)]['label'] = 'b'
+    assert f.links()[(9, 1)] == {'weight': 1, 'label': 'a'}
+    assert g.freeze(weight=None).links() == g.links()
+
+    # int weights keep their dict, they are not read back as floats
+    g = graph({'graph': {0: {1: {'weight': 3}, 2: {'weight': 2 ** 60 + 1}, 3: {'weight': 0.5}}, 1: None, 2: None, 3: None}})
+    f = g.freeze()
+    assert f.to_dict() == g.to_dict() and type(f.links()[(0, 1)]['weight']) is int
+    assert list(f.weights) == [3.0, float(2 ** 60 + 1), 0.5]
+
+
+# Test the NumPy backend
+def test_frozen_graph_numpy():
+    np = pytest.importorskip('numpy')
+    f = graph({'graph': {0: {1: {'weight': 2.0}}, 1: None}}).freeze(backend='numpy')
+    assert isinstance(f.targets, np.ndarray)
+    assert f.links() == {(0, 1): {'weight': 2.0}}
+    assert f.to_matrix() == [[0.0, 2.0], [0.0, 0.0]]
+
+
+# Test the binary file, mapped with mmap
+def test_frozen_graph_file(tmp_path):
+    data = {'graph': {0: {1: {'weight': 2.5}, 'color': 'red'}, 1: {3: None}, 3: {}, 7: None, 'name': 'g'}}
+    g = graph(data)
+    path = tmp_path / 'graph.kfg'
+    g.freeze().save(path)
+    f = FrozenGraph.open(path)
+    assert isinstance(f.targets, memoryview) and f.targets.readonly
+    assert list(f.keys) == [0, 1, 3, 7] and list(f.weights) == [2.5, 1.0]
+    assert list(f.successors(1)) == [3] and f.index(7) == 3
+    assert graph(f.to_dict()).to_dict() == g.to_dict() == data
+    assert f.attributes == {'name': 'g'}
+
+    # Without weights or properties, and empty
+    graph({'graph': {0: {1: None}}}).freeze(weight=None, properties=False).save(path)
+    f = FrozenGraph.open(path)
+    assert f.weights is None and f.to_dict() == {'graph': {0: {1: None}, 1: None}}
+    graph().freeze().save(path)
+    assert FrozenGraph.open(path).to_dict() == {'graph': None}
+
+    path.write_bytes(b'not a graph')
+    with pytest.raises(ValueError):
+        FrozenGraph.open(path)
+
+
+# Test the properties are JSON, the sections are checked and the file is closed
+def test_frozen_graph_file_safety(tmp_path):
+    path = tmp_path / 'graph.kfg'
+    g = graph({'graph': {0: {1: {'w': 1}, 'tags': ['a']}, 1: None, 'name': 'g'}})
+    g.freeze().save(path)
+    assert b'"tags": ["a"]' in path.read_bytes()
+    with FrozenGraph.open(path) as f:
+        assert f.to_dict() == g.to_dict()
+        targets = f.targets
+    assert f.targets is None
+    with pytest.raises(ValueError):
+        targets[0]
+    # Values JSON would not give back unchanged are not saved
+    for node_p in ({'color': {1, 2}}, {'meta': {1: 'a'}}, {'tag': (1, 2)}, {'deep': [{'tag': (1,)}]}):
+        with pytest.raises(TypeError):
+            graph({'graph': {0: node_p}}).freeze().save(tmp_path / 'bad.kfg')
+    with pytest.raises(TypeError):
+        graph({'graph': {0: {1: {'pair': (0, 1)}}}}).freeze().save(tmp_path / 'bad.kfg')
+    data = {'graph': {0: {1: {'w': [1.5, None]}, 'meta': {'a': [True, {'b': 2}]}, 'n': 2 ** 70}, 1: None}}
+    graph(data).freeze(weight=None).save(path)
+    with FrozenGraph.open(path) as f:
+        assert f.to_dict() == data
+    g = graph({'graph': {0: {1: {'weight': 3}, 2: {'weight': 2 ** 60 + 1}}, 1: None, 2: None}})
+    g.freeze().save(path)
+    with FrozenGraph.open(path) as f:
+        assert f.to_dict() == g.to_dict()
+
+    # Sections out of the file, or overlapping
+    data = path.read_bytes()
+    path.write_bytes(data[:-1])
+    with pytest.raises(ValueError):
+        FrozenGraph.open(path)
+    fields = list(_HEADER.unpack_from(data))
+    for i, value in ((3, 10 ** 12), (4, -1), (5, 0), (7, fields[6] - 8)):
+        header = _HEADER.pack(*fields[:i], value, *fields[i + 1:])
+        path.write_bytes(header + data[_HEADER.size:])
+        with pytest.raises(ValueError):
+            FrozenGraph.open(path)
+
+
+# Run the tests script
+if __name__ == '__main__':
+    pytest.main()
@@ -6,7 +6,8 @@ version: 0.0.1
 """
 
 import pytest
-from src.kladia.graph import graph, from_nodes_and_links
+import src.kladia.graph as graph_module
+from src.kladia.graph import Graph, graph, from_nodes_and_links, union_all
 
 
 # Path: tests\tests_graph.py
@@ -20,7 +21,7 @@ def test_graph():
     g.add(1, {'color': 'blue'})  # add another node with a property
     g.add((0, 1), {'weight': 1.0})  # add a looping link with a property
     assert g.to_dict() == {'graph': {0: {1: {'weight': 1.0}, 'color': 'red'}, 1: {'color': 'blue'}}}
-    assert g.nodes() == {0: None, 1: {'color': 'blue'}}
+    assert g.nodes() == {0: {'color': 'red'}, 1: {'color': 'blue'}}
     assert g.links() == {(0, 1): {'weight': 1.0}}
     assert g.to_matrix() == [[0, 1], [0, 0]]
 
@@ -58,6 +59,363 @@ def test_graph():
     assert g.to_dict() == {'graph': {0: {1: {'weight': 1.0}}, 1: {'color': 'blue'}}}
 
 
+# Test the reverse adjacency index
+def test_predecessors():
+    g = graph({'graph': {0: {1: None, 2: None}, 1: {2: None, 'color': 'red'}, 2: {2: None}, 3: None}})
+    assert g.predecessors(2) == {0, 1, 2}
+    assert g.in_degree(0) == 0
+    g.add((3, 0))
+    g.dlt((0, 1))
+    assert g.predecessors(0) == {3}
+    assert g.in_degree(1) == 0
+    g.dlt(2)
+    assert g.to_dict() == {'graph': {0: {}, 1: {'color': 'red'}, 3: {0: None}}}
+
+    # The result is a copy, the graph can be changed while iterating it
+    g.add((1, 0))
+    for from_node in g.predecessors(0):
+        g.dlt((from_node, 0))
+    assert g.in_degree(0) == 0 and isinstance(g.predecessors(0), frozenset)
+
+    # Without the index, the results are the same
+    g = graph({'graph': {0: {1: None, 2: None}, 1: {2: None}, 2: None}}, reverse_index=False)
+    assert g.predecessors(2) == {0, 1}
+    g.dlt(2)
+    assert g.to_dict() == {'graph': {0: {1: None}, 1: {}}}
+
+    with pytest.raises(ValueError):
+        g.predecessors(5)
+
+
+# Test linked nodes missing from the graph dict, with and without the index
+def test_missing_linked_nodes():
+    for reverse_index in (True, False):
+        g = graph({'graph': {0: {1: None, 'color': 'red'}}}, reverse_index=reverse_index)
+        assert g.adjacency() == {0: {1: None}, 1: {}}
+        assert g.predecessors(1) == {0} and g.in_degree(1) == 1 and g.predecessors(0) == set()
+        with pytest.raises(ValueError):
+            g.predecessors(2)
+
+
+# Test batched loading
+def test_add_many():
+    g = graph()
+    g.add_many(nodes=[0, (1, {'color': 'blue'})], links=((i, i + 1) for i in range(3)))
+    g.add_many(links={(0, 2): {'weight': 2.0}})
+    g.add_many(links=[(3, 0, None)])
+    assert g.to_dict() == {'graph': {0: {1: None, 2: {'weight': 2.0}}, 1: {2: None, 'color': 'blue'},
+                                     2: {3: None}, 3: {0: None}}}
+    assert g.predecessors(0) == {3}
+
+    # Invalid batches are not written
+    with pytest.raises(ValueError):
+        g.add_many(nodes=[4], links=[(0, 1)])
+    with pytest.raises(ValueError):
+        g.add_many(links=[(5, 6), (5, 6)])
+    with pytest.raises(TypeError):
+        g.add_many(nodes=[4], links=[(5, 'a')])
+    with pytest.raises(TypeError):
+        g.add_many(links=[5])
+    assert 4 not in g.to_dict()['graph']
+    with pytest.raises(TypeError):
+        g.add_many(nodes=[(4,)])
+
+    # Int keys in the nodes' dicts are links, as in add()
+    for layout in ('nested', 'split'):
+        g = graph(layout=layout)
+        g.add(1)
+        g.predecessors(1)
+        g.add_many(nodes={5: {1: None, 'color': 'red'}})
+        assert g.adjacency() == {1: {}, 5: {1: None}} and g.nodes()[5] == {'color': 'red'}
+        assert g.predecessors(1) == {5}
+        g.dlt(1)
+        assert g.links() == {}
+        g.add_many(nodes=[(6, {7: {'w': 1}})])
+        assert g.adjacency()[7] == {} and g.links() == {(6, 7): {'w': 1}}
+        with pytest.raises(ValueError):
+            g.add_many(nodes={8: {6: None}}, links=[(8, 6)])
+
+
+# Test the output formats of to_matrix
+def test_to_matrix_formats():
+    g = graph({'graph': {10: {30: {'weight': 2.0}, 20: None}, 20: None, 30: {10: {'cost': 5}}}})
+    assert g.to_matrix() == [[0, 1, 2], [0, 0, 0], [1, 0, 0]]
+    assert g.to_matrix(order=[30, 10]) == [[0, 1], [2, 0]]
+    assert g.to_matrix(weight='cost') == [[0, 1, 1], [0, 0, 0], [5, 0, 0]]
+    rows, cols, values = g.to_matrix('coo')
+    assert (list(rows), list(cols), list(values)) == ([0, 0, 2], [2, 1, 0], [2.0, 1.0, 1.0])
+    indptr, indices, values = g.to_matrix('csr')
+    assert (list(indptr), list(indices), list(values)) == ([0, 2, 2, 3], [2, 1, 0], [2.0, 1.0, 1.0])
+    assert graph().to_matrix() == []
+    with pytest.raises(ValueError):
+        g.to_matrix('dok')
+    with pytest.raises(ValueError):
+        g.to_matrix(order=[10, 10])
+
+    # Frozen graphs share the formats
+    f = g.freeze()
+    assert f.to_matrix() == g.to_matrix()
+    assert f.to_matrix(order=[30, 10]) == [[0, 1], [2, 0]]
+    assert [list(a) for a in f.to_matrix('csr')] == [list(a) for a in g.to_matrix('csr')]
+
+    # Linked nodes missing from the graph dict are rows too, in every layout
+    graph_dict = {'graph': {0: {3: {'weight': 1}}, 1: None}}
+    expected = [[0, 0, 1], [0, 0, 0], [0, 0, 0]]
+    for layout in ('nested', 'split'):
+        g = graph(graph_dict, layout=layout)
+        assert g.to_matrix() == g.freeze().to_matrix() == expected
+        assert g.to_matrix(order=[3, 0]) == [[0, 0], [1, 0]]
+        with pytest.raises(ValueError):
+            g.to_matrix(order=[2])
+
+
+# Test the NumPy output of to_matrix
+def test_to_matrix_numpy():
+    np = pytest.importorskip('numpy')
+    g = graph({'graph': {0: {1: {'weight': 3.0}}, 1: None}})
+    assert np.array_equal(g.to_matrix('numpy'), np.array([[0.0, 3.0], [0.0, 0.0]]))
+
+
+# Test the input formats of from_matrix
+def test_from_matrix_formats():
+    g = graph()
+    g.from_matrix([[0, 0.5, 0], [0, 0, 2], [0, 0, 0]], threshold=1.0)
+    assert g.to_dict() == {'graph': {0: None, 1: {2: {'weight': 2}}, 2: None}}
+    g.from_matrix(([0, 2], [1, 0], [4.0, 1.0]), fmt='coo', order=[10, 20, 30], weight='w')
+    assert g.to_dict() == {'graph': {10: {20: {'w': 4.0}}, 20: None, 30: {10: {'w': 1.0}}}}
+    assert g.predecessors(10) == {30}
+    g.from_matrix(g.to_matrix('csr'), fmt='csr', order=[10, 20, 30], weight=None)
+    assert g.to_dict() == {'graph': {10: {20: None}, 20: None, 30: {10: None}}}
+    with pytest.raises(ValueError):
+        g.from_matrix([[0, 1]])
+    with pytest.raises(TypeError):
+        g.from_matrix([[0, 'a'], [0, 0]])
+
+    # Indices out of [0, n), the graph is left unchanged
+    for matrix, fmt in ((([0, -1], [1, 0], [1, 1]), 'coo'), (([0, 3], [1, 0], [1, 1]), 'coo'),
+                        (([0, 1, 1], [2], [1]), 'csr'), (([0, 1, 1], [-1], [1]), 'csr'),
+                        (([0, 1, 0], [1], [1]), 'csr')):
+        with pytest.raises(ValueError):
+            g.from_matrix(matrix, fmt=fmt, order=[10, 20] if fmt == 'coo' else None)
+    assert g.to_dict() == {'graph': {10: {20: None}, 20: None, 30: {10: None}}}
+
+
+# Test from_matrix with NumPy arrays
+def test_from_matrix_numpy():
+    np = pytest.importorskip('numpy')
+    g = graph()
+    g.from_matrix(np.array([[0.0, 3.0], [0.1, 0.0]]), threshold=0.5)
+    assert g.to_dict() == {'graph': {0: {1: {'weight': 3.0}}, 1: None}}
+
+
+# Test the cached views and the generators
+def test_views():
+    g = graph({'graph': {0: {1: {'weight': 1.0}, 'color': 'red'}, 1: None, 2: {0: None, 2: None}}})
+    nodes, links, adjacency = g.nodes(), g.links(), g.adjacency()
+    assert nodes == {0: {'color': 'red'}, 1: None, 2: None}
+    assert adjacency == {0: {1: {'weight': 1.0}}, 1: {}, 2: {0: None, 2: None}}
+    with pytest.raises(TypeError):
+        nodes[3] = None
+
+    # The views are patched by add and dlt
+    version = g.version
+    g.add(3, {'color': 'blue'})
+    g.add((3, 4), {'weight': 2.0})
+    g.dlt((2, 0))
+    g.dlt(2)
+    assert g.version == version + 4
+    fresh = graph(g.to_dict())
+    assert nodes == fresh.nodes() == {0: {'color': 'red'}, 1: None, 3: {'color': 'blue'}, 4: None}
+    assert links == fresh.links() == {(0, 1): {'weight': 1.0}, (3, 4): {'weight': 2.0}}
+    assert adjacency == fresh.adjacency()
+
+    # and by bulk changes, the views returned before stay up to date
+    for layout in ('nested', 'split'):
+        for reverse_index in (True, False):
+            g = graph({'graph': {0: {1: None}, 1: None}}, reverse_index=reverse_index, layout=layout)
+            nodes, links, adjacency = g.nodes(), g.links(), g.adjacency()
+
+            def check():
+                fresh = graph(g.to_dict())
+                assert nodes == fresh.nodes() and links == fresh.links() and adjacency == fresh.adjacency()
+
+            g.add_many(nodes={5: {'color': 'red'}}, links=[(4, 0), (5, 6)])
+            check()
+            # A node whose properties link to a node missing from the graph dict
+            g.add(8, {9: None})
+            check()
+            assert adjacency[9] == {}
+            g.dlt(0)
+            check()
+            g.union_update(graph({'graph': {7: {1: None}}}))
+            check()
+            g.intersect_update(graph({'graph': {7: {1: None}, 1: None, 4: None}}))
+            check()
+            g.from_matrix([[0, 1], [0, 0]])
+            check()
+            assert links == {(0, 1): {'weight': 1}}
+
+
+# Test the split storage layout against the nested one
+def test_split_layout():
+    data = {'graph': {0: {1: {'weight': 2.0}, 'color': 'red'}, 1: {'color': 'blue'}, 2: {}, 'kind': 'test'}}
+    graphs = [graph({'graph': dict(data['graph'])}), graph(data, layout='split')]
+    assert graphs[1].layout == 'split'
+    assert graphs[1].to_dict() == {'graph': {**data['graph'], 2: None}}
+    # A node without properties is None in both layouts
+    assert graphs[0].nodes() == graphs[1].nodes() == {0: {'color': 'red'}, 1: {'color': 'blue'}, 2: None}
+    for g in (graph(layout='split'), graph()):
+        g.add(5, {})
+        g.add_many(nodes=[(6, {})])
+        assert g.nodes() == {5: None, 6: None}
+    assert graphs[1].adjacency() == {0: {1: {'weight': 2.0}}, 1: {}, 2: {}}
+    for g in graphs:
+        g.add(3, {'color': 'green'})
+        g.add((1, 3), {'weight': 0.5})
+        g.add((3, 0))
+        g.add_many(links=[(2, 0), (4, 1)])
+        g.dlt((0, 1))
+        g.dlt(2)
+    nested, split = graphs
+    assert split.to_dict() == nested.to_dict()
+    assert split.links() == nested.links()
+    assert split.adjacency() == nested.adjacency()
+    assert split.predecessors(0) == nested.predecessors(0) == {3}
+    assert split.to_matrix() == nested.to_matrix()
+    assert split.freeze().to_dict() == nested.freeze().to_dict()
+    split.from_matrix([[0, 1], [0, 0]])
+    assert split.to_dict() == {'graph': {0: {1: {'weight': 1}}, 1: None}}
+    with pytest.raises(ValueError):
+        split.add((0, 1))
+    with pytest.raises(ValueError):
+        graph(layout='columns')
+
+
+# Test union and intersection with both layouts and the conflict policies
+def test_union_intersect():
+    for layout in ('nested', 'split'):
+        a = graph({'graph': {0: {1: {'w': 1}}, 1: {'color': 'red'}, 'name': 'a'}}, layout=layout)
+        b = graph({'graph': {1: {2: None, 'color': 'blue'}, 0: {1: {'w': 2, 'x': 0}}}}, layout=layout)
+        assert a.union(b).to_dict() == {'graph': {0: {1: {'w': 2, 'x': 0}}, 1: {2: None, 'color': 'blue'},
+                                                  2: None, 'name': 'a'}}
+        assert a.union(b, policy='left').links()[(0, 1)] == {'w': 1, 'x': 0}
+        assert a.union(b, policy=lambda key, left, right: left + right).links()[(0, 1)] == {'w': 3, 'x': 0}
+        assert a.intersect(b).to_dict() == {'graph': {0: {1: {'w': 2, 'x': 0}}, 1: {'color': 'blue'}}}
+        assert a.to_dict()['graph'][0] == {1: {'w': 1}}
+        with pytest.raises(ValueError):
+            a.union(b, policy='error')
+        with pytest.raises(ValueError):
+            a.union(b, policy='first')
+        assert a.links() == {(0, 1): {'w': 1}}
+
+        # In place
+        a.union_update(b)
+        assert a.predecessors(2) == {1} and a.links()[(1, 2)] is None
+        a.intersect_update(graph({'graph': {1: {2: None}}}))
+        assert a.to_dict() == {'graph': {1: {2: None, 'color': 'blue'}, 2: None}}
+    assert union_all([graph({'graph': {i: {i + 1: None}}}) for i in range(4)]).links().keys() == \
+           {(0, 1), (1, 2), (2, 3), (3, 4)}
+
+    # Merging shards patches the views and the index, nothing is rebuilt from all the nodes
+    for layout in ('nested', 'split'):
+        g = graph({'graph': {0: {1: None}, 1: None}}, layout=layout)
+        nodes, links, adjacency = g.nodes(), g.links(), g.adjacency()
+        g.predecessors(1)
+        g.instrument()
+        for i in range(1, 20):
+            g.union_update(graph({'graph': {i: {i + 1: {'w': i}, 'color': i}, 'name': i}}))
+            assert g.predecessors(i + 1) == {i}
+        assert all(op['rebuilds'] == 0 for op in g.stats()['operations'].values())
+        fresh = graph(g.to_dict())
+        assert nodes == fresh.nodes() and links == fresh.links() and adjacency == fresh.adjacency()
+        assert g.predecessors(20) == {19} and g.to_dict()['graph']['name'] == 19
+    assert union_all([]).to_dict() == {'graph': None}
+
+
+# Test copies, with and without copy on write
+def test_copy():
+    for layout in ('nested', 'split'):
+        g = graph({'graph': {0: {1: {'w': 1}}, 1: {2: None}, 2: None}}, layout=layout)
+        for cow in (False, True):
+            c = g.copy(cow=cow)
+            assert c.to_dict() == g.to_dict() and c.layout == layout
+            c.add((0, 2))
+            c.dlt((1, 2))
+            g.add((2, 0))
+            assert c.links().keys() == {(0, 1), (0, 2)}
+            assert g.links().keys() == {(0, 1), (1, 2), (2, 0)}
+            assert c.links()[(0, 1)] is g.links()[(0, 1)]
+            assert c.predecessors(2) == {0} and g.predecessors(2) == {1}
+            g.dlt((2, 0))
+
+
+# Test the memory usage breakdown, exact and sampled
+def test_memory_usage():
+    g = graph()
+    g.add_many(nodes=((i, {'name': f'node{i}'}) for i in range(1000)),
+               links={(i, (i * 7 + 1) % 1000): {'weight': float(i)} for i in range(1000)})
+    usage = g.memory_usage()
+    assert usage['total'] == sum(value for key, value in usage.items() if key != 'total')
+    assert usage['link_properties'] > usage['keys'] > 0 and usage['indexes'] == 0
+    estimate = g.memory_usage(sample=100)
+    assert abs(estimate['total'] - usage['total']) < 0.1 * usage['total']
+    g.links()
+    assert g.memory_usage()['indexes'] > 0
+    split = graph(g.to_dict(), layout='split').memory_usage()
+    assert split['link_properties'] == usage['link_properties']
+
+
+# Test the instrumentation: counters, rebuilds, hooks and plain methods when disabled
+def test_instrument():
+    g = graph()
+    assert g.stats() == {'enabled': False, 'version': 0, 'operations': {}}
+    calls = []
+    g.instrument(before=lambda g_, name, args, kwargs: calls.append(('before', name, args)),
+                 after=[lambda g_, name, args, kwargs: calls.append(('after', name, args))])
+    assert 'add' in vars(g)
+    g.add(0)
+    g.add((0, 1), {'w': 2})
+    g.links()
+    g.links()
+    g.nodes()
+    g.to_matrix()
+    with pytest.raises(ValueError):
+        g.add(0)
+    assert calls == [('before', 'add', (0,)), ('after', 'add', (0,)),
+                     ('before', 'add', ((0, 1), {'w': 2})), ('after', 'add', ((0, 1), {'w': 2})),
+                     ('before', 'add', (0,))]
+    stats = g.stats(reset=True)
+    assert stats['enabled'] and stats['version'] == 2
+    operations = stats['operations']
+    assert operations['add']['calls'] == 3 and operations['add']['seconds'] > 0
+    assert operations['links']['calls'] == 2 and operations['links']['rebuilds'] == 1
+    assert operations['nodes']['rebuilds'] == 1 and operations['to_matrix']['rebuilds'] == 1
+    assert g.stats()['operations']['add'] == {'calls': 0, 'seconds': 0.0, 'rebuilds': 0}
+
+    # Hooks are replaced, counters kept
+    g.instrument()
+    g.dlt((0, 1))
+    assert len(calls) == 5 and g.stats()['operations']['dlt']['calls'] == 1
+    g.uninstrument()
+    assert 'add' not in vars(g) and g.add.__func__ is Graph.add
+    g.add(2)
+    assert not g.stats()['enabled'] and g.stats()['operations']['add']['calls'] == 0
+
+    # Constructors
+    graph_module.constructor_stats(reset=True)
+    graph_module.instrument_constructors()
+    try:
+        h = graph_module.from_nodes_and_links({0: None}, {(0, 1): None})
+        graph_module.graph()
+        assert h.stats()['enabled']
+        stats = graph_module.constructor_stats()
+        assert stats['enabled'] and stats['operations']['from_nodes_and_links']['calls'] == 1
+        assert stats['operations']['graph']['calls'] == 1
+    finally:
+        graph_module.uninstrument_constructors()
+    assert graph_module.graph is graph and not graph_module.constructor_stats()['enabled']
+
+
 # Run the tests script
 if __name__ == '__main__':
     pytest.main()
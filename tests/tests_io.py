@@ -0,0 +1,73 @@
+"""
+Tests for the io module.
+author: @jocerfranquiz
+date: 2023-02-19
+version: 0.0.1
+"""
+
+import io
+
+import pytest
+from src.kladia.graph import graph
+from src.kladia.io import read_edgelist, write_edgelist, iter_edgelist, read_jsonl, write_jsonl, iter_jsonl
+
+
+# Test edge lists, with property columns and gzip
+def test_edgelist(tmp_path):
+    lines = ['# comment', '0 1 2.5 a', '1 2 0.5', '', '2 0', '3']
+    g = read_edgelist(lines, properties=[('weight', float), ('label', str)], chunk_size=2)
+    assert g.to_dict() == {'graph': {0: {1: {'weight': 2.5, 'label': 'a'}}, 1: {2: {'weight': 0.5}},
+                                     2: {0: None}, 3: None}}
+    assert list(iter_edgelist(g, properties=['weight'])) == ['0 1 2.5\n', '1 2 0.5\n', '2 0\n', '3\n']
+
+    for name in ('graph.txt', 'graph.txt.gz'):
+        path = tmp_path / name
+        assert write_edgelist(g, path, properties=['weight', 'label'], delimiter='\t') == 4
+        assert read_edgelist(path, properties=[('weight', float), ('label', str)], delimiter='\t').links() == g.links()
+
+    with pytest.raises(ValueError):
+        read_edgelist(['0 1', 'a 2'])
+    with pytest.raises(ValueError):
+        read_edgelist(['0 1 2.0'])
+
+
+# Test JSON lines round trips
+def test_jsonl(tmp_path):
+    g = graph({'graph': {0: {1: {'weight': 1.0}, 'color': 'red'}, 1: None, 2: {'tags': ['a', 'b']}}})
+    lines = list(iter_jsonl(g))
+    assert lines[0] == '{"node":0,"properties":{"color":"red"}}\n' and len(lines) == 4
+    assert read_jsonl(lines, chunk_size=1).to_dict() == g.to_dict()
+
+    f = io.StringIO()
+    assert write_jsonl(g, f) == 4
+    f.seek(0)
+    assert read_jsonl(f).to_dict() == g.to_dict()
+    path = tmp_path / 'graph.jsonl.gz'
+    write_jsonl(g, path)
+    assert read_jsonl(path, g=graph(layout='split')).to_dict() == g.to_dict()
+
+    with pytest.raises(ValueError):
+        read_jsonl(['{"nodes": 0}'])
+
+
+# Test that the nodes read after links to them load the same with any chunk size
+def test_chunk_size():
+    lines = ['0 1', '1', '2', '2']
+    assert read_edgelist(lines, chunk_size=1).to_dict() == read_edgelist(lines).to_dict() == \
+           {'graph': {0: {1: None}, 1: None, 2: None}}
+    lines = ['{"link": [0, 1]}', '{"node": 1, "properties": {"color": "red"}}', '{"node": 0}',
+             '{"node": 1, "properties": {"size": 2}}']
+    expected = {'graph': {0: {1: None}, 1: {'color': 'red', 'size': 2}}}
+    for chunk_size in (1, 2, 100000):
+        assert read_jsonl(lines, chunk_size=chunk_size).to_dict() == expected
+
+    # Node lines of nodes already in the graph are merged into them
+    assert read_edgelist(['0 1', '0'], g=graph({'graph': {0: None}})).to_dict() == {'graph': {0: {1: None}, 1: None}}
+    for chunk_size in (1, 100000):
+        g = read_jsonl(lines, chunk_size=chunk_size, g=graph({'graph': {1: {'color': 'blue', 'shape': 'box'}}}))
+        assert g.to_dict() == {'graph': {0: {1: None}, 1: {'color': 'red', 'shape': 'box', 'size': 2}}}
+
+
+# Run the tests script
+if __name__ == '__main__':
+    pytest.main()
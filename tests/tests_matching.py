@@ -0,0 +1,56 @@
+"""
+Tests for the matching module.
+author: @jocerfranquiz
+date: 2023-02-12
+version: 0.0.1
+"""
+
+import random
+
+import pytest
+from src.kladia.graph import graph
+from src.kladia.flow import max_flow
+from src.kladia.matching import bipartition, hopcroft_karp
+
+
+# Test the bipartition of a graph
+def test_bipartition():
+    g = graph({'graph': {0: {1: None}, 2: {1: None, 3: None}, 4: None}})
+    assert bipartition(g) == ({0, 2, 4}, {1, 3})
+    g.add((2, 0))
+    with pytest.raises(ValueError):
+        bipartition(g)
+
+
+# Test Hopcroft-Karp against the maximum flow, with and without a previous matching
+def test_hopcroft_karp():
+    g = graph({'graph': {0: {10: None, 11: None}, 1: {10: None}, 2: {11: None, 12: None}, 12: {3: None}}})
+    matching = hopcroft_karp(g, left=[0, 1, 2, 3])
+    assert len(matching) == 3 and set(matching.values()) == {10, 11, 12}
+    with pytest.raises(ValueError):
+        hopcroft_karp(g, left=[0, 1, 2, 10])
+
+    rnd = random.Random(2)
+    for _ in range(20):
+        g = graph()
+        g.add_many(nodes=range(40), links={(rnd.randrange(20), rnd.randrange(20, 40)): None for _ in range(50)})
+        matching = hopcroft_karp(g, left=range(20))
+        assert all(v in g.adjacency()[u] for u, v in matching.items())
+        assert len(set(matching.values())) == len(matching)
+        g.add_many(nodes=[-1, -2], links=[(-1, u) for u in range(20)] + [(v, -2) for v in range(20, 40)])
+        assert len(matching) == max_flow(g, -1, -2)[0]
+        g.dlt(-1)
+        g.dlt(-2)
+
+        # Warm start after some changes
+        for _ in range(5):
+            g.dlt(rnd.choice(list(g.links())))
+            link = (rnd.randrange(20), rnd.randrange(20, 40))
+            if link not in g.links():
+                g.add(link)
+        assert len(hopcroft_karp(g, left=range(20), matching=matching)) == len(hopcroft_karp(g, left=range(20)))
+
+
+# Run the tests script
+if __name__ == '__main__':
+    pytest.main()
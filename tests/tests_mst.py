@@ -0,0 +1,48 @@
+"""
+Tests for the mst and disjoint_set modules.
+author: @jocerfranquiz
+date: 2023-01-29
+version: 0.0.1
+"""
+
+import random
+
+import pytest
+from src.kladia.graph import graph
+from src.kladia.disjoint_set import DisjointSet
+from src.kladia.mst import kruskal, prim
+
+
+# Test the disjoint-set structure
+def test_disjoint_set():
+    sets = DisjointSet(5)
+    assert sets.union(0, 1) and sets.union(3, 4) and sets.union(1, 4)
+    assert not sets.union(0, 3)
+    assert sets.connected(0, 4) and not sets.connected(0, 2)
+    assert sets.sets == 2
+    assert sets.add() == 5 and len(sets) == 6 and sets.sets == 3
+
+
+# Test Kruskal and Prim on a small graph and on random graphs
+def test_mst():
+    heavy = {'weight': 10}
+    g = graph({'graph': {0: {1: {'weight': 1}, 2: heavy}, 1: {2: {'weight': 2}}, 3: {2: {'weight': 3}}, 4: {4: None}}})
+    forest = kruskal(g)
+    assert forest.links().keys() == {(0, 1), (1, 2), (3, 2)}
+    assert forest.nodes().keys() == {0, 1, 2, 3, 4}
+    assert forest.links()[(3, 2)] is g.links()[(3, 2)]
+    assert sorted(prim(g, as_graph=False), key=lambda link: link[:2]) == sorted(kruskal(g, as_graph=False))
+
+    rnd = random.Random(3)
+    for _ in range(20):
+        g = graph()
+        g.add_many(nodes=range(30), links={(rnd.randrange(30), rnd.randrange(30)): {'weight': rnd.randrange(100)}
+                                           for _ in range(60)})
+        total = [sum(p['weight'] for _, _, p in algorithm(g, as_graph=False)) for algorithm in (kruskal, prim)]
+        assert total[0] == total[1]
+        assert len(kruskal(g, as_graph=False)) == len(prim(g, as_graph=False))
+
+
+# Run the tests script
+if __name__ == '__main__':
+    pytest.main()
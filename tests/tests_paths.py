@@ -0,0 +1,52 @@
+"""
+Tests for the paths module.
+author: @jocerfranquiz
+date: 2023-01-15
+version: 0.0.1
+"""
+
+import random
+from math import inf
+
+import pytest
+from src.kladia.graph import graph
+from src.kladia.paths import dijkstra, shortest_path, astar, bidirectional_dijkstra
+
+
+# Test the shortest paths on a small weighted graph
+def test_shortest_paths():
+    g = graph({'graph': {0: {1: {'weight': 4}, 2: {'weight': 1}}, 1: {3: {'weight': 1}},
+                         2: {1: {'weight': 2}, 3: {'weight': 5}}, 3: {4: None}, 4: None, 5: None}})
+    dist, pred = dijkstra(g, 0)
+    assert dist == {0: 0.0, 1: 3.0, 2: 1.0, 3: 4.0, 4: 5.0}
+    assert pred[1] == 2
+    assert shortest_path(g, 0, 4) == (5.0, [0, 2, 1, 3, 4])
+    assert bidirectional_dijkstra(g, 0, 4) == (5.0, [0, 2, 1, 3, 4])
+    assert astar(g, 0, 4, lambda node_k, target: 0.0) == (5.0, [0, 2, 1, 3, 4])
+    assert shortest_path(g, 0, 5) == bidirectional_dijkstra(g, 0, 5) == (inf, [])
+    assert bidirectional_dijkstra(g, 3, 3) == (0.0, [3])
+    with pytest.raises(ValueError):
+        shortest_path(g, 0, 6)
+    g.add((4, 0), {'weight': -1})
+    with pytest.raises(ValueError):
+        dijkstra(g, 3)
+
+
+# Test that every single-pair search agrees with Dijkstra on random graphs
+def test_shortest_paths_random():
+    rnd = random.Random(1)
+    g = graph()
+    g.add_many(nodes=range(60), links={(rnd.randrange(60), rnd.randrange(60)): {'weight': rnd.random()}
+                                       for _ in range(240)})
+    dist, _ = dijkstra(g, 0)
+    for target in range(60):
+        expected = dist.get(target, inf)
+        for search in (shortest_path, bidirectional_dijkstra):
+            d, path = search(g, 0, target)
+            assert d == pytest.approx(expected)
+            assert (path[0], path[-1]) == (0, target) if path else expected == inf
+
+
+# Run the tests script
+if __name__ == '__main__':
+    pytest.main()
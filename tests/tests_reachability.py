@@ -0,0 +1,80 @@
+"""
+Tests for the reachability module.
+author: @jocerfranquiz
+date: 2023-01-22
+version: 0.0.1
+"""
+
+import random
+
+import pytest
+from src.kladia.graph import graph
+from src.kladia.reachability import ReachabilityIndex
+from src.kladia.traversal import bfs
+
+
+def closure(g) -> set:
+    """Transitive closure computed with BFS from every node"""
+    return {(u, v) for u in g.adjacency() for v in bfs(g, u)}
+
+
+# Test the index against BFS while the graph changes
+def test_reachability_index(tmp_path):
+    g = graph({'graph': {0: {1: None}, 1: {2: None}, 2: {0: None}, 3: {4: None}, 4: None}})
+    index = ReachabilityIndex(g)
+    assert index.reachable(0, 2) and index.reachable(2, 1) and index.reachable(4, 4)
+    assert not index.reachable(0, 3)
+    assert index.reachable_from(3) == {3, 4}
+
+    rnd = random.Random(7)
+    for _ in range(200):
+        links = list(g.links())
+        nodes = list(g.adjacency())
+        op = rnd.random()
+        if op < 0.5:
+            link = (rnd.choice(nodes), rnd.randrange(12))
+            if link not in g.links():
+                index.add(link)
+        elif op < 0.85 and links:
+            index.dlt(rnd.choice(links))
+        elif op < 0.95 and len(nodes) > 2:
+            index.dlt(rnd.choice(nodes))
+        else:
+            node_k = rnd.randrange(12, 100)
+            if node_k not in g.adjacency():
+                index.add(node_k)
+        expected = closure(g)
+        assert {(u, v) for u in g.adjacency() for v in g.adjacency() if index.reachable(u, v)} == expected
+
+    # Changes made on the graph directly rebuild the index
+    g.add((200, 201))
+    assert index.reachable(200, 201)
+
+    # Links in the properties of a new node
+    index.add(300, {200: None, 301: None, 'color': 'red'})
+    assert index.reachable(300, 201) and index.reachable(300, 301) and not index.reachable(301, 300)
+    index.add(302, {300: None})
+    index.add(303, {302: None, 'w': 1})
+    index.add((301, 303))
+    assert index.reachable(301, 300) and index.reachable_from(303) == {300, 301, 302, 303, 200, 201}
+    assert {(u, v) for u in g.adjacency() for v in g.adjacency() if index.reachable(u, v)} == closure(g)
+    with pytest.raises(ValueError):
+        index.dlt(400)
+
+    # Node 1 is linked but missing from the graph dict, its links close a cycle
+    h = graph({'graph': {0: {1: None}}})
+    other = ReachabilityIndex(h)
+    other.add(1, {0: None, 2: None})
+    assert other.reachable(1, 0) and other.reachable(0, 2) and not other.reachable(2, 0)
+
+    path = tmp_path / 'index.json'
+    index.save(str(path))
+    loaded = ReachabilityIndex.load(str(path), g)
+    assert loaded.reachable_from(200) == {200, 201}
+    with pytest.raises(ValueError):
+        ReachabilityIndex.load(str(path), graph())
+
+
+# Run the tests script
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,76 @@
+"""
+Tests for the traversal module.
+author: @jocerfranquiz
+date: 2023-01-15
+version: 0.0.1
+"""
+
+import pytest
+from src.kladia.graph import graph
+from src.kladia.traversal import bfs, dfs
+from src.kladia.utils import get_size
+
+
+# Test BFS and DFS on a directed binary tree plus a back link
+def test_search():
+    g = graph({'graph': {0: {1: None, 2: None}, 1: {3: None, 4: None}, 2: {5: None, 6: None},
+                         3: None, 4: None, 5: None, 6: {0: None}}})
+    assert list(bfs(g, 0)) == [0, 1, 2, 3, 4, 5, 6]
+    assert list(dfs(g, 0)) == [0, 1, 3, 4, 2, 5, 6]
+    assert list(bfs(g, 0, depth_limit=1)) == [0, 1, 2]
+    assert list(dfs(g, 0, depth_limit=1)) == [0, 1, 2]
+    assert list(bfs(g, 0, edges=True))[:2] == [(0, 1), (0, 2)]
+    assert list(dfs(g, 0, edges=True)) == [(0, 1), (1, 3), (1, 4), (0, 2), (2, 5), (2, 6)]
+    assert list(bfs(g, [3, 5], reverse=True)) == [3, 5, 1, 2, 0, 6]
+    assert list(dfs(g, 5, reverse=True, visited='bitmap')) == [5, 2, 0, 6]
+
+    # Early termination
+    search = bfs(g, 0, visited='bitmap')
+    assert next(search) == 0 and next(search) == 1
+    search.close()
+
+    with pytest.raises(ValueError):
+        list(bfs(g, 7))
+    with pytest.raises(ValueError):
+        list(dfs(g, 0, visited='list'))
+
+
+# Test the searches read the links of the graph without building the adjacency view
+def test_search_neighbours():
+    for reverse_index in (True, False):
+        # Node 3 is linked but missing from the graph dict
+        g = graph({'graph': {0: {1: None, 'w': 1}, 1: {2: None, 3: None}, 2: {0: None}}},
+                  reverse_index=reverse_index)
+        assert list(bfs(g, 0)) == [0, 1, 2, 3]
+        assert list(dfs(g, 3, reverse=True, visited='bitmap')) == [3, 1, 0, 2]
+        assert list(g.successors(0)) == [1] and list(g.successors(3)) == [] and g.out_degree(1) == 2
+        with pytest.raises(ValueError):
+            g.successors(4)
+        with pytest.raises(ValueError):
+            list(dfs(g, 4))
+
+    # Nothing is cached in the graph
+    g = graph({'graph': {0: {1: None}, 1: {2: None}, 2: {0: None}}}, reverse_index=False)
+    size = get_size(g)
+    assert list(bfs(g, 0)) == [0, 1, 2] and list(dfs(g, 0, reverse=True)) == [0, 2, 1]
+    assert get_size(g) == size
+
+    # Sparse keys grow the bitmap, negative keys do not fit in it
+    g = graph({'graph': {0: {10 ** 6: None}, -1: None}})
+    assert list(bfs(g, 0, visited='bitmap')) == [0, 10 ** 6]
+    with pytest.raises(ValueError):
+        list(bfs(g, -1, visited='bitmap'))
+
+
+# Test searches deeper than the recursion limit
+def test_search_deep():
+    n = 20000
+    g = graph(layout='split')
+    g.add_many(links=((i, i + 1) for i in range(n)))
+    assert sum(1 for _ in dfs(g, 0)) == n + 1
+    assert list(bfs(g, n, reverse=True, depth_limit=2)) == [n, n - 1, n - 2]
+
+
+# Run the tests script
+if __name__ == '__main__':
+    pytest.main()
@@ -5,8 +5,11 @@ date: 2022-12-02
 version: 0.0.1
 """
 
+import sys
+
 import pytest
-from src.kladia import dict_nested_order, get_size
+from src.kladia import dict_nested_order, get_size, memoize
+from src.kladia.graph import graph
 
 
 # Path: tests\tests_utils.py
@@ -21,6 +24,50 @@ def test_dict_nested_order():
     assert dict_nested_order({'a': {'b': {'c': 1}}, 'd': {'e': 2}}) == 3
     assert dict_nested_order({'a': {'b': {'c': 1}}, 'd': {'e': {'f': 2}}}) == 3
     assert dict_nested_order({'a': {'b': {'c': 1}}, 'd': {'e': {'f': {'g': 2}}}}) == 4
+    assert dict_nested_order({'a': {}, 'b': None}) == 1
+    d = {'a': {}}
+    d['a']['b'] = d
+    with pytest.raises(ValueError):
+        dict_nested_order(d)
+
+
+# Test the LRU cache of memoize
+def test_memoize():
+    calls = []
+
+    @memoize(maxsize=2)
+    def square(x, power=2):
+        calls.append(x)
+        return x ** power
+
+    assert square(2) == square(2) == 4
+    assert square(3) == 9 and square(2, power=3) == 8
+    assert square(3) == 9 and square(2) == 4
+    assert calls == [2, 3, 2, 2]
+    assert square.cache_info() == (2, 4, 2, 2)
+    square.cache_clear()
+    assert square.cache_info() == (0, 0, 2, 0)
+
+    # Graphs are keys by identity and version, dicts are not cached
+    @memoize
+    def size(obj):
+        calls.append(obj)
+        return len(obj.links()) if hasattr(obj, 'links') else len(obj)
+
+    g = graph({'graph': {0: {1: None}}})
+    assert size(g) == size(g) == 1
+    g.add((1, 0))
+    assert size(g) == 2
+    assert size({'a': 1}) == size({'a': 1}) == 1
+    assert size.cache_info() == (1, 4, 128, 2)
+
+    # Positional and keyword arguments are different keys
+    @memoize
+    def arguments(*args, **kwargs):
+        return args, kwargs
+
+    assert arguments(('x', 1)) == ((('x', 1),), {})
+    assert arguments(x=1) == ((), {'x': 1})
 
 
 # Test get_size function
@@ -32,6 +79,17 @@ def test_get_size():
     assert get_size([]) == 56
 
 
+# Test get_size on deeply nested and self-referential objects
+def test_get_size_nested():
+    nested = []
+    for _ in range(10 * sys.getrecursionlimit()):
+        nested = [nested]
+    assert get_size(nested) == 10 * sys.getrecursionlimit() * sys.getsizeof([0]) + get_size([])
+    loop = {'a': 1}
+    loop['b'] = loop
+    assert get_size(loop) == get_size({'a': 1, 'b': None}) - get_size(None)
+
+
 # Run the tests script
 if __name__ == '__main__':
     pytest.main()